@@ -0,0 +1,228 @@
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import sqlite3
+import sys
+import time
+from detail_parser import parse_product_html  # 离线解析器（lxml），与 http 抓取后端共用
+from fields import resolve_fields
+from metrics import METRICS  # 存档写入耗时
+from sinks import OUTPUT_FORMATS, open_sinks
+from lazy import require  # zstandard（可选依赖：比 gzip 更快、压缩率更高）只在使用 zstd 时加载
+from log_setup import setup_logging
+
+# 支持的压缩格式及对应的文件扩展名
+CODECS = {"zstd": ".zst", "gzip": ".gz"}
+ZSTD_HINT = "zstd 压缩需要 zstandard，请先执行 `pip install zstandard`"
+
+def _compress(data, codec):
+    if codec == "zstd":
+        return require("zstandard", ZSTD_HINT).ZstdCompressor(level=3).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+def _decompress(data, codec):
+    if codec == "zstd":
+        return require("zstandard", ZSTD_HINT).ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+def _blob_path(root, digest, codec):
+    return os.path.join(root, "objects", digest[:2], digest + ".html" + CODECS[codec])
+
+class PageArchive:
+    """
+    原始页面存档：按内容哈希（sha256）去重压缩存放每个抓取到的搜索页和详情页，
+    SQLite 索引按 ASIN（搜索页为 "搜索词#页码"）和抓取时间记录每次抓取，供 reextract 离线重新抽取。
+
+    目录结构：<root>/index.sqlite3 为索引，<root>/objects/<哈希前两位>/<哈希>.html.zst|.gz 为页面内容。
+    """
+
+    def __init__(self, root, codec="gzip", commit_every=100):
+        """
+        :param root: str，存档目录
+        :param codec: str，CODECS 之一；zstd 需要安装 zstandard
+        :param commit_every: int，每写入多少条索引提交一次（关闭时提交剩余部分）
+        """
+        if codec not in CODECS:
+            raise ValueError(f"未知的压缩格式: {codec}，可选: {list(CODECS)}")
+        if codec == "zstd":
+            require("zstandard", ZSTD_HINT)  # 启动时即检查依赖，而不是在第一次写入时失败
+        self.root = root
+        self.codec = codec
+        self.commit_every = commit_every
+        self.uncommitted = 0
+        self.stored = 0  # 本次运行写入的页面数
+        self.new_bytes = 0  # 本次运行新增的压缩后字节数（内容重复的页面不重复写入）
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(root, "index.sqlite3"))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                url TEXT,
+                status INTEGER,
+                ok INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                digest TEXT NOT NULL,
+                codec TEXT NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_key ON pages(kind, key, fetched_at)")
+        self.conn.commit()
+
+    @classmethod
+    def from_config(cls, archive_config):
+        """
+        根据 config.json 中的 archive 配置创建存档。
+
+        :param archive_config: dict，archive 配置段
+        :return: PageArchive；未启用时返回 None
+        """
+        if not archive_config or not archive_config.get("enabled", False):
+            return None
+        return cls(archive_config.get("path", "page_archive"), archive_config.get("codec", "gzip"))
+
+    def _write_blob(self, html):
+        """压缩并写入页面内容，内容已存在时跳过；返回 (哈希, 新增字节数)"""
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = _blob_path(self.root, digest, self.codec)
+        if os.path.exists(path):
+            return digest, 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = _compress(data, self.codec)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)  # 先写临时文件再替换，中断时不留下半个文件
+        return digest, len(compressed)
+
+    async def save(self, kind, key, url, html, status=None, ok=True):
+        """
+        存档一个页面：压缩和写文件在线程中完成，不阻塞事件循环。
+
+        :param kind: str，页面类型：search / detail
+        :param key: str，详情页为 ASIN，搜索页为 "搜索词#页码"
+        :param url: str，页面地址
+        :param html: str，页面 HTML
+        :param status: int，可选；HTTP 状态码
+        :param ok: bool，是否为可抽取的完整页面（验证码页、非详情页为 False，reextract 跳过）
+        :return: str，页面内容的哈希
+        """
+        if not html:
+            return None
+        with METRICS.phase("archive"):
+            digest, new_bytes = await asyncio.to_thread(self._write_blob, html)
+        self.conn.execute(
+            "INSERT INTO pages (kind, key, url, status, ok, fetched_at, digest, codec) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, key, url, status, int(ok), time.time(), digest, self.codec)
+        )
+        self.stored += 1
+        self.new_bytes += new_bytes
+        self.uncommitted += 1
+        if self.uncommitted >= self.commit_every:
+            self.commit()
+        return digest
+
+    def commit(self):
+        self.conn.commit()
+        self.uncommitted = 0
+
+    def latest(self, kind="detail", since=None):
+        """
+        每个键最近一次可抽取的页面。
+
+        :param kind: str，页面类型
+        :param since: float，可选；只取该时间戳之后抓取的页面
+        :return: list，[(键, 哈希, 压缩格式)]
+        """
+        # SQLite 中与 MAX() 同一 SELECT 的裸列取自最大值所在的行
+        rows = self.conn.execute(
+            "SELECT key, digest, codec, MAX(fetched_at) FROM pages WHERE kind = ? AND ok = 1 AND fetched_at >= ? "
+            "GROUP BY key ORDER BY key",
+            (kind, since or 0)
+        ).fetchall()
+        return [(key, digest, codec) for key, digest, codec, _ in rows]
+
+    def load(self, digest, codec):
+        """:return: str，存档的页面 HTML"""
+        with open(_blob_path(self.root, digest, codec), "rb") as f:
+            return _decompress(f.read(), codec).decode("utf-8")
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+        if self.stored:
+            logging.info("🗄️ 页面存档：本次写入 %d 个页面，新增 %.1f MB（%s）", self.stored, self.new_bytes / 2 ** 20, self.root)
+
+def _reextract_one(task):
+    """在工作进程中解压并解析一个详情页"""
+    root, asin, digest, codec, fields = task
+    try:
+        with open(_blob_path(root, digest, codec), "rb") as f:
+            html = _decompress(f.read(), codec).decode("utf-8")
+        return asin, parse_product_html(asin, html, fields)
+    except Exception as e:  # 单个页面解析失败不影响其余页面
+        logging.error("❌ ASIN %s 重新抽取失败: %s", asin, e)
+        return asin, None
+
+def reextract(root, output_file, formats=("csv",), fields=None, workers=None, since=None, chunksize=32):
+    """
+    对存档中每个 ASIN 最近一次的详情页重新运行离线解析（detail_parser），多进程并行，不启动浏览器。
+
+    :param root: str，存档目录
+    :param output_file: str，输出 CSV 路径（其他格式替换扩展名）
+    :param formats: iterable，输出格式（csv / parquet）
+    :param fields: iterable，可选；只抽取这些字段，None 表示全部字段
+    :param workers: int，可选；进程数，默认 CPU 核数
+    :param since: float，可选；只处理该时间戳之后抓取的页面
+    :param chunksize: int，每次分发给工作进程的页面数
+    :return: (int, int)，成功数和总数
+    """
+    archive = PageArchive(root)
+    try:
+        pages = archive.latest("detail", since)
+    finally:
+        archive.close()
+    fields = tuple(resolve_fields(fields)) if fields else None
+    tasks = [(root, asin, digest, codec, fields) for asin, digest, codec in pages]
+    logging.info("🔁 重新抽取 %d 个 ASIN 的详情页，进程数 %s", len(tasks), workers or os.cpu_count())
+    start = time.perf_counter()
+    succeeded = 0
+    from concurrent.futures import ProcessPoolExecutor  # 连带加载 multiprocessing，只在重新抽取时导入
+    sink = open_sinks(output_file, formats)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map 按提交顺序返回结果，输出顺序与索引一致
+            for asin, product in executor.map(_reextract_one, tasks, chunksize=chunksize):
+                if product:
+                    sink.write(product)
+                    succeeded += 1
+                else:
+                    logging.warning("⚠️ ASIN %s 的存档页面无法解析", asin)
+    finally:
+        sink.close()
+    elapsed = time.perf_counter() - start
+    logging.info("✅ 重新抽取完成：%d/%d 个 ASIN，耗时 %.1f 秒，结果已保存到 %s", succeeded, len(tasks), elapsed, output_file)
+    return succeeded, len(tasks)
+
+# 程序入口：python archive.py reextract --archive page_archive --output csv/reextract.csv
+if __name__ == "__main__":
+    import argparse
+    setup_logging(log_file=None)
+    parser = argparse.ArgumentParser(description="页面存档工具")
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("reextract", help="对存档的详情页重新运行抽取，不访问网络")
+    command.add_argument("--archive", default="page_archive", help="存档目录")
+    command.add_argument("--output", default="reextract.csv", help="输出 CSV 路径（parquet 替换扩展名）")
+    command.add_argument("--formats", nargs="+", default=["csv"], choices=OUTPUT_FORMATS, help="输出格式")
+    command.add_argument("--fields", nargs="+", help="只抽取这些字段，默认全部字段")
+    command.add_argument("--workers", type=int, help="进程数，默认 CPU 核数")
+    command.add_argument("--since", type=float, help="只处理该 Unix 时间戳之后抓取的页面")
+    args = parser.parse_args()
+    succeeded, total = reextract(args.archive, args.output, args.formats, args.fields, args.workers, args.since)
+    sys.exit(0 if succeeded or not total else 1)
@@ -0,0 +1,75 @@
+import csv
+import json
+import logging
+import os
+import re
+import sys
+
+# ASIN 为 10 位大写字母和数字；也用于从 HYPERLINK 公式（结果 CSV 的 ASIN 列）中取出 ASIN
+ASIN_RE = re.compile(r"\b[A-Z0-9]{10}\b")
+
+def _match_asin(value):
+    """从单元格或 JSON 值中取出 ASIN，取不到时返回 None"""
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if len(value) == 10 and value.isalnum():
+        return value.upper()
+    match = ASIN_RE.search(value)  # =HYPERLINK("https://www.amazon.com/dp/B0...","B0...")
+    return match.group(0) if match else None
+
+def _iter_jsonl(lines):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            yield _match_asin(line)  # 非 JSON 行按纯文本处理
+            continue
+        if isinstance(record, dict):
+            record = record.get("asin") or record.get("ASIN")
+        yield _match_asin(record)
+
+def _iter_csv(lines):
+    column = 0
+    for index, row in enumerate(csv.reader(lines)):
+        if not row:
+            continue
+        if index == 0:  # 表头中有 ASIN 列时取该列（搜索保存的 ASIN CSV 和结果 CSV 都是第一列）
+            header = [cell.strip().lower() for cell in row]
+            if "asin" in header:
+                column = header.index("asin")
+                continue
+        if column < len(row):
+            yield _match_asin(row[column])
+
+def iter_asins(path):
+    """
+    逐行读取 ASIN，不把整个文件读入内存。
+
+    :param path: str，输入路径，"-" 表示标准输入；.jsonl / .json 按 JSON Lines 解析（字符串或带 asin 字段的对象），
+                 其余按 CSV 解析（search.py 保存的 ASIN CSV、结果 CSV，或每行一个 ASIN 的文本）
+    :return: generator，ASIN（未去重；无法识别的行跳过）
+    """
+    is_jsonl = path.lower().endswith((".jsonl", ".json"))
+    stream = sys.stdin if path == "-" else open(path, "r", newline="", encoding="utf-8")
+    skipped = 0
+    try:
+        for asin in (_iter_jsonl(stream) if is_jsonl else _iter_csv(stream)):
+            if asin is None:
+                skipped += 1
+                continue
+            yield asin
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if skipped:
+            logging.warning("⚠️ %s 中有 %d 行无法识别为 ASIN，已跳过", path, skipped)
+
+def input_name(path):
+    """输入对应的输出文件名前缀：文件名（不含扩展名），标准输入为 stdin"""
+    if path == "-":
+        return "stdin"
+    return os.path.splitext(os.path.basename(path))[0] or "input"
@@ -0,0 +1,239 @@
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from bench_server import StandInServer  # 本地 Amazon 替身服务器
+from browser_pool import BrowserPool
+from metrics import METRICS
+from pipeline import BLOCKED_RESOURCES, CrawlPipeline
+from rate_controller import RateController
+from search import SEARCH_MODES, set_page_pause
+from urls import set_base_url
+from lazy import PLAYWRIGHT_HINT, require  # playwright 在运行场景时才加载
+from log_setup import setup_logging
+
+try:
+    import psutil  # 可选依赖：统计本进程和浏览器进程内存；未安装时在 Linux 上读取 /proc
+except ImportError:  # pragma: no cover - 未安装 psutil 时使用 /proc
+    psutil = None
+
+RESULTS_FILE = "bench_results.jsonl"  # --record 时追加写入的结果，用于跟踪吞吐量回归
+
+def _proc_children(pid):
+    """通过 /proc 查找 pid 的所有后代进程（Linux）"""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # 第 4 个字段为 ppid；进程名中可能含空格，从最后一个 ')' 之后开始解析
+                parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+    found, frontier = [], [pid]
+    while frontier:
+        current = frontier.pop()
+        children = [child for child, parent in parents.items() if parent == current]
+        found.extend(children)
+        frontier.extend(children)
+    return found
+
+def _proc_rss(pid):
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+def own_rss():
+    """
+    :return: int | None，本进程当前的常驻内存（字节），无法统计时返回 None
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    if os.path.isdir("/proc"):
+        return _proc_rss(os.getpid())
+    return None
+
+def browser_rss():
+    """
+    :return: int | None，本进程所有子进程（Chromium）的常驻内存之和（字节），无法统计时返回 None
+    """
+    if psutil is not None:
+        return sum(child.memory_info().rss for child in psutil.Process().children(recursive=True))
+    if os.path.isdir("/proc"):
+        return sum(_proc_rss(pid) for pid in _proc_children(os.getpid()))
+    return None
+
+async def _sample_memory(peak, interval=0.5):
+    """定期采样本进程和浏览器的内存，记录本场景内的峰值（ru_maxrss 是整个进程生命周期的峰值，无法区分场景）"""
+    while True:
+        for key, rss in (("self", own_rss()), ("browser", browser_rss())):
+            if rss is not None:
+                peak[key] = max(peak.get(key) or 0, rss)
+        await asyncio.sleep(interval)
+
+def _phase_seconds(name):
+    histogram = METRICS.histograms.get(name)
+    return histogram.sum if histogram is not None else 0.0
+
+def _percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+async def run_scenario(workers, queries, max_pages, server_options, use_rate_controller=False, search_mode="asins",
+                       fields=None, search_pause=(0, 0)):
+    """
+    启动替身服务器和浏览器，用完整的流水线（搜索 + 详情页）跑一轮，统计吞吐量、延迟和内存。
+
+    :param workers: int，详情页工作协程数（即 max_processes）
+    :param queries: list，搜索词
+    :param max_pages: int，每个搜索词的翻页数
+    :param server_options: dict，StandInServer 的参数
+    :param use_rate_controller: bool，是否启用速率控制器（默认关闭，测量原始吞吐量）
+    :param search_mode: str，search.SEARCH_MODES 之一
+    :param fields: list，可选；启用的字段，None 表示全部字段
+    :param search_pause: tuple，没有速率控制器时搜索翻页的随机等待范围（秒），默认不等待，
+                         避免固定的翻页等待掩盖抓取吞吐量；累计等待时间单独报告
+    :return: dict，场景结果
+    """
+    set_page_pause(*search_pause)
+    server = StandInServer(**server_options)
+    set_base_url(await server.start())
+    workdir = tempfile.mkdtemp(prefix="amz_bench_")
+    cookies_file = os.path.join(workdir, "cookies.json")
+    with open(cookies_file, "w") as f:
+        json.dump([], f)
+    trace_file = os.path.join(workdir, "trace.jsonl")
+    METRICS.configure(True, trace_file)
+    peak = {}
+    pause_before = _phase_seconds("search_pause")  # METRICS 跨场景累计，取本场景的增量
+    sampler = asyncio.create_task(_sample_memory(peak))
+    try:
+        async_playwright = require("playwright.async_api", PLAYWRIGHT_HINT).async_playwright
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True, args=["--disable-gpu", "--disable-dev-shm-usage", "--no-sandbox"])
+            pool = BrowserPool(browser, cookies_file, len(queries), workers, block_pattern=BLOCKED_RESOURCES,
+                               report_interval=0)
+            await pool.start()
+            controller = RateController(max_window=workers, max_rate=100.0) if use_rate_controller else None
+            pipeline = CrawlPipeline(pool, workers, max_pages, workdir, "asins.csv", "output.csv",
+                                     search_concurrency=len(queries), controller=controller, fields=fields,
+                                     search_mode=search_mode)
+            start = time.perf_counter()
+            await pipeline.run(queries)
+            elapsed = time.perf_counter() - start
+            await pool.close()
+            await browser.close()
+    finally:
+        sampler.cancel()
+        await asyncio.gather(sampler, return_exceptions=True)
+        METRICS.close()
+        await server.close()
+
+    latencies, outcomes = [], {}
+    with open(trace_file, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            outcomes[record["outcome"]] = outcomes.get(record["outcome"], 0) + 1
+            if record["outcome"] == "success":
+                latencies.append(record["total"])
+    succeeded = pipeline.done.succeeded
+    return {
+        "ts": time.time(),
+        "workers": workers,
+        "queries": len(queries),
+        "max_pages": max_pages,
+        "latency_range": list(server_options.get("latency", ())),
+        "captcha_rate": server_options.get("captcha_rate", 0.0),
+        "error_rate": server_options.get("error_rate", 0.0),
+        "search_mode": search_mode,
+        "fields": list(fields or []),
+        "search_pause": list(search_pause),
+        "asins": len(pipeline.done),
+        "succeeded": succeeded,
+        "seconds": round(elapsed, 3),
+        "asins_per_sec": round(succeeded / elapsed, 3) if elapsed else None,
+        "p50_latency": _percentile(latencies, 0.5),
+        "p95_latency": _percentile(latencies, 0.95),
+        "search_pause_seconds": round(_phase_seconds("search_pause") - pause_before, 3),  # 各搜索词翻页等待之和
+        "outcomes": outcomes,
+        "requests": dict(server.requests),
+        "peak_rss_mb": round(peak["self"] / 2 ** 20, 1) if peak.get("self") else None,
+        "peak_browser_mb": round(peak["browser"] / 2 ** 20, 1) if peak.get("browser") else None,
+    }
+
+def _scenario_key(result):
+    return (result["workers"], result["queries"], result["max_pages"], tuple(result["latency_range"]),
+            result["captcha_rate"], result["error_rate"], result.get("search_mode", "asins"),
+            tuple(result.get("fields", ())), tuple(result.get("search_pause", (3, 5))))  # 旧记录均按 3-5 秒翻页等待
+
+def report(result, results_file=None):
+    """输出场景结果；提供结果文件时与上一次相同场景的结果对比吞吐量"""
+    print(
+        f"workers={result['workers']:>3}  ASIN {result['succeeded']}/{result['asins']}  "
+        f"{result['asins_per_sec']} ASIN/s  p50 {result['p50_latency']}s  p95 {result['p95_latency']}s  "
+        f"峰值 RSS {result['peak_rss_mb']} MB  浏览器 {result['peak_browser_mb']} MB  "
+        f"翻页等待 {result['search_pause_seconds']}s  结果 {result['outcomes']}"
+    )
+    if not results_file or not os.path.exists(results_file):
+        return
+    previous = None
+    with open(results_file, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if _scenario_key(record) == _scenario_key(result):
+                previous = record
+    if previous and previous.get("asins_per_sec"):
+        change = (result["asins_per_sec"] - previous["asins_per_sec"]) / previous["asins_per_sec"]
+        marker = "⚠️ 吞吐量下降" if change < -0.1 else "吞吐量变化"
+        print(f"    {marker} {change:+.0%}（上次 {previous['asins_per_sec']} ASIN/s）")
+
+async def main(args):
+    server_options = {
+        "fixtures_dir": args.fixtures,
+        "latency": tuple(args.latency),
+        "captcha_rate": args.captcha_rate,
+        "error_rate": args.error_rate,
+        "results_per_page": args.per_page,
+        "pages": args.pages,
+        "seed": args.seed,
+    }
+    queries = [f"bench query {i}" for i in range(args.queries)]
+    for workers in args.workers:
+        result = await run_scenario(workers, queries, args.pages, server_options, args.rate_controller,
+                                    args.search_mode, args.fields, tuple(args.search_pause))
+        report(result, args.results if args.record else None)
+        if args.record:
+            with open(args.results, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+if __name__ == "__main__":
+    setup_logging("WARNING", log_file=None)
+    parser = argparse.ArgumentParser(description="离线抓取基准：本地替身服务器 + 完整流水线")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 10], help="依次测试的工作协程数")
+    parser.add_argument("--queries", type=int, default=1, help="搜索词数量")
+    parser.add_argument("--pages", type=int, default=2, help="每个搜索词的结果页数")
+    parser.add_argument("--per-page", type=int, default=24, help="每页 ASIN 数")
+    parser.add_argument("--latency", type=float, nargs=2, default=(0.05, 0.2), metavar=("MIN", "MAX"),
+                        help="替身服务器的响应延迟范围（秒）")
+    parser.add_argument("--captcha-rate", type=float, default=0.0, help="返回验证码页的概率")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 503 的概率")
+    parser.add_argument("--fixtures", help="录制页面目录（search.html、<ASIN>.html）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--rate-controller", action="store_true", help="启用速率控制器")
+    parser.add_argument("--search-mode", choices=SEARCH_MODES, default="asins", help="搜索模式")
+    parser.add_argument("--fields", nargs="+", help="只启用这些字段（如 price rating review_count）")
+    parser.add_argument("--search-pause", type=float, nargs=2, default=(0, 0), metavar=("MIN", "MAX"),
+                        help="未启用速率控制器时搜索翻页的随机等待（秒），默认不等待；3 5 与线上一致")
+    parser.add_argument("--record", action="store_true", help="把结果追加到结果文件并与上次对比")
+    parser.add_argument("--results", default=RESULTS_FILE, help="结果文件路径")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,172 @@
+import argparse
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import statistics
+import time
+from scraper import EXTRACT_SCRIPT, EXTRACT_MODES, extract_raw_dom, build_product_record
+from urls import product_url
+from lazy import PLAYWRIGHT_HINT, require  # playwright 在运行基准时才加载
+from log_setup import setup_logging
+
+COOKIES_FILE = "amazon_cookies.json"  # 在线模式下使用的 Cookies 文件
+
+class RoundtripCounter:
+    """
+    Playwright 对象的计数代理：每次 await 一个异步方法记为一次 CDP 往返，
+    返回的 ElementHandle / JSHandle 也会被包装，从而统计到元素级别的调用。
+    """
+
+    def __init__(self, target, counter=None):
+        self._target = target
+        self._counter = counter if counter is not None else {"roundtrips": 0}
+
+    @property
+    def roundtrips(self):
+        return self._counter["roundtrips"]
+
+    def reset(self):
+        self._counter["roundtrips"] = 0
+
+    def _wrap(self, value):
+        # Playwright 的公开对象都带有 _impl_obj，据此判断是否需要继续包装
+        if hasattr(value, "_impl_obj"):
+            return RoundtripCounter(value, self._counter)
+        if isinstance(value, list):
+            return [self._wrap(item) for item in value]
+        return value
+
+    def __bool__(self):
+        return bool(self._target)
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def counted(*args, **kwargs):
+            self._counter["roundtrips"] += 1
+            return self._wrap(await attr(*args, **kwargs))
+        return counted
+
+async def extract_once(page, asin, url, mode):
+    """
+    在已加载的页面上执行一次完整的抽取阶段（与 get_product_details 导航之后的步骤一致）。
+
+    :return: dict，清洗后的商品详情；非详情页返回 None
+    """
+    if mode == "evaluate":
+        raw = await page.evaluate(EXTRACT_SCRIPT)
+        if not raw["has_title"] and not raw["has_price"]:
+            return None
+        return build_product_record(asin, url, raw)
+
+    title_element = await page.query_selector("#productTitle")
+    price_element = await page.query_selector("span.a-price") or await page.query_selector("span.a-offscreen")
+    if not title_element and not price_element:
+        return None
+    await page.query_selector("input#captchacharacters")
+    await page.wait_for_selector("#productTitle", timeout=5000)
+    raw = await extract_raw_dom(page, title_element, price_element)
+    return build_product_record(asin, url, raw)
+
+async def _fulfill(html, route):
+    """离线模式：用保存的 HTML 响应详情页请求，使离线和在线一样经过完整的 goto"""
+    await route.fulfill(status=200, content_type="text/html; charset=utf-8", body=html)
+
+async def run_benchmark(targets, repeat, live):
+    """
+    对每个目标页面分别运行两种抽取模式，统计往返次数、抽取耗时和“导航 + 抽取”的单 ASIN 总耗时。
+
+    :param targets: list[(asin, source)]，source 为本地 HTML 文件路径（离线）或 None（在线）
+    :param repeat: int，每种模式重复次数
+    :param live: bool，是否访问线上详情页
+    :return: dict，各模式的统计结果
+    """
+    stats = {mode: {"roundtrips": [], "seconds": [], "total_seconds": []} for mode in EXTRACT_MODES}
+    mismatches = []
+    async_playwright = require("playwright.async_api", PLAYWRIGHT_HINT).async_playwright
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        context = await browser.new_context()
+        if live:
+            try:
+                with open(COOKIES_FILE, "r") as f:
+                    await context.add_cookies(json.load(f))
+            except FileNotFoundError:
+                logging.warning("⚠️ 没有找到 Cookies，可能需要先运行 `login.py` 手动登录")
+        raw_page = await context.new_page()
+        page = RoundtripCounter(raw_page)
+
+        for asin, source in targets:
+            url = product_url(asin)
+            if not live:
+                with open(source, "r", encoding="utf-8") as f:
+                    html = f.read()
+                await raw_page.route(url, functools.partial(_fulfill, html))
+
+            records = {}
+            for mode in EXTRACT_MODES:
+                for _ in range(repeat):
+                    # 每次重新导航，计时覆盖单个 ASIN 的完整成本（导航 + 抽取）；往返次数只统计抽取阶段
+                    start = time.perf_counter()
+                    await raw_page.goto(url, timeout=60000, wait_until="domcontentloaded")
+                    page.reset()
+                    extract_start = time.perf_counter()
+                    records[mode] = await extract_once(page, asin, url, mode)
+                    end = time.perf_counter()
+                    stats[mode]["seconds"].append(end - extract_start)
+                    stats[mode]["total_seconds"].append(end - start)
+                    stats[mode]["roundtrips"].append(page.roundtrips)
+            if records["evaluate"] != records["dom"]:
+                mismatches.append(asin)
+                logging.warning("⚠️ ASIN %s 两种模式抽取结果不一致", asin)
+            if not live:
+                await raw_page.unroute(url)
+
+        await browser.close()
+    return stats, mismatches
+
+def report(stats, mismatches):
+    """输出每个 ASIN 的平均往返次数和抽取耗时"""
+    logging.info("=" * 50)
+    for mode, data in stats.items():
+        if not data["seconds"]:
+            continue
+        logging.info(
+            "%8s: 往返 %.1f 次/ASIN，抽取耗时 %.1f ms/ASIN（p50 %.1f ms），导航 + 抽取 %.1f ms/ASIN（p50 %.1f ms）",
+            mode, statistics.mean(data["roundtrips"]), statistics.mean(data["seconds"]) * 1000,
+            statistics.median(data["seconds"]) * 1000, statistics.mean(data["total_seconds"]) * 1000,
+            statistics.median(data["total_seconds"]) * 1000
+        )
+    if stats["dom"]["seconds"] and stats["evaluate"]["seconds"]:
+        speedup = statistics.mean(stats["dom"]["seconds"]) / max(statistics.mean(stats["evaluate"]["seconds"]), 1e-9)
+        total_speedup = (statistics.mean(stats["dom"]["total_seconds"])
+                         / max(statistics.mean(stats["evaluate"]["total_seconds"]), 1e-9))
+        logging.info("🚀 evaluate 模式相对 dom 模式：抽取提速 %.1f 倍，单 ASIN 总耗时提速 %.1f 倍", speedup, total_speedup)
+    if mismatches:
+        logging.warning("⚠️ 结果不一致的 ASIN: %s", mismatches)
+    logging.info("=" * 50)
+
+if __name__ == "__main__":
+    setup_logging()
+    parser = argparse.ArgumentParser(description="对比 evaluate 与 dom 两种抽取模式的往返次数和耗时")
+    parser.add_argument("--html", nargs="*", default=[], help="离线 HTML 文件，文件名（不含扩展名）作为 ASIN")
+    parser.add_argument("--asin", nargs="*", default=[], help="在线抓取的 ASIN（会访问 amazon.com）")
+    parser.add_argument("--repeat", type=int, default=3, help="每种模式重复次数")
+    args = parser.parse_args()
+
+    if args.html and args.asin:
+        parser.error("--html 与 --asin 不能同时使用")
+    if args.html:
+        targets = [(path.rsplit("/", 1)[-1].rsplit(".", 1)[0], path) for path in args.html]
+    else:
+        targets = [(asin, None) for asin in args.asin]
+    if not targets:
+        parser.error("请通过 --html 或 --asin 指定至少一个页面")
+
+    stats, mismatches = asyncio.run(run_benchmark(targets, args.repeat, live=bool(args.asin)))
+    report(stats, mismatches)
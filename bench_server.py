@@ -0,0 +1,196 @@
+import argparse
+import asyncio
+import glob
+import hashlib
+import html
+import logging
+import os
+import random
+from urllib.parse import parse_qs, urlsplit
+from log_setup import setup_logging
+
+# 合成详情页：结构与 fields.RAW_SPECS 中的选择器一致
+DETAIL_TEMPLATE = """<html><head><title>{title}</title></head><body>
+<span id="productTitle">  {title}  </span>
+<a id="bylineInfo" href="/stores/{brand}">Visit the {brand} Store</a>
+<span class="a-price aok-align-center"><span class="a-offscreen">${whole}.{fraction}</span><span aria-hidden="true"><span class="a-price-whole">{whole}.</span><span class="a-price-fraction">{fraction}</span></span></span>
+<div id="social-proofing-faceout-title-tk_bought"><span class="a-text-bold">{bought}+ bought</span></div>
+<div id="productFactsDesktopExpander"><div class="row"><div><span class="a-color-base">Fabric type</span></div></div><div><span class="a-color-base">Leather</span></div></div>
+<ul>{variants}</ul>
+<div id="averageCustomerReviews"><span class="a-icon-alt">{rating} out of 5 stars</span></div>
+<span id="acrCustomerReviewText">{reviews} ratings</span>
+<div id="cr-product-insights-cards"><div id="product-summary"><p><span>Customers like the quality.</span></p></div><a data-csa-c-item-id="x_NEGATIVE">Zipper</a></div>
+</body></html>"""
+
+# 合成搜索结果页：search._iter_search_pages 依赖 div.s-main-slot、div[data-asin] 和 a.s-pagination-next
+SEARCH_TEMPLATE = """<html><head><title>{query}</title></head><body>
+<div class="s-main-slot">{cards}</div>
+<a class="s-pagination-next{disabled}" href="{next_href}">Next</a>
+</body></html>"""
+
+# 合成搜索卡片：与详情页取值一致，字段位置对应 fields.CARD_SPECS（search_mode 为 cards 时读取）
+CARD_TEMPLATE = """<div data-asin="{asin}"><h2><a href="/dp/{asin}"><span>{title}</span></a></h2>
+<span class="a-price"><span class="a-offscreen">${whole}.{fraction}</span></span>
+<i class="a-icon-star-small"><span class="a-icon-alt">{rating} out of 5 stars</span></i>
+<a href="/dp/{asin}#customerReviews"><span class="a-size-base s-underline-text">{reviews}</span></a>
+<span class="a-size-base a-color-secondary">{bought}+ bought in past month</span></div>"""
+
+CAPTCHA_PAGE = """<html><body><form action="/errors/validateCaptcha">
+<input id="captchacharacters" name="field-keywords" type="text"></form></body></html>"""
+
+class StandInServer:
+    """
+    本地 Amazon 替身服务器：提供 /s 搜索结果页和 /dp/<ASIN> 详情页，可配置延迟、验证码和错误率。
+    有录制的页面（fixtures 目录）时优先使用，否则按 ASIN 生成确定性的合成页面。
+    """
+
+    def __init__(self, fixtures_dir=None, latency=(0.05, 0.2), captcha_rate=0.0, error_rate=0.0,
+                 results_per_page=48, pages=4, variants=0, seed=None):
+        """
+        :param fixtures_dir: str，可选；录制页面目录：search.html 为搜索结果页，<ASIN>.html 为详情页
+        :param latency: (float, float)，每个请求的随机延迟范围（秒）
+        :param captcha_rate: float，返回验证码页的概率
+        :param error_rate: float，返回 503 的概率
+        :param results_per_page: int，合成搜索页每页的 ASIN 数
+        :param pages: int，合成搜索结果的总页数
+        :param variants: int，合成详情页的变体数量
+        :param seed: int，可选；随机种子，便于复现
+        """
+        self.latency = latency
+        self.captcha_rate = captcha_rate
+        self.error_rate = error_rate
+        self.results_per_page = results_per_page
+        self.pages = pages
+        self.variants = variants
+        self.random = random.Random(seed)
+        self.search_fixture = None
+        self.detail_fixtures = {}
+        if fixtures_dir:
+            search_path = os.path.join(fixtures_dir, "search.html")
+            if os.path.exists(search_path):
+                with open(search_path, "r", encoding="utf-8") as f:
+                    self.search_fixture = f.read()
+            for path in glob.glob(os.path.join(fixtures_dir, "*.html")):
+                name = os.path.splitext(os.path.basename(path))[0]
+                if name != "search":
+                    with open(path, "r", encoding="utf-8") as f:
+                        self.detail_fixtures[name] = f.read()
+        self.requests = {"search": 0, "detail": 0, "captcha": 0, "error": 0}
+        self.server = None
+
+    @staticmethod
+    def _asin(seed, index):
+        """由搜索词和序号生成稳定的 10 位 ASIN"""
+        return "B" + hashlib.sha1(seed.encode("utf-8")).hexdigest()[:3].upper() + f"{index:06d}"
+
+    @staticmethod
+    def _values(asin):
+        """合成页面的商品取值，由 ASIN 确定，搜索卡片和详情页共用"""
+        digest = int(hashlib.sha1(asin.encode()).hexdigest(), 16)
+        return {
+            "title": f"Stand-in product {asin}", "brand": f"Brand{digest % 50}",
+            "whole": 10 + digest % 90, "fraction": f"{digest % 100:02d}", "bought": (digest % 9 + 1) * 100,
+            "rating": f"{3 + digest % 20 / 10:.1f}", "reviews": f"{digest % 5000:,}",
+        }
+
+    def search_page(self, query, page):
+        if self.search_fixture is not None:
+            return self.search_fixture
+        start = (page - 1) * self.results_per_page
+        asins = [self._asin(query, start + i) for i in range(self.results_per_page)]
+        cards = "".join(CARD_TEMPLATE.format(asin=asin, **self._values(asin)) for asin in asins)
+        last = page >= self.pages
+        return SEARCH_TEMPLATE.format(
+            query=html.escape(query), cards=cards, disabled=" s-pagination-disabled" if last else "",
+            next_href=f"/s?k={query.replace(' ', '+')}&page={page + 1}"
+        )
+
+    def detail_page(self, asin):
+        if asin in self.detail_fixtures:
+            return self.detail_fixtures[asin]
+        if self.detail_fixtures:  # 有录制页面但没有该 ASIN 时，按 ASIN 稳定地挑选一个录制页面
+            names = sorted(self.detail_fixtures)
+            return self.detail_fixtures[names[int(hashlib.sha1(asin.encode()).hexdigest(), 16) % len(names)]]
+        variants = "".join(f'<li data-asin="{asin[:-2]}V{i}"></li>' for i in range(self.variants))
+        return DETAIL_TEMPLATE.format(variants=variants, **self._values(asin))
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()).strip():  # 忽略请求头
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) < 2:
+                return
+            url = urlsplit(parts[1])
+            await asyncio.sleep(self.random.uniform(*self.latency))
+            status, body = 200, None
+            if url.path.startswith("/dp/") or url.path == "/s":
+                if self.random.random() < self.error_rate:
+                    self.requests["error"] += 1
+                    status, body = 503, "<html><body>Service Unavailable</body></html>"
+                elif self.random.random() < self.captcha_rate:
+                    self.requests["captcha"] += 1
+                    body = CAPTCHA_PAGE
+            if body is None:
+                if url.path.startswith("/dp/"):
+                    self.requests["detail"] += 1
+                    body = self.detail_page(url.path[len("/dp/"):].strip("/"))
+                elif url.path == "/s":
+                    self.requests["search"] += 1
+                    params = parse_qs(url.query)
+                    body = self.search_page(params.get("k", [""])[0], int(params.get("page", ["1"])[0]))
+                else:
+                    status, body = 404, "<html><body>Not Found</body></html>"
+            payload = body.encode("utf-8")
+            reason = {200: "OK", 404: "Not Found", 503: "Service Unavailable"}[status]
+            writer.write(
+                f"HTTP/1.1 {status} {reason}\r\nContent-Type: text/html; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode("ascii") + payload
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=0):
+        """
+        开始监听。
+
+        :param port: int，0 表示自动分配
+        :return: str，站点根地址，可传给 urls.set_base_url
+        """
+        self.server = await asyncio.start_server(self._handle, host, port)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+async def _serve_forever(server, host, port):
+    base_url = await server.start(host, port)
+    logging.info("🧪 Amazon 替身服务器已启动: %s（在 config.json 中设置 \"base_url\" 或环境变量 AMZ_BASE_URL）", base_url)
+    await asyncio.Event().wait()
+
+if __name__ == "__main__":
+    setup_logging(log_file=None)
+    parser = argparse.ArgumentParser(description="本地 Amazon 替身服务器，用于离线基准测试")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--fixtures", help="录制页面目录（search.html、<ASIN>.html）")
+    parser.add_argument("--latency", type=float, nargs=2, default=(0.05, 0.2), metavar=("MIN", "MAX"))
+    parser.add_argument("--captcha-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--per-page", type=int, default=48)
+    args = parser.parse_args()
+    stand_in = StandInServer(args.fixtures, tuple(args.latency), args.captcha_rate, args.error_rate,
+                             args.per_page, args.pages)
+    try:
+        asyncio.run(_serve_forever(stand_in, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
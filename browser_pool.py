@@ -0,0 +1,383 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from sessions import SessionPool  # 多会话池：分配、健康度统计、隔离与轮换
+from metrics import METRICS  # 页面租用等待耗时
+from interception import TrafficStats  # 按页面统计放行、缓存和拦截的请求
+
+class PooledPage:
+    """池中的长寿页面，记录导航次数和健康状态"""
+
+    def __init__(self, page):
+        self.page = page
+        self.navigations = 0  # 已执行的租用次数（每次租用视为一次导航任务）
+        self.crashed = False
+        self.traffic = TrafficStats()  # 本次租用期间的请求计数，归还时计入页面池
+        page.on("crash", self._on_crash)
+
+    def _on_crash(self, *_):
+        self.crashed = True
+
+    def is_healthy(self):
+        return not self.crashed and not self.page.is_closed()
+
+class ContextPool:
+    """
+    单个浏览上下文及其固定数量的长寿页面。
+    资源拦截规则在上下文级别只安装一次，页面达到 max_navigations 或不健康时关闭并重建。
+    提供拦截策略时按策略放行或拦截请求，并统计每次租用的请求数和传输字节数。
+    提供会话池时，上下文使用分配到的会话 Cookies，每次租用的结果计入该会话，
+    会话被隔离或用完请求预算后就地换成另一个会话的 Cookies。
+    """
+
+    def __init__(self, browser, name, size, cookies=None, block_pattern=None, max_navigations=50,
+                 extra_headers=None, sessions=None, intercept=None):
+        """
+        :param browser: Playwright 浏览器对象（共享）
+        :param name: str，池名称（search / detail），用于日志和指标
+        :param size: int，页面数量
+        :param cookies: list，加载到上下文的 Cookies
+        :param block_pattern: str，需要拦截的资源 glob，None 表示不拦截
+        :param max_navigations: int，页面被租用多少次后回收，限制内存增长
+        :param extra_headers: dict，上下文级别的额外请求头
+        :param sessions: SessionPool，可选；提供时忽略 cookies，从会话池分配并轮换会话
+        :param intercept: InterceptPolicy，可选；提供时取代 block_pattern
+        """
+        self.browser = browser
+        self.name = name
+        self.size = size
+        self.cookies = cookies
+        self.block_pattern = block_pattern
+        self.max_navigations = max_navigations
+        self.extra_headers = extra_headers
+        self.sessions = sessions
+        self.intercept = intercept
+        self.traffic = TrafficStats()  # 已归还页面的累计请求计数
+        self._pooled = {}  # Playwright 页面 -> PooledPage，用于把请求归到所属页面
+        self.session = None
+        self._rotate_lock = asyncio.Lock()
+        self.context = None
+        self.idle = asyncio.Queue()
+        self.in_use = 0
+        self.leases = 0
+        self.recycled = 0
+        self.wait_seconds = 0.0
+
+    async def start(self):
+        """创建上下文、安装拦截规则并预热所有页面"""
+        self.context = await self.browser.new_context()
+        if self.sessions is not None:
+            self.session = self.sessions.acquire()
+            self.cookies = self.session.cookies
+        if self.cookies:
+            await self.context.add_cookies(self.cookies)
+        if self.extra_headers:
+            await self.context.set_extra_http_headers(self.extra_headers)
+        if self.intercept is not None:
+            await self.intercept.install(self.context, self._traffic_for)
+        elif self.block_pattern:
+            # 上下文级别安装一次，对池内所有页面（包括回收重建的页面）生效
+            await self.context.route(self.block_pattern, lambda route: route.abort())
+        for _ in range(self.size):
+            self.idle.put_nowait(await self._new_page())
+        session_note = f"，会话 {self.session.name}" if self.session is not None else ""
+        logging.info("🏊 页面池 '%s' 已就绪，共 %d 个页面%s", self.name, self.size, session_note)
+
+    async def _new_page(self):
+        pooled = PooledPage(await self.context.new_page())
+        self._pooled[pooled.page] = pooled
+        return pooled
+
+    def _traffic_for(self, request):
+        """请求所属页面本次租用的计数；取不到页面（如 Service Worker 的请求）时直接计入页面池"""
+        try:
+            pooled = self._pooled.get(request.frame.page)
+        except Exception:
+            pooled = None
+        return pooled.traffic if pooled is not None else self.traffic
+
+    async def _recycle(self, pooled):
+        """关闭旧页面并创建新页面替代"""
+        self._pooled.pop(pooled.page, None)
+        try:
+            await pooled.page.close()
+        except Exception as e:
+            logging.debug("关闭页面池 '%s' 页面时出错: %s", self.name, e)
+        self.recycled += 1
+        return await self._new_page()
+
+    async def acquire(self):
+        """租用一个健康的页面，池空时等待"""
+        start = time.perf_counter()
+        pooled = await self.idle.get()
+        waited = time.perf_counter() - start
+        self.wait_seconds += waited
+        METRICS.observe("page_wait", waited)
+        if not pooled.is_healthy():  # 健康检查：崩溃或已关闭的页面直接重建
+            pooled = await self._recycle(pooled)
+        self.in_use += 1
+        self.leases += 1
+        return pooled
+
+    async def release(self, pooled, healthy=True):
+        """
+        归还页面。
+
+        :param pooled: PooledPage，租用的页面
+        :param healthy: bool，本次使用是否正常结束；异常结束的页面直接回收，避免复用被污染的页面
+        """
+        self.in_use -= 1
+        pooled.navigations += 1
+        self._record_traffic(pooled)
+        try:
+            if not healthy or not pooled.is_healthy() or pooled.navigations >= self.max_navigations:
+                pooled = await self._recycle(pooled)
+        finally:
+            self.idle.put_nowait(pooled)
+
+    def _record_traffic(self, pooled):
+        """本次租用的请求计数计入页面池和抓取指标，页面计数清零"""
+        traffic = pooled.traffic
+        if self.intercept is None or not (traffic.requests or traffic.cached or traffic.blocked):
+            return
+        self.traffic.add(traffic)
+        METRICS.inc("requests_total", traffic.requests, pool=self.name, outcome="allowed")
+        METRICS.inc("requests_total", traffic.cached, pool=self.name, outcome="cached")
+        for reason, count in traffic.blocked.items():
+            METRICS.inc("requests_total", count, pool=self.name, outcome="blocked", reason=reason)
+        METRICS.inc("transfer_bytes_total", traffic.bytes, pool=self.name)
+        pooled.traffic = TrafficStats()
+
+    @asynccontextmanager
+    async def lease(self):
+        """以上下文管理器形式租用页面：async with pool.lease() as page"""
+        pooled = await self.acquire()
+        session = self.session
+        healthy = True
+        try:
+            yield pooled.page
+        except asyncio.CancelledError:
+            healthy = False
+            raise
+        except BaseException as e:
+            healthy = False
+            if session is not None:  # ScrapeError 带有失败类型（captcha / blocked / timeout ...）
+                self.sessions.record(session, getattr(e, "kind", "error"))
+            raise
+        else:
+            if session is not None:
+                self.sessions.record(session, "success")
+        finally:
+            await self.release(pooled, healthy)
+            if session is not None and session is self.session and self.sessions.needs_rotation(session):
+                await self._rotate()
+
+    async def _rotate(self):
+        """换下当前会话：清空上下文 Cookies 并加载新会话的 Cookies"""
+        async with self._rotate_lock:
+            old = self.session
+            if not self.sessions.needs_rotation(old):  # 其他协程已经完成了轮换
+                return
+            self.session = self.sessions.acquire(exclude=old)
+            self.sessions.release(old)
+            self.cookies = self.session.cookies
+            await self.context.clear_cookies()
+            await self.context.add_cookies(self.cookies)
+            logging.info("🔄 页面池 '%s' 会话轮换：%s -> %s", self.name, old.name, self.session.name)
+
+    def metrics(self):
+        """返回页面池的占用情况"""
+        return {
+            "size": self.size,
+            "in_use": self.in_use,
+            "idle": self.idle.qsize(),
+            "occupancy": self.in_use / self.size if self.size else 0.0,
+            "leases": self.leases,
+            "recycled": self.recycled,
+            "avg_wait_ms": self.wait_seconds / self.leases * 1000 if self.leases else 0.0,
+            "requests": self.traffic.requests,
+            "cached": self.traffic.cached,
+            "blocked": self.traffic.blocked_total(),
+            "transfer_bytes": self.traffic.bytes,
+        }
+
+    async def close(self):
+        if self.session is not None:
+            self.sessions.release(self.session)
+            self.session = None
+        if self.context is None:
+            return
+        try:
+            await self.context.close()
+        except Exception as e:
+            logging.debug("关闭页面池 '%s' 上下文时出错: %s", self.name, e)
+        self.context = None
+
+class ContextGroup:
+    """
+    多个上下文组成的页面池，每个上下文使用不同的会话，对外接口与 ContextPool 一致。
+    free 队列中每个元素代表某个上下文的一个空闲页面（初始时交错排列），
+    租用时取到哪个上下文就用哪个，请求因此均匀分散到各个会话，且不会在某个上下文上排队。
+    """
+
+    def __init__(self, name, pools):
+        """
+        :param name: str，池名称
+        :param pools: list，ContextPool 列表
+        """
+        self.name = name
+        self.pools = pools
+        self.size = sum(pool.size for pool in pools)
+        self.free = asyncio.Queue()
+
+    async def start(self):
+        for pool in self.pools:
+            await pool.start()
+        for i in range(max(pool.size for pool in self.pools)):
+            for pool in self.pools:
+                if i < pool.size:
+                    self.free.put_nowait(pool)
+
+    @asynccontextmanager
+    async def lease(self):
+        """以上下文管理器形式租用页面：async with pool.lease() as page"""
+        pool = await self.free.get()
+        try:
+            async with pool.lease() as page:
+                yield page
+        finally:
+            self.free.put_nowait(pool)
+
+    def metrics(self):
+        merged = [pool.metrics() for pool in self.pools]
+        leases = sum(m["leases"] for m in merged)
+        in_use = sum(m["in_use"] for m in merged)
+        return {
+            "size": self.size,
+            "in_use": in_use,
+            "idle": sum(m["idle"] for m in merged),
+            "occupancy": in_use / self.size if self.size else 0.0,
+            "leases": leases,
+            "recycled": sum(m["recycled"] for m in merged),
+            "avg_wait_ms": sum(m["avg_wait_ms"] * m["leases"] for m in merged) / leases if leases else 0.0,
+            "requests": sum(m["requests"] for m in merged),
+            "cached": sum(m["cached"] for m in merged),
+            "blocked": sum(m["blocked"] for m in merged),
+            "transfer_bytes": sum(m["transfer_bytes"] for m in merged),
+        }
+
+    async def close(self):
+        for pool in self.pools:
+            await pool.close()
+
+class BrowserPool:
+    """
+    共享浏览器的页面池集合：搜索和详情抓取各用一个上下文，共用同一个已启动的 Chromium。
+    有多个会话时，详情页面分布在多个上下文中，每个上下文使用不同的会话。
+    """
+
+    def __init__(self, browser, cookies_file, search_pages, detail_pages, block_pattern=None,
+                 max_navigations=50, report_interval=60, search_headers=None, sessions=None, detail_contexts=0,
+                 intercept=None):
+        """
+        :param browser: 已启动的 Playwright 浏览器
+        :param cookies_file: str，Cookies 文件路径
+        :param search_pages: int，搜索页面数量（同时搜索的搜索词数），0 表示不创建搜索页面池
+        :param detail_pages: int，详情页面数量（工作池大小）
+        :param block_pattern: str，详情页拦截的资源 glob
+        :param max_navigations: int，页面租用多少次后回收
+        :param report_interval: int，定期输出池指标的间隔秒数，0 表示不输出
+        :param search_headers: dict，搜索上下文的额外请求头
+        :param sessions: SessionPool，可选；默认只使用 cookies_file 一个会话
+        :param detail_contexts: int，详情页面分布的上下文数量，0 表示每个会话一个（不超过详情页面数）
+        :param intercept: dict，可选；阶段名（search / detail）-> InterceptPolicy，提供时取代 block_pattern
+        """
+        self.browser = browser
+        self.cookies_file = cookies_file
+        self.search_pages = search_pages
+        self.detail_pages = detail_pages
+        self.block_pattern = block_pattern
+        self.max_navigations = max_navigations
+        self.report_interval = report_interval
+        self.search_headers = search_headers
+        self.sessions = sessions
+        self.detail_contexts = detail_contexts
+        self.intercept = intercept or {}
+        self.search = None
+        self.detail = None
+        self._reporter = None
+
+    async def start(self):
+        """
+        加载会话 Cookies 并创建搜索和详情两个页面池。
+
+        :return: bool，Cookies 不存在时返回 False（不创建页面池）
+        """
+        if self.sessions is None:
+            self.sessions = SessionPool(SessionPool.load_sessions([self.cookies_file]))
+        if not self.sessions.sessions:
+            logging.warning("⚠️ 没有找到 Cookies，可能需要先运行 `login.py` 手动登录")
+            return False
+        logging.info("✅ 已加载 Amazon 登录 Cookies（%d 个会话）", len(self.sessions.sessions))
+        if self.search_pages:  # 直接输入 ASIN 时不需要搜索页面
+            self.search = ContextPool(
+                self.browser, "search", self.search_pages, sessions=self.sessions,
+                max_navigations=self.max_navigations, extra_headers=self.search_headers,
+                intercept=self.intercept.get("search")
+            )
+        contexts = self.detail_contexts or len(self.sessions.sessions)
+        contexts = max(1, min(contexts, self.detail_pages))
+        detail_pools = [
+            ContextPool(
+                self.browser, f"detail-{i}" if contexts > 1 else "detail",
+                self.detail_pages // contexts + (1 if i < self.detail_pages % contexts else 0),
+                sessions=self.sessions, block_pattern=self.block_pattern, max_navigations=self.max_navigations,
+                intercept=self.intercept.get("detail")
+            )
+            for i in range(contexts)
+        ]
+        self.detail = detail_pools[0] if contexts == 1 else ContextGroup("detail", detail_pools)
+        if self.search is not None:
+            await self.search.start()
+        await self.detail.start()
+        if self.report_interval:
+            self._reporter = asyncio.create_task(self._report_loop())
+        return True
+
+    def metrics(self):
+        """返回各页面池的指标"""
+        return {pool.name: pool.metrics() for pool in (self.search, self.detail) if pool is not None}
+
+    def log_metrics(self):
+        for name, m in self.metrics().items():
+            logging.info(
+                "🏊 页面池 '%s': 占用 %s/%s（%.0f%%），租用 %s 次，回收 %s 个，平均等待 %.0f ms",
+                name, m["in_use"], m["size"], m["occupancy"] * 100, m["leases"], m["recycled"], m["avg_wait_ms"]
+            )
+            if m["requests"] or m["blocked"]:  # 启用请求拦截时输出每次租用的平均流量
+                leases = max(m["leases"], 1)
+                logging.info(
+                    "🛡️ 页面池 '%s': 每页平均传输 %.0f KB、%.1f 个请求，缓存命中 %.1f 个，拦截 %.1f 个",
+                    name, m["transfer_bytes"] / leases / 1024, m["requests"] / leases, m["cached"] / leases,
+                    m["blocked"] / leases
+                )
+
+    async def _report_loop(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self.log_metrics()
+            self.sessions.log_state()
+
+    async def close(self):
+        """停止指标输出并关闭所有上下文（浏览器由调用方关闭）"""
+        if self._reporter is not None:
+            self._reporter.cancel()
+            await asyncio.gather(self._reporter, return_exceptions=True)
+            self._reporter = None
+        self.log_metrics()
+        if self.sessions is not None and self.sessions.sessions:
+            self.sessions.log_state()
+        for pool in (self.search, self.detail):
+            if pool is not None:
+                await pool.close()
@@ -0,0 +1,161 @@
+import json
+import logging
+import sqlite3
+import time
+
+# 字段分组：不同分组的数据变化频率不同，各自拥有独立的 TTL
+FIELD_GROUPS = {
+    "volatile": ["price", "bought"],  # 价格、销量，变化最快
+    "reviews": ["rating", "review_count", "frequently_returned", "customer_say", "negative_aspects"],  # 评价相关
+    "catalog": ["brand", "brand_link", "title", "fabric_type", "variants", "url"],  # 品牌、面料等，几乎不变
+}
+
+# 默认 TTL（秒），可在 config.json 的 cache.ttl 中覆盖
+DEFAULT_TTL = {
+    "volatile": 6 * 3600,
+    "reviews": 24 * 3600,
+    "catalog": 7 * 24 * 3600,
+}
+
+class AsinCache:
+    """
+    以 ASIN 为键的 SQLite 结果缓存，每个字段分组单独记录抓取时间。
+    lookup 返回缓存记录以及已过期的分组，调用方据此决定是否需要重新抓取。
+    """
+
+    def __init__(self, path, ttl=None, max_entries=None, max_age=None):
+        """
+        :param path: str，SQLite 文件路径
+        :param ttl: dict，分组名 -> TTL 秒数，缺省分组使用 DEFAULT_TTL
+        :param max_entries: int，最多保留的 ASIN 数量，超出时淘汰最久未更新的记录；None 表示不限
+        :param max_age: int，记录最长保留秒数，超过后删除；None 表示不限
+        """
+        self.path = path
+        self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS products (
+                asin TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                group_times TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_products_updated ON products(updated_at)")
+        self.conn.commit()
+        self.evict()
+
+    @classmethod
+    def from_config(cls, cache_config):
+        """
+        根据 config.json 中的 cache 配置创建缓存。
+
+        :param cache_config: dict，cache 配置段
+        :return: AsinCache；未启用时返回 None
+        """
+        if not cache_config or not cache_config.get("enabled", False):
+            return None
+        return cls(
+            cache_config.get("path", "asin_cache.sqlite3"),
+            ttl=cache_config.get("ttl"),
+            max_entries=cache_config.get("max_entries"),
+            max_age=cache_config.get("max_age"),
+        )
+
+    def lookup(self, asin, now=None, groups=None):
+        """
+        查询缓存。
+
+        :param asin: str，商品的 ASIN
+        :param now: float，当前时间戳，默认 time.time()
+        :param groups: iterable，可选；只检查这些分组（如只启用 price 时只关心 volatile），默认全部分组
+        :return: (dict | None, set)，缓存的商品详情和已过期的分组；无缓存时返回 (None, 检查的全部分组)
+        """
+        now = time.time() if now is None else now
+        groups = set(FIELD_GROUPS) if groups is None else set(groups)
+        row = self.conn.execute(
+            "SELECT data, group_times FROM products WHERE asin = ?", (asin,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None, groups
+        data, group_times = json.loads(row[0]), json.loads(row[1])
+        stale = {
+            group for group in groups
+            if now - group_times.get(group, 0) > self.ttl[group]
+        }
+        if stale:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data, stale
+
+    def get_fresh(self, asin):
+        """返回所有分组都未过期的缓存记录，否则返回 None"""
+        data, stale = self.lookup(asin)
+        return data if not stale else None
+
+    def store(self, asin, product, groups=None, now=None):
+        """
+        写入抓取结果，只更新指定分组的字段和时间，其余分组保留旧值。
+
+        :param asin: str，商品的 ASIN
+        :param product: dict，get_product_details 的返回值
+        :param groups: iterable，本次抓取覆盖的分组，默认全部
+        :param now: float，抓取时间戳，默认 time.time()
+        """
+        now = time.time() if now is None else now
+        groups = set(FIELD_GROUPS) if groups is None else set(groups)
+        row = self.conn.execute(
+            "SELECT data, group_times FROM products WHERE asin = ?", (asin,)
+        ).fetchone()
+        data, group_times = (json.loads(row[0]), json.loads(row[1])) if row else ({"asin": asin}, {})
+        for group in groups:
+            for field in FIELD_GROUPS[group]:
+                if field in product:
+                    data[field] = product[field]
+            group_times[group] = now
+        self.conn.execute(
+            "INSERT OR REPLACE INTO products (asin, data, group_times, updated_at) VALUES (?, ?, ?, ?)",
+            (asin, json.dumps(data, ensure_ascii=False), json.dumps(group_times), now)
+        )
+        self.conn.commit()
+
+    def evict(self, now=None):
+        """
+        按 max_age 和 max_entries 淘汰旧记录。
+
+        :return: int，删除的记录数
+        """
+        now = time.time() if now is None else now
+        removed = 0
+        if self.max_age:
+            removed += self.conn.execute(
+                "DELETE FROM products WHERE updated_at < ?", (now - self.max_age,)
+            ).rowcount
+        if self.max_entries:
+            removed += self.conn.execute(
+                """
+                DELETE FROM products WHERE asin IN (
+                    SELECT asin FROM products ORDER BY updated_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            ).rowcount
+        self.conn.commit()
+        if removed:
+            logging.info("🧹 缓存淘汰 %d 条过期记录", removed)
+        return removed
+
+    def close(self):
+        """淘汰旧记录并关闭数据库连接"""
+        self.evict()
+        self.conn.close()
+        logging.info("📊 缓存命中 %d 次，未命中/过期 %d 次", self.hits, self.misses)
@@ -0,0 +1,174 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# 统一命令行入口：python cli.py [--config config.json] <子命令> ...
+# 本文件只导入标准库；各子命令在运行时才导入对应模块，playwright 等重依赖在真正启动浏览器时才加载
+
+# import-time 检查的库模块：导入时不得读取配置、配置日志、创建文件或加载重依赖
+LIBRARY_MODULES = (
+    "main", "pipeline", "scraper", "search", "fetcher", "detail_parser", "fields", "browser_pool", "interception",
+    "sinks", "archive", "cache", "monitor", "scheduler", "shard", "variants", "sessions", "metrics", "settings",
+    "login",
+)
+# 导入库模块时不应被连带加载的重依赖
+HEAVY_MODULES = ("playwright", "pandas", "pyarrow", "aiohttp", "lxml", "zstandard")
+
+# 在独立子进程中导入单个模块，输出耗时和副作用（JSON）
+_PROBE = """
+import json, logging, os, sys, time
+sys.path.insert(0, {root!r})
+before = set(os.listdir("."))
+start = time.perf_counter()
+__import__({module!r})
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{
+    "ms": elapsed,
+    "handlers": len(logging.getLogger().handlers),
+    "files": sorted(set(os.listdir(".")) - before),
+    "heavy": sorted({{name.split(".")[0] for name in sys.modules}} & set({heavy!r})),
+}}))
+"""
+
+def _settings(args):
+    from settings import Settings
+    return Settings.load(args.config)
+
+def _run_timed(coro):
+    start_time = time.perf_counter()
+    try:
+        asyncio.run(coro)
+    except KeyboardInterrupt:
+        logging.warning("用户中断程序，程序已退出")
+    finally:
+        logging.info("总运行时间: %.2f 秒", time.perf_counter() - start_time)
+
+def cmd_search(args, settings):
+    import main
+    _run_timed(main.main(settings, resume=args.resume))
+
+def cmd_scrape(args, settings):
+    import main
+    if args.coordinator:
+        _run_timed(main.coordinate(settings, args.coordinator))
+    else:
+        _run_timed(main.main(settings, resume=args.resume, worker=args.worker, input_path=args.input))
+
+def cmd_monitor(args, settings):
+    import main
+    _run_timed(main.main(settings, daemon=True))
+
+def cmd_login(args, settings):
+    from login import save_amazon_cookies
+    save_amazon_cookies(args.cookies_file or settings.cookies_file)
+
+def cmd_reextract(args, settings):
+    from archive import reextract
+    fields = args.fields or settings.fields
+    succeeded, total = reextract(args.archive or settings.archive.get("path", "page_archive"), args.output,
+                                 args.formats or settings.output_formats, fields, args.workers, args.since)
+    return 0 if succeeded or not total else 1
+
+def probe_import(module, root=None):
+    """
+    在全新的解释器中导入一个模块（工作目录为空的临时目录），测量耗时并检查导入副作用。
+
+    :param module: str，模块名
+    :param root: str，可选；模块所在目录，默认本文件所在目录
+    :return: dict，{"ms": 导入耗时（毫秒）, "handlers": 根日志处理器数, "files": 新建的文件, "heavy": 被加载的重依赖}
+    """
+    root = root or os.path.dirname(os.path.abspath(__file__))
+    code = _PROBE.format(root=root, module=module, heavy=HEAVY_MODULES)
+    with tempfile.TemporaryDirectory() as cwd:
+        result = subprocess.run([sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败: {result.stderr.strip().splitlines()[-1:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def cmd_import_time(args, settings):
+    """逐个测量库模块的导入耗时（取多次测量的中位数）；超出预算或有导入副作用时返回 1，可用于 CI"""
+    failed = 0
+    for module in args.modules or LIBRARY_MODULES:
+        try:
+            results = [probe_import(module) for _ in range(max(args.repeat, 1))]
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            failed += 1
+            continue
+        result = dict(results[0], ms=statistics.median(r["ms"] for r in results))
+        problems = []
+        if result["ms"] > args.budget_ms:
+            problems.append(f"超出预算 {args.budget_ms:.0f} ms")
+        if result["handlers"]:
+            problems.append(f"配置了 {result['handlers']} 个日志处理器")
+        if result["files"]:
+            problems.append(f"创建了文件 {result['files']}")
+        if result["heavy"]:
+            problems.append(f"加载了 {result['heavy']}")
+        failed += bool(problems)
+        print(f"{'❌' if problems else '✅'} {module:<14} {result['ms']:7.1f} ms  {'；'.join(problems)}")
+    return 1 if failed else 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Amazon 搜索词商品抓取")
+    parser.add_argument("--config", default="config.json", help="配置文件路径")
+    parser.add_argument("--log-level", help="日志级别，默认取配置中的 logging.level（INFO）")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("search", help="搜索 config.json 中的搜索词并抓取结果中的商品")
+    command.add_argument("--resume", action="store_true", help="从抓取日志恢复上次中断的运行，只抓取未完成的 ASIN")
+    command.set_defaults(handler=cmd_search)
+
+    command = commands.add_parser("scrape", help="跳过搜索，直接抓取 ASIN 列表，或参与分片抓取")
+    source = command.add_mutually_exclusive_group(required=True)
+    source.add_argument("input", nargs="?", metavar="ASIN_FILE", help="ASIN 列表（CSV / JSONL，- 为标准输入）")
+    source.add_argument("--coordinator", metavar="ASIN_FILE", help="分片协调器：把 ASIN 列表分批分发给工作进程")
+    source.add_argument("--worker", metavar="HOST:PORT", help="分片工作进程：从协调器租用 ASIN 批次抓取")
+    command.add_argument("--resume", action="store_true", help="从抓取日志恢复上次中断的运行")
+    command.set_defaults(handler=cmd_scrape)
+
+    command = commands.add_parser("monitor", help="常驻调度模式：保持浏览器常开，按刷新间隔循环抓取")
+    command.set_defaults(handler=cmd_monitor)
+
+    command = commands.add_parser("login", help="手动登录并保存 Cookies")
+    command.add_argument("cookies_file", nargs="?", help="Cookies 文件路径，默认取配置中的 cookies_file")
+    command.set_defaults(handler=cmd_login)
+
+    command = commands.add_parser("reextract", help="对存档的详情页重新运行抽取，不访问网络")
+    command.add_argument("--archive", help="存档目录，默认取配置中的 archive.path")
+    command.add_argument("--output", default="reextract.csv", help="输出 CSV 路径（parquet 替换扩展名）")
+    command.add_argument("--formats", nargs="+", choices=("csv", "parquet"), help="输出格式，默认取配置")
+    command.add_argument("--fields", nargs="+", help="只抽取这些字段，默认取配置")
+    command.add_argument("--workers", type=int, help="进程数，默认 CPU 核数")
+    command.add_argument("--since", type=float, help="只处理该 Unix 时间戳之后抓取的页面")
+    command.set_defaults(handler=cmd_reextract)
+
+    command = commands.add_parser("import-time", help="测量各库模块的导入耗时并检查导入副作用")
+    command.add_argument("modules", nargs="*", help="要测量的模块，默认全部库模块")
+    command.add_argument("--budget-ms", type=float, default=150, help="单个模块的导入耗时预算（毫秒）")
+    command.add_argument("--repeat", type=int, default=3, help="每个模块测量次数，取中位数，减少机器抖动的影响")
+    command.set_defaults(handler=cmd_import_time, standalone=True)
+    return parser
+
+def run(argv=None):
+    """
+    :param argv: list，可选；命令行参数，默认 sys.argv[1:]
+    :return: int，退出码
+    """
+    args = build_parser().parse_args(argv)
+    if getattr(args, "standalone", False):  # 不读取配置、不配置日志
+        return args.handler(args, None) or 0
+    settings = _settings(args)
+    from log_setup import setup_logging_from_config
+    setup_logging_from_config(settings.logging, args.log_level)
+    return args.handler(args, settings) or 0
+
+if __name__ == "__main__":
+    sys.exit(run())
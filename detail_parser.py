@@ -0,0 +1,96 @@
+import json
+import sys
+from fields import build_product_record, raw_specs, resolve_fields  # 字段注册表：读取规格和清洗
+from urls import product_url
+from lazy import require  # lxml 只在离线解析时加载
+
+def _first(tree, xpath):
+    """依次尝试 XPath，返回文档顺序中第一个匹配元素，等价于 querySelector"""
+    for path in [xpath] if isinstance(xpath, str) else xpath:
+        found = tree.xpath(path)
+        if found:
+            return found[0]
+    return None
+
+def _text(element):
+    """近似 innerText：取全部文本并压缩空白"""
+    if element is None:
+        return None
+    return " ".join(element.text_content().split())
+
+def _labelled(tree, spec):
+    """与 :has-text(label) 后取相邻行值元素的逻辑一致"""
+    scope = _first(tree, spec["xpath"])
+    if scope is None:
+        return None
+    for label in scope.xpath(spec["label_xpath"]):
+        if spec["label"] not in label.text_content().lower():
+            continue
+        row = label.getparent().getparent() if label.getparent() is not None else None
+        sibling = row.getnext() if row is not None else None
+        if sibling is None:
+            return None
+        return _text(_first(sibling, spec["value_xpath"]))
+    return None
+
+def extract_raw_html(tree, fields=None):
+    """
+    按读取规格（fields.RAW_SPECS 的 xpath，避免引入 cssselect 依赖）从 lxml 文档树中读取原始字段，
+    返回值结构与 EXTRACT_SCRIPT 一致。
+
+    :param tree: lxml.html 解析得到的文档树
+    :param fields: tuple，可选；启用的字段，None 表示全部字段
+    :return: dict，未清洗的原始字段
+    """
+    raw = {}
+    for key, spec in raw_specs(fields).items():
+        mode = spec["mode"]
+        if spec.get("fallback_for") and raw.get(spec["fallback_for"]) is not None:
+            raw[key] = None
+        elif mode == "text":
+            raw[key] = _text(_first(tree, spec["xpath"]))
+        elif mode == "attr":
+            element = _first(tree, spec["xpath"])
+            raw[key] = element.get(spec["attr"]) if element is not None else None
+        elif mode == "exists":
+            raw[key] = _first(tree, spec["xpath"]) is not None
+        elif mode == "all_text":
+            raw[key] = [_text(el) for el in tree.xpath(spec["xpath"])]
+        elif mode == "all_attr":
+            values = (next((el.get(name) for name in spec["attrs"] if el.get(name)), None)
+                      for el in tree.xpath(spec["xpath"]))
+            raw[key] = [value for value in values if value]
+        else:  # labelled
+            raw[key] = _labelled(tree, spec)
+    return raw
+
+def parse_product_html(asin, html, fields=None):
+    """
+    离线解析商品详情页 HTML，返回与 get_product_details 相同结构的 dict。
+
+    :param asin: str，商品的 ASIN
+    :param html: str，详情页 HTML 源码
+    :param fields: iterable，可选；启用的字段，None 表示全部字段
+    :return: dict，商品详情；非详情页、验证码页或缺少标题时返回 None（交由 Playwright 兜底）
+    """
+    lxml_html = require("lxml.html", "解析详情页需要 lxml，请先执行 `pip install lxml`")
+    if not html:
+        return None
+    fields = resolve_fields(fields)
+    tree = lxml_html.fromstring(html)
+    raw = extract_raw_html(tree, fields)
+    # 快速路径只处理完整详情页，其余情况一律回退到浏览器
+    if raw["captcha"] or not raw["has_title"]:
+        return None
+    return build_product_record(asin, product_url(asin), raw, fields)
+
+# 程序入口：对保存的 HTML 文件运行解析器，便于离线验证选择器
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("用法: python detail_parser.py <详情页.html> [ASIN]")
+        sys.exit(1)
+    path = sys.argv[1]
+    asin = sys.argv[2] if len(sys.argv) > 2 else path.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+    with open(path, "r", encoding="utf-8") as f:
+        product = parse_product_html(asin, f.read())
+    print(json.dumps(product, ensure_ascii=False, indent=2))
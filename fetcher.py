@@ -0,0 +1,131 @@
+import json
+import logging
+import random
+import time
+from detail_parser import parse_product_html
+from urls import product_url  # 站点根地址可切换到本地替身服务器
+from lazy import require  # aiohttp 导入较慢，只在启用 http 抓取后端时加载
+
+# 可选依赖 aiohttp 未安装时的提示
+AIOHTTP_HINT = "http 抓取后端需要 aiohttp，请先执行 `pip install aiohttp lxml`"
+
+# 支持的抓取后端：playwright 为浏览器渲染，http 为原始 HTTP 请求 + 离线解析（失败时回退浏览器）
+FETCH_BACKENDS = ("playwright", "http")
+
+# 与浏览器保持一致的请求头
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:89.0) Gecko/20100101 Firefox/89.0"
+]
+BASE_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+    "DNT": "1",
+    "Upgrade-Insecure-Requests": "1"
+}
+
+def load_cookie_header(cookies_file):
+    """
+    将 login.py 保存的 Playwright Cookies 转为 Cookie 请求头。
+
+    :param cookies_file: str，Cookies 文件路径
+    :return: str，Cookie 请求头；文件不存在时返回空字符串
+    """
+    try:
+        with open(cookies_file, "r") as f:
+            cookies = json.load(f)
+    except FileNotFoundError:
+        logging.warning("⚠️ 没有找到 Cookies，可能需要先运行 `login.py` 手动登录")
+        return ""
+    return "; ".join(
+        f"{cookie['name']}={cookie['value']}"
+        for cookie in cookies
+        if cookie.get("domain", "").lstrip(".").endswith("amazon.com")
+    )
+
+class HttpFetcher:
+    """
+    基于 aiohttp 连接池的异步页面抓取器，复用 amazon_cookies.json 中的登录状态。
+    使用方式：async with HttpFetcher(cookies_file) as fetcher: html = await fetcher.fetch(url)
+    """
+
+    def __init__(self, cookies_file, pool_size=20, timeout=30):
+        require("aiohttp", AIOHTTP_HINT)
+        self.cookies_file = cookies_file
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        """创建共享的连接池会话"""
+        headers = dict(BASE_HEADERS)
+        cookie_header = load_cookie_header(self.cookies_file)
+        if cookie_header:
+            headers["Cookie"] = cookie_header
+            logging.info("✅ HTTP 抓取器已加载 Amazon 登录 Cookies")
+        aiohttp = require("aiohttp", AIOHTTP_HINT)
+        connector = aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            cookie_jar=aiohttp.DummyCookieJar()  # Cookie 由请求头统一提供
+        )
+
+    async def close(self):
+        """关闭会话并释放连接池"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def fetch(self, url):
+        """
+        获取页面 HTML。
+
+        :param url: str，页面地址
+        :return: (int, str)，HTTP 状态码和页面内容
+        """
+        headers = {"User-Agent": random.choice(USER_AGENTS)}
+        async with self.session.get(url, headers=headers) as response:
+            return response.status, await response.text(errors="replace")
+
+async def fetch_product_details(asin, fetcher, controller=None, fields=None, archive=None):
+    """
+    快速路径：原始 HTTP 请求 + 离线解析商品详情页。
+
+    :param asin: str，商品的 ASIN
+    :param fetcher: HttpFetcher 实例
+    :param controller: RateController，可选；上报限流和成功结果
+    :param fields: iterable，可选；启用的字段，None 表示全部字段
+    :param archive: PageArchive，可选；提供时存档状态码为 200 的页面
+    :return: dict，商品详情；快速路径无法处理（非 200、验证码、解析失败）时返回 None
+    """
+    url = product_url(asin)
+    start_time = time.perf_counter()
+    try:
+        status, html = await fetcher.fetch(url)
+    except Exception as e:
+        logging.warning("⚠️ ASIN %s HTTP 请求失败，回退浏览器: %s", asin, e)
+        return None
+    if status != 200:
+        logging.warning("⚠️ ASIN %s HTTP 状态码 %s，回退浏览器", asin, status)
+        if controller is not None and status in (429, 503):
+            controller.record("blocked")
+        return None
+    product = parse_product_html(asin, html, fields)
+    if archive is not None:
+        await archive.save("detail", asin, url, html, status, ok=product is not None)
+    if product is None:
+        logging.warning("⚠️ ASIN %s 快速路径无法解析，回退浏览器", asin)
+    elif controller is not None:
+        controller.record("success", time.perf_counter() - start_time)
+    return product
@@ -0,0 +1,263 @@
+import re
+from functools import lru_cache
+from urls import absolute_url  # 补全品牌链接
+
+# 清洗和类型转换用到的正则，导入时编译一次，热路径上不再重复解析
+BRAND_JUNK_RE = re.compile(r'[^a-zA-Z0-9\s-]')  # 品牌名中的特殊字符
+PRICE_RE = re.compile(r'\$\d+\.\d{2}')  # 第一个合法价格
+WHITESPACE_RE = re.compile(r'[\n\r\s]+')
+PRICE_WHOLE_JUNK_RE = re.compile(r'[\n\r\s.]')  # 价格整数部分的空白和小数点
+PRICE_FRACTION_JUNK_RE = re.compile(r'[\n\r\s]')
+RATING_RE = re.compile(r"(\d+\.\d+|\d+)")
+REVIEW_COUNT_RE = re.compile(r"(\d+,?\d*)")
+ASPECT_JUNK_RE = re.compile(r'[^a-zA-Z\s]')  # 负面反馈词中的非字母字符
+NUMBER_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+BOUGHT_RE = re.compile(r"(\d+(?:\.\d+)?)\s*([KkMm]?)")
+
+def _has_class(name):
+    """生成与 CSS 类选择器 .name 等价的 XPath 谓词"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# 原始字段的读取规格，浏览器（EXTRACT_SCRIPT / extract_raw_dom）和 lxml（detail_parser）共用：
+# - css / xpath：选择器，为列表时依次尝试，取第一个有匹配的
+# - mode：text 第一个匹配元素的文本；attr 第一个匹配元素的 attr 属性；exists 是否存在；
+#         all_text 所有匹配元素的文本；all_attr 所有匹配元素按 attrs 顺序取第一个非空属性；
+#         labelled 在匹配元素内找文本包含 label 的标签，取标签所在行的下一行中的值
+# - fallback_for：只在该原始字段为空时才读取
+RAW_SPECS = {
+    "title": {"mode": "text", "css": "#productTitle", "xpath": "//*[@id='productTitle']"},
+    "brand": {"mode": "text", "css": "#bylineInfo", "xpath": "//*[@id='bylineInfo']"},
+    "brand_link": {"mode": "attr", "attr": "href", "css": "#bylineInfo", "xpath": "//*[@id='bylineInfo']"},
+    "price": {
+        "mode": "text",
+        "css": ["span.a-price", "span.a-offscreen"],
+        "xpath": [f"//span[{_has_class('a-price')}]", f"//span[{_has_class('a-offscreen')}]"],
+    },
+    "price_whole": {
+        "mode": "text", "fallback_for": "price",
+        "css": "span.a-price-whole", "xpath": f"//span[{_has_class('a-price-whole')}]",
+    },
+    "price_fraction": {
+        "mode": "text", "fallback_for": "price",
+        "css": "span.a-price-fraction", "xpath": f"//span[{_has_class('a-price-fraction')}]",
+    },
+    "bought": {
+        "mode": "text",
+        "css": "#social-proofing-faceout-title-tk_bought .a-text-bold",
+        "xpath": f"//*[@id='social-proofing-faceout-title-tk_bought']//*[{_has_class('a-text-bold')}]",
+    },
+    "fabric_type": {
+        "mode": "labelled", "label": "fabric type",
+        "css": "#productFactsDesktopExpander", "xpath": "//*[@id='productFactsDesktopExpander']",
+        "label_css": "span.a-color-base", "label_xpath": f".//span[{_has_class('a-color-base')}]",
+        "value_css": ".a-color-base", "value_xpath": f".//*[{_has_class('a-color-base')}]",
+    },
+    "frequently_returned": {
+        "mode": "exists",
+        "css": "div#buyingOptionNostosBadge_feature_div .hrrv-badge-T2-title p span.a-text-bold",
+        "xpath": (
+            f"//div[@id='buyingOptionNostosBadge_feature_div']//*[{_has_class('hrrv-badge-T2-title')}]"
+            f"//p//span[{_has_class('a-text-bold')}]"
+        ),
+    },
+    "variants": {
+        "mode": "all_attr", "attrs": ["data-asin", "data-defaultasin", "data-csa-c-asin"],
+        "css": "li[data-asin], div[data-defaultasin], div[data-csa-c-asin]",
+        "xpath": "//li[@data-asin] | //div[@data-defaultasin] | //div[@data-csa-c-asin]",
+    },
+    "rating": {
+        "mode": "text",
+        "css": "#averageCustomerReviews .a-icon-alt",
+        "xpath": f"//*[@id='averageCustomerReviews']//*[{_has_class('a-icon-alt')}]",
+    },
+    "review_count": {"mode": "text", "css": "#acrCustomerReviewText", "xpath": "//*[@id='acrCustomerReviewText']"},
+    "customer_say": {
+        "mode": "text",
+        "css": "#cr-product-insights-cards #product-summary p span",
+        "xpath": "//*[@id='cr-product-insights-cards']//*[@id='product-summary']//p//span",
+    },
+    "negative_aspects": {
+        "mode": "all_text",
+        "css": "#cr-product-insights-cards a[data-csa-c-item-id*='_NEGATIVE']",
+        "xpath": "//*[@id='cr-product-insights-cards']//a[contains(@data-csa-c-item-id, '_NEGATIVE')]",
+    },
+}
+
+# 页面判断（是否详情页、是否验证码页），无论启用哪些字段都会读取
+PROBE_SPECS = {
+    "has_title": {"mode": "exists", "css": RAW_SPECS["title"]["css"], "xpath": RAW_SPECS["title"]["xpath"]},
+    "has_price": {"mode": "exists", "css": RAW_SPECS["price"]["css"], "xpath": RAW_SPECS["price"]["xpath"]},
+    "captcha": {"mode": "exists", "css": "input#captchacharacters", "xpath": "//input[@id='captchacharacters']"},
+}
+
+# 搜索结果卡片上的原始字段，选择器相对于单个卡片（div[data-asin]）；contains 表示只取文本包含该内容的元素
+CARD_SPECS = {
+    "title": {"mode": "text", "css": ["h2 a span", "h2 span", "h2"]},
+    "price": {"mode": "text", "css": ["span.a-price:not(.a-text-price) span.a-offscreen", "span.a-price span.a-offscreen"]},
+    "price_whole": {"mode": "text", "fallback_for": "price", "css": "span.a-price-whole"},
+    "price_fraction": {"mode": "text", "fallback_for": "price", "css": "span.a-price-fraction"},
+    "rating": {"mode": "text", "css": "span.a-icon-alt"},
+    "review_count": {
+        "mode": "text", "css": ["a[href*='#customerReviews'] span.a-size-base", "span.a-size-base.s-underline-text"]
+    },
+    "bought": {"mode": "text", "css": "span.a-size-base.a-color-secondary", "contains": "bought in past month"},
+}
+
+def parse_price(value):
+    """'$12.99' -> 12.99，无法解析（如 'Price not found'）时返回 None"""
+    match = NUMBER_RE.search(value or "")
+    return float(match.group(0).replace(",", "")) if match else None
+
+def parse_bought(value):
+    """'1K+' -> 1000，'50+' -> 50，'< 50' -> 0（销量下限），无法解析时返回 None"""
+    value = (value or "").strip()
+    if value.startswith("<"):
+        return 0
+    match = BOUGHT_RE.match(value)
+    if not match:
+        return None
+    multiplier = {"k": 1000, "m": 1000000}.get(match.group(2).lower(), 1)
+    return int(float(match.group(1)) * multiplier)
+
+def parse_number(value, cast):
+    """'4.5' -> 4.5，'Rating not found' -> None"""
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return None
+
+def _clean_brand(raw):
+    brand = raw.get("brand") or "Brand not found"
+    # 清理品牌名称中的冗余部分
+    if "Visit the" in brand and "Store" in brand:
+        brand = brand.replace("Visit the", "").replace("Store", "").strip()
+    elif "Brand:" in brand:
+        brand = brand.replace("Brand:", "").strip()
+    return BRAND_JUNK_RE.sub('', brand).strip()
+
+def _clean_brand_link(raw):
+    brand_link = raw.get("brand_link")
+    if brand_link and not brand_link.startswith("http"):  # 补全品牌链接
+        brand_link = absolute_url(brand_link)
+    return brand_link
+
+def _clean_price(raw):
+    price_text = raw.get("price")
+    if price_text is not None:
+        price_match = PRICE_RE.search(price_text)  # 提取第一个合法价格
+        if price_match:
+            return price_match.group(0)
+        price_text = WHITESPACE_RE.sub('', price_text.strip())  # 清理文本
+        return price_text or "Price not found"
+    # 如果未找到完整价格，尝试拼接整数和小数部分
+    whole_text = PRICE_WHOLE_JUNK_RE.sub('', (raw.get("price_whole") or "").strip())
+    fraction_text = PRICE_FRACTION_JUNK_RE.sub('', (raw.get("price_fraction") or "").strip())
+    if whole_text and fraction_text:
+        return f"${whole_text}.{fraction_text}"
+    if whole_text:
+        return f"${whole_text}"
+    return "Price not found"
+
+def _clean_bought(raw):
+    bought_text = raw.get("bought")
+    return bought_text.split()[0] if bought_text and bought_text.split() else "< 50"
+
+def _clean_rating(raw):
+    rating_match = RATING_RE.search(raw.get("rating") or "")  # 提取评分数字
+    return rating_match.group(0) if rating_match else "Rating not found"
+
+def _clean_review_count(raw):
+    review_match = REVIEW_COUNT_RE.search(raw.get("review_count") or "")  # 提取评论数
+    return review_match.group(0).replace(",", "") if review_match else "Review count not found"
+
+def _clean_negative_aspects(raw):
+    cleaned = (ASPECT_JUNK_RE.sub('', text).strip() for text in raw.get("negative_aspects") or [])
+    return [aspect for aspect in cleaned if aspect]
+
+def _clean_variants(raw):
+    return list({v.strip() for v in raw.get("variants") or [] if v and v.strip()})  # 变体 ASIN 去重
+
+class Field:
+    """一个输出字段：依赖的原始字段、清洗函数和带类型的输出"""
+
+    def __init__(self, name, raw, clean, typed=None, family=False):
+        """
+        :param name: str，输出字段名
+        :param raw: tuple，依赖的 RAW_SPECS 键
+        :param clean: callable，clean(raw) -> 清洗后的值（字符串形式，与 get_product_details 的输出一致）
+        :param typed: callable，可选；typed(值) -> 带类型的值，供 Parquet 和变化监控使用（值为 None 时不调用），默认原样返回
+        :param family: bool，是否为同一变体家族共享的字段
+        """
+        self.name = name
+        self.raw = raw
+        self.clean = clean
+        self.typed = typed or (lambda value: value)
+        self.family = family
+
+# 字段注册表，顺序即输出顺序
+FIELDS = {field.name: field for field in (
+    Field("brand", ("brand",), _clean_brand, family=True),
+    Field("brand_link", ("brand_link",), _clean_brand_link, family=True),
+    Field("title", ("title",), lambda raw: raw.get("title") or "Title not found"),
+    Field("price", ("price", "price_whole", "price_fraction"), _clean_price, parse_price),
+    Field("bought", ("bought",), _clean_bought, parse_bought),
+    Field("fabric_type", ("fabric_type",), lambda raw: raw.get("fabric_type")),
+    Field("frequently_returned", ("frequently_returned",), lambda raw: bool(raw.get("frequently_returned")), bool),
+    Field("variants", ("variants",), _clean_variants, list),
+    Field("rating", ("rating",), _clean_rating, lambda value: parse_number(value, float)),
+    Field("review_count", ("review_count",), _clean_review_count, lambda value: parse_number(value, int)),
+    Field("negative_aspects", ("negative_aspects",), _clean_negative_aspects, list, family=True),
+    Field("customer_say", ("customer_say",), lambda raw: raw.get("customer_say") or "Customer say not found",
+          family=True),
+)}
+
+# 搜索结果卡片能直接提供的字段（所需原始字段都在 CARD_SPECS 中）
+CARD_FIELDS = tuple(name for name, field in FIELDS.items() if all(key in CARD_SPECS for key in field.raw))
+
+# 同一变体家族（颜色、尺寸等变体）共享的字段，每个家族只需抓取一次
+FAMILY_FIELDS = tuple(name for name, field in FIELDS.items() if field.family)
+
+def resolve_fields(names=None, exclude=()):
+    """
+    确定本次运行启用的字段。
+
+    :param names: iterable，可选；启用的字段名，为空表示全部字段
+    :param exclude: iterable，从中去掉的字段（如变体家族共享字段）
+    :return: tuple，按注册表顺序排列的字段名
+    :raises ValueError: 存在未知字段
+    """
+    names = set(names or FIELDS)
+    unknown = names - set(FIELDS)
+    if unknown:
+        raise ValueError(f"未知的字段: {sorted(unknown)}，可选: {list(FIELDS)}")
+    exclude = set(exclude)
+    return tuple(name for name in FIELDS if name in names and name not in exclude)
+
+@lru_cache(maxsize=None)
+def raw_specs(fields=None):
+    """
+    启用字段需要读取的原始字段规格（含页面判断），按字段组合缓存。
+
+    :param fields: tuple，resolve_fields 的结果，None 表示全部字段
+    :return: dict，原始字段名 -> 读取规格
+    """
+    specs = dict(PROBE_SPECS)
+    for name in FIELDS if fields is None else fields:
+        for key in FIELDS[name].raw:
+            specs[key] = RAW_SPECS[key]
+    return specs
+
+def build_product_record(asin, url, raw, fields=None):
+    """
+    将原始字段清洗为 get_product_details 的返回结构，未启用的字段为 None。
+
+    :param asin: str，商品的 ASIN
+    :param url: str，商品详情页 URL
+    :param raw: dict，EXTRACT_SCRIPT、extract_raw_dom 或 extract_raw_html 返回的原始字段
+    :param fields: tuple，可选；启用的字段，None 表示全部字段
+    :return: dict，清洗后的商品详情
+    """
+    record = {"asin": asin, "url": url}
+    for name, field in FIELDS.items():
+        record[name] = field.clean(raw) if fields is None or name in fields else None
+    return record
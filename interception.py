@@ -0,0 +1,193 @@
+import fnmatch
+import logging
+from collections import OrderedDict
+from urllib.parse import urlsplit
+import urls  # 站点根地址（替身服务器）始终视为第一方
+
+# 各阶段默认放行的 Playwright 资源类型，其余类型（image、stylesheet、font、media、ping、websocket 等）一律拦截。
+# 搜索页保留脚本和 XHR（翻页依赖页面本身）；详情页字段都在服务端渲染的文档中，只放行文档
+DEFAULT_TYPES = {
+    "search": ("document", "script", "xhr", "fetch"),
+    "detail": ("document",),
+}
+
+# 第一方域名（含子域名），其余域名的请求一律拦截
+DEFAULT_FIRST_PARTY_HOSTS = ("amazon.com", "media-amazon.com", "ssl-images-amazon.com")
+
+# 即使属于第一方也拦截的广告、埋点和统计域名（含子域名）
+DEFAULT_BLOCKED_HOSTS = (
+    "amazon-adsystem.com", "fls-na.amazon.com", "unagi.amazon.com", "unagi-na.amazon.com",
+    "completion.amazon.com", "doubleclick.net", "google-analytics.com", "googletagmanager.com",
+)
+
+def _host_matches(host, domains):
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+class TrafficStats:
+    """请求计数：放行并实际传输的请求和字节数、命中本地缓存的请求、按原因统计的拦截请求"""
+
+    __slots__ = ("requests", "bytes", "cached", "blocked")
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.cached = 0
+        self.blocked = {}  # 拦截原因（type / third_party / blocked_host）-> 请求数
+
+    def block(self, reason):
+        self.blocked[reason] = self.blocked.get(reason, 0) + 1
+
+    def add(self, other):
+        self.requests += other.requests
+        self.bytes += other.bytes
+        self.cached += other.cached
+        for reason, count in other.blocked.items():
+            self.blocked[reason] = self.blocked.get(reason, 0) + count
+
+    def blocked_total(self):
+        return sum(self.blocked.values())
+
+class StaticCache:
+    """少量页面确实需要的静态资源（如搜索页脚本）的内存缓存，按 URL 通配符匹配，超出容量时淘汰最久未用的条目"""
+
+    def __init__(self, patterns, max_bytes=32 * 2 ** 20):
+        """
+        :param patterns: iterable，URL 通配符（fnmatch），例如 "https://m.media-amazon.com/*.js"
+        :param max_bytes: int，缓存的总字节数上限
+        """
+        self.patterns = tuple(patterns)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()  # URL -> (状态码, 响应头, 内容)
+
+    def matches(self, request):
+        return request.method == "GET" and any(fnmatch.fnmatchcase(request.url, p) for p in self.patterns)
+
+    def get(self, url):
+        entry = self.entries.get(url)
+        if entry is not None:
+            self.entries.move_to_end(url)
+        return entry
+
+    def put(self, url, status, headers, body):
+        if status != 200 or len(body) > self.max_bytes:
+            return
+        self.entries[url] = (status, headers, body)
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, (_, _, evicted) = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+class InterceptPolicy:
+    """
+    上下文级别的请求拦截策略：按资源类型白名单和第一方域名放行请求，拦截广告和埋点域名，
+    可选地从本地缓存直接返回静态资源，并按页面统计放行、缓存和拦截的请求数及传输字节数。
+    """
+
+    def __init__(self, name, types, first_party_hosts=DEFAULT_FIRST_PARTY_HOSTS, blocked_hosts=DEFAULT_BLOCKED_HOSTS,
+                 cache=None, count_bytes=True):
+        """
+        :param name: str，阶段名（search / detail），用于日志
+        :param types: iterable，放行的 Playwright 资源类型（request.resource_type）
+        :param first_party_hosts: iterable，第一方域名（含子域名）；站点根地址的主机始终视为第一方
+        :param blocked_hosts: iterable，即使属于第一方也拦截的域名（含子域名）
+        :param cache: StaticCache，可选；匹配的静态资源首次从网络获取，之后从缓存返回
+        :param count_bytes: bool，是否统计放行请求的传输字节数（每个放行请求多一次 CDP 往返）
+        """
+        self.name = name
+        self.types = frozenset(types)
+        self.first_party_hosts = tuple(first_party_hosts)
+        self.blocked_hosts = tuple(blocked_hosts)
+        self.cache = cache
+        self.count_bytes = count_bytes
+
+    @classmethod
+    def from_config(cls, name, intercept_config, cache=None):
+        """
+        根据 config.json 中的 intercept 配置创建某个阶段的策略。
+
+        :param name: str，阶段名（search / detail），对应配置中的同名子段
+        :param intercept_config: dict，intercept 配置段
+        :param cache: StaticCache，可选；多个阶段共用的静态资源缓存，未提供时按阶段配置的 cache 创建
+        :return: InterceptPolicy；未启用时返回 None
+        """
+        if not intercept_config or not intercept_config.get("enabled", False):
+            return None
+        phase = intercept_config.get(name, {})
+        if cache is None and phase.get("cache"):
+            cache = StaticCache(phase["cache"], intercept_config.get("cache_max_mb", 32) * 2 ** 20)
+        return cls(
+            name, phase.get("types", DEFAULT_TYPES[name]),
+            first_party_hosts=intercept_config.get("first_party_hosts", DEFAULT_FIRST_PARTY_HOSTS),
+            blocked_hosts=intercept_config.get("blocked_hosts", DEFAULT_BLOCKED_HOSTS),
+            cache=cache, count_bytes=intercept_config.get("count_bytes", True),
+        )
+
+    def decide(self, url, resource_type):
+        """
+        :return: str，拦截原因（blocked_host / third_party / type）；放行时返回 None
+        """
+        if url.startswith(("data:", "blob:")):  # 不经过网络
+            return None
+        host = (urlsplit(url).hostname or "").lower()
+        if _host_matches(host, self.blocked_hosts):
+            return "blocked_host"
+        if host != urlsplit(urls.BASE_URL).hostname and not _host_matches(host, self.first_party_hosts):
+            return "third_party"
+        if resource_type not in self.types:
+            return "type"
+        return None
+
+    async def install(self, context, traffic_for):
+        """
+        在上下文上安装拦截规则，对上下文中的所有页面（包括之后新建的页面）生效。
+
+        :param context: Playwright 浏览上下文
+        :param traffic_for: callable，traffic_for(request) -> TrafficStats，请求所属页面的计数
+        """
+        fulfilled = set()  # 由本地处理的请求，不再统计网络传输字节
+
+        async def handle(route):
+            request = route.request
+            traffic = traffic_for(request)
+            reason = self.decide(request.url, request.resource_type)
+            if reason is not None:
+                traffic.block(reason)
+                await route.abort()
+                return
+            if self.cache is None or not self.cache.matches(request):
+                traffic.requests += 1
+                await route.continue_()
+                return
+            fulfilled.add(request)
+            entry = self.cache.get(request.url)
+            if entry is not None:
+                traffic.cached += 1
+                status, headers, body = entry
+                await route.fulfill(status=status, headers=headers, body=body)
+                return
+            response = await route.fetch()
+            body = await response.body()
+            traffic.requests += 1
+            traffic.bytes += len(body)
+            self.cache.put(request.url, response.status, response.headers, body)
+            await route.fulfill(response=response, body=body)
+
+        async def on_finished(request):
+            if request in fulfilled:
+                fulfilled.discard(request)
+                return
+            try:
+                sizes = await request.sizes()
+            except Exception:  # 页面已关闭等情况下取不到大小，不影响抓取
+                return
+            traffic_for(request).bytes += sizes["responseHeadersSize"] + max(sizes["responseBodySize"], 0)
+
+        await context.route("**/*", handle)
+        context.on("requestfailed", fulfilled.discard)
+        if self.count_bytes:
+            context.on("requestfinished", on_finished)
+        else:
+            context.on("requestfinished", fulfilled.discard)
+        logging.info("🛡️ '%s' 请求拦截已启用：放行 %s，静态缓存 %s",
+                     self.name, sorted(self.types), "开启" if self.cache is not None else "关闭")
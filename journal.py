@@ -0,0 +1,129 @@
+import json
+import logging
+import os
+import time
+
+class JournalState:
+    """从日志文件重放得到的抓取进度"""
+
+    def __init__(self):
+        self.queries = {}  # 搜索词 -> {"csv_file_path", "output_file_path", "source", "asins", "search_done"}
+        self.results = {}  # ASIN -> 商品详情（失败为 None）
+        self.finished = False  # 上次运行是否已正常结束
+
+    def apply(self, record):
+        """重放一条日志记录"""
+        kind = record.get("type")
+        if kind == "query":
+            self.queries[record["query"]] = {
+                "csv_file_path": record["csv_file_path"],
+                "output_file_path": record["output_file_path"],
+                "source": record.get("source", "search"),  # 旧日志没有该字段，均为搜索词
+                "asins": [],
+                "search_done": False,
+            }
+        elif kind == "enqueue":
+            self.queries[record["query"]]["asins"].extend(record["asins"])
+        elif kind == "search_done":
+            self.queries[record["query"]]["search_done"] = True
+        elif kind == "result":
+            self.results[record["asin"]] = record["data"]
+        elif kind == "run_done":
+            self.finished = True
+
+    def pending_asins(self):
+        """返回已发现但尚未完成的 ASIN"""
+        pending = set()
+        for query in self.queries.values():
+            pending.update(asin for asin in query["asins"] if asin not in self.results)
+        return pending
+
+class CrawlJournal:
+    """
+    只追加的 JSONL 抓取日志：记录搜索词、入队的 ASIN、搜索完成标记和每个 ASIN 的结果，
+    每条记录写入后立即 flush，进程崩溃或被中断后可以用 --resume 从日志恢复。
+    """
+
+    def __init__(self, path, fsync=False):
+        """
+        :param path: str，日志文件路径
+        :param fsync: bool，每条记录后是否 fsync（更安全，但更慢）
+        """
+        self.path = path
+        self.fsync = fsync
+        self.file = None
+        self.state = None  # 恢复模式下为上次运行的 JournalState
+
+    @staticmethod
+    def load(path):
+        """
+        读取并重放日志文件，末尾被截断的半行会被忽略。
+
+        :param path: str，日志文件路径
+        :return: JournalState
+        """
+        state = JournalState()
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    state.apply(json.loads(line))
+                except (json.JSONDecodeError, KeyError) as e:
+                    logging.warning("⚠️ 抓取日志第 %d 行无法解析，已忽略: %s", line_no, e)
+        return state
+
+    def open(self, resume=False):
+        """
+        打开日志。恢复模式下先重放旧日志再追加；否则把旧日志改名为 .prev 后新建。
+
+        :param resume: bool，是否从已有日志恢复
+        :return: JournalState | None，恢复模式下返回上次运行的进度
+        """
+        if resume and os.path.exists(self.path):
+            self.state = self.load(self.path)
+            logging.info("📒 从 %s 恢复：%d 个搜索词，已完成 %d 个 ASIN，待完成 %d 个", self.path,
+                         len(self.state.queries), len(self.state.results), len(self.state.pending_asins()))
+            self.file = open(self.path, "a", encoding="utf-8")
+            return self.state
+        if resume:
+            logging.warning("⚠️ 没有找到抓取日志 %s，将重新开始", self.path)
+        if os.path.exists(self.path):
+            os.replace(self.path, self.path + ".prev")
+        self.file = open(self.path, "w", encoding="utf-8")
+        return None
+
+    def _write(self, record):
+        record["ts"] = time.time()
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+    def record_query(self, query, csv_file_path, output_file_path, source="search"):
+        """
+        :param source: str，search 为搜索词；input 为直接输入的 ASIN 列表（名称是输入文件名，不能拿去搜索）
+        """
+        self._write({
+            "type": "query", "query": query, "source": source,
+            "csv_file_path": csv_file_path, "output_file_path": output_file_path
+        })
+
+    def record_enqueue(self, query, asins):
+        if asins:
+            self._write({"type": "enqueue", "query": query, "asins": list(asins)})
+
+    def record_search_done(self, query):
+        self._write({"type": "search_done", "query": query})
+
+    def record_result(self, asin, product_data):
+        self._write({"type": "result", "asin": asin, "data": product_data})
+
+    def record_run_done(self):
+        self._write({"type": "run_done"})
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
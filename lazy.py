@@ -0,0 +1,19 @@
+import importlib
+
+# 常用依赖未安装时的提示
+PLAYWRIGHT_HINT = "需要 playwright，请先执行 `pip install playwright && playwright install chromium`"
+
+def require(module, hint):
+    """
+    按需导入较重或可选的依赖（playwright、pandas、pyarrow、aiohttp、lxml），
+    使各模块导入时不加载它们；已导入的模块直接从 sys.modules 返回。
+
+    :param module: str，模块名，例如 "pyarrow.parquet"
+    :param hint: str，未安装时的提示
+    :return: module
+    :raises RuntimeError: 依赖未安装
+    """
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        raise RuntimeError(hint) from e
@@ -0,0 +1,194 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import zlib
+from contextlib import contextmanager
+
+# 日志格式：时间 - 级别 - 消息
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+# 结构化字段：由 log_context 设置，随 asyncio 任务的上下文传递，写入每条 JSON 日志
+CONTEXT_FIELDS = ("asin", "query", "phase")
+
+_context = contextvars.ContextVar("log_context", default={})
+_listener = None  # 当前的后台写日志线程（QueueListener）
+_queue_handler = None
+_hooks_registered = False
+
+@contextmanager
+def log_context(**fields):
+    """
+    在当前任务（及其创建的子任务）中为日志附加结构化字段，退出时恢复。
+
+    :param fields: CONTEXT_FIELDS 中的字段，例如 asin="B0XXXX"、query="floral apron"、phase="detail"
+    """
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+class ContextFilter(logging.Filter):
+    """把 log_context 中的字段写入日志记录（extra 中已显式提供的字段优先）"""
+
+    def filter(self, record):
+        context = _context.get()
+        for name in CONTEXT_FIELDS:
+            if not hasattr(record, name):
+                setattr(record, name, context.get(name))
+        return True
+
+class SampleFilter(logging.Filter):
+    """
+    按 ASIN 抽样 INFO 及以下级别的逐 ASIN 日志：同一个 ASIN 的日志要么全部保留、要么全部丢弃，
+    便于按 ASIN 追踪；WARNING 及以上级别和不属于某个 ASIN 的日志始终保留。
+    """
+
+    def __init__(self, rate):
+        """
+        :param rate: float，保留比例（0～1）
+        """
+        super().__init__()
+        self.threshold = int(rate * 2 ** 32)
+
+    def filter(self, record):
+        asin = getattr(record, "asin", None)
+        if asin is None or record.levelno >= logging.WARNING:
+            return True
+        return zlib.crc32(asin.encode("utf-8")) < self.threshold
+
+class JsonFormatter(logging.Formatter):
+    """每条日志一行 JSON：时间、级别、消息、CONTEXT_FIELDS 和异常堆栈"""
+
+    def format(self, record):
+        entry = {"ts": self.formatTime(record), "level": record.levelname, "msg": record.getMessage()}
+        for name in CONTEXT_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:  # 经过队列的记录已在调用方格式化好异常堆栈
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """队列满时直接丢弃日志并计数，调用方（事件循环）从不等待磁盘或控制台"""
+
+    def __init__(self, log_queue, capacity):
+        super().__init__(log_queue)
+        self.capacity = capacity
+        self.dropped = 0
+
+    def prepare(self, record):
+        # 根日志只有这一个处理器，不必像默认实现那样复制记录；只在调用方完成 %s 格式化（参数可能之后被修改），
+        # 时间、级别和 JSON 的拼接留给后台线程
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if self.queue.qsize() >= self.capacity:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+def _after_fork_in_child():
+    """fork 出的子进程（如 reextract 的进程池）没有写日志线程，改为直接输出到控制台"""
+    global _listener, _queue_handler
+    if _queue_handler is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root.addHandler(handler)
+    _listener = _queue_handler = None
+
+def stop_logging():
+    """停止后台写日志线程并写出队列中剩余的日志；可重复调用"""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    _listener.stop()
+    dropped = _queue_handler.dropped
+    for handler in _listener.handlers:
+        if dropped:
+            handler.handle(logging.makeLogRecord({
+                "levelno": logging.WARNING, "levelname": "WARNING", "msg": f"⚠️ 日志队列已满，丢弃了 {dropped} 条日志",
+            }))
+        handler.close()
+    _listener = _queue_handler = None
+
+def setup_logging(level="INFO", log_file="crawler.log", fmt="json", max_mb=50, backups=5, sample_rate=1.0,
+                  queue_size=10000, console=True):
+    """
+    配置根日志：调用方只把日志记录放入内存队列，由后台线程格式化并写入控制台和日志文件，
+    事件循环不会因磁盘写入而阻塞。只由命令行入口调用，库模块导入时不配置日志、不创建文件。
+
+    低于 level 的日志在 logging.info(...) 调用处即被跳过；热路径使用 %s 延迟格式化，被禁用或被抽样丢弃的日志不做字符串拼接。
+
+    :param level: str，日志级别
+    :param log_file: str，日志文件路径，为空时只输出到控制台
+    :param fmt: str，日志文件格式：json 每行一条结构化记录（带 asin / query / phase 字段）/ text 与控制台相同
+    :param max_mb: float，单个日志文件的大小上限（MB），超出后轮转；0 表示不轮转
+    :param backups: int，保留的轮转文件数
+    :param sample_rate: float，逐 ASIN 的 INFO 日志保留比例（0～1），WARNING 及以上始终保留
+    :param queue_size: int，日志队列容量，写入跟不上时丢弃新日志并在退出时报告丢弃数
+    :param console: bool，是否同时输出到控制台
+    """
+    global _listener, _queue_handler, _hooks_registered
+    stop_logging()
+    text_formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+    if console:
+        handler = logging.StreamHandler()
+        handler.setFormatter(text_formatter)
+        handlers.append(handler)
+    if log_file:
+        handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=int(max_mb * 2 ** 20), backupCount=backups, encoding="utf-8"
+        )
+        handler.setFormatter(JsonFormatter() if fmt == "json" else text_formatter)
+        handlers.append(handler)
+
+    _queue_handler = _NonBlockingQueueHandler(queue.SimpleQueue(), queue_size)
+    _queue_handler.addFilter(ContextFilter())
+    if sample_rate < 1:
+        _queue_handler.addFilter(SampleFilter(sample_rate))
+    root = logging.getLogger()
+    for handler in root.handlers[:]:  # 替换已有配置，避免重复输出
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, *handlers)
+    _listener.start()
+    if not _hooks_registered:
+        atexit.register(stop_logging)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_after_fork_in_child)
+        _hooks_registered = True
+
+def setup_logging_from_config(logging_config, level=None):
+    """
+    根据 config.json 中的 logging 配置段配置日志。
+
+    :param logging_config: dict，logging 配置段
+    :param level: str，可选；覆盖配置中的日志级别（命令行 --log-level）
+    """
+    setup_logging(
+        level or logging_config.get("level", "INFO"), logging_config.get("file", "crawler.log"),
+        fmt=logging_config.get("format", "json"), max_mb=logging_config.get("max_mb", 50),
+        backups=logging_config.get("backups", 5), sample_rate=logging_config.get("sample_rate", 1.0),
+        queue_size=logging_config.get("queue_size", 10000), console=logging_config.get("console", True),
+    )
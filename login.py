@@ -1,20 +1,18 @@
 import logging
-from playwright.sync_api import sync_playwright
+import sys
 import json
-
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("crawler.log", encoding="utf-8")
-    ]
-)
+from lazy import PLAYWRIGHT_HINT, require  # 只在登录时加载 playwright
+from log_setup import setup_logging
 
 COOKIES_FILE = "amazon_cookies.json"
 
-def save_amazon_cookies():
+def save_amazon_cookies(cookies_file=COOKIES_FILE):
+    """
+    手动登录并保存 Cookies。多账号时为每个账号指定不同的文件，并加入 config.json 的 sessions.cookie_files。
+
+    :param cookies_file: str，Cookies 保存路径
+    """
+    sync_playwright = require("playwright.sync_api", PLAYWRIGHT_HINT).sync_playwright
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=False)  # 关闭无头模式，手动登录
         page = browser.new_page()
@@ -37,11 +35,13 @@ def save_amazon_cookies():
 
         # **获取登录后的 Cookies**
         cookies = page.context.cookies()
-        with open(COOKIES_FILE, "w") as f:
+        with open(cookies_file, "w") as f:
             json.dump(cookies, f)
 
-        logging.info("✅ 登录成功，Cookies 已保存到 `amazon_cookies.json`")
+        logging.info("✅ 登录成功，Cookies 已保存到 `%s`", cookies_file)
         browser.close()
 
 if __name__ == "__main__":
-    save_amazon_cookies()
\ No newline at end of file
+    # 用法: python login.py [Cookies 文件路径]，例如 python login.py sessions/account2.json
+    setup_logging()
+    save_amazon_cookies(sys.argv[1] if len(sys.argv) > 1 else COOKIES_FILE)
\ No newline at end of file
@@ -1,194 +1,270 @@
 import asyncio
-import csv
-import json
 import logging
-from search import search_products  # 导入搜索模块，获取 ASIN 列表
-from scraper import get_product_details  # 导入抓取模块，获取商品详情
-from playwright.async_api import async_playwright  # 导入 Playwright 的异步 API
-import time
 import os
-from datetime import datetime  # 新增时间模块
-
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,  # 设置默认日志级别为 INFO
-    format="%(asctime)s - %(levelname)s - %(message)s",  # 日志格式：时间 - 级别 - 消息
-    handlers=[
-        logging.StreamHandler(),  # 输出到控制台
-        logging.FileHandler("crawler.log", encoding="utf-8")  # 输出到文件
-    ]
-)
-
-# 配置文件的路径
-CONFIG_FILE = "config.json"
-# CSV 文件保存目录
-CSV_DIR = "csv"  # 直接定义，不检查和创建
-
-# 读取配置文件，获取全局参数
-with open(CONFIG_FILE, "r") as f:
-    config = json.load(f)
-
-# 从配置文件中提取参数
-SEARCH_QUERIES = config["search_query"]  # 搜索关键词列表，例如 ["toilet paper holder", "vintage apron"]
-CSV_FILE_BASE = config["csv_file"]  # 保存 ASIN 列表的 CSV 文件基础名
-OUTPUT_FILE_BASE = config["output_file"]  # 保存最终商品数据的 CSV 文件基础名
-MAX_WORKERS = config["max_processes"]  # 最大并行任务数
-MAX_PAGES = config["max_pages"]  # 搜索结果的最大翻页数
-COOKIES_FILE = config["cookies_file"]  # Cookies 文件路径，用于模拟登录
-
-# 定义工作进程函数，负责从队列中获取 ASIN 并抓取数据
-async def worker(queue, context, results, seen_asins, failed_asins):
-    """
-    异步工作进程，从任务队列中获取 ASIN 并调用 get_product_details 抓取商品信息。
-    
-    :param queue: asyncio.Queue，存储待处理的 ASIN
-    :param context: Playwright 浏览上下文，用于创建新页面
-    :param results: list，存储抓取结果
-    :param seen_asins: set，记录已处理的 ASIN，避免重复
-    :param failed_asins: set，记录失败的 ASIN
+import socket
+import sys
+import time
+from datetime import datetime
+from pipeline import BLOCKED_RESOURCES, CrawlPipeline, scrape_asin  # 多搜索词流水线：并发搜索 + 共享工作池
+from browser_pool import BrowserPool  # 共享浏览器的页面池
+from interception import InterceptPolicy  # 上下文级别的请求拦截策略
+from sessions import SessionPool  # 多会话池
+from search import SEARCH_HEADERS  # 搜索页请求头
+from fetcher import HttpFetcher  # 原始 HTTP 抓取快速路径
+from cache import AsinCache  # ASIN 结果缓存
+from archive import PageArchive  # 原始页面存档，供离线重新抽取
+from rate_controller import RateController  # AIMD 并发与速率控制
+from journal import CrawlJournal  # 抓取日志，支持断点恢复
+from sinks import open_sinks  # 结果输出格式
+from retry_policy import RetryPolicy  # 失败分类与重试退避
+from variants import VariantExpander  # 变体图扩展
+from monitor import ChangeMonitor  # 变化监控，只输出增量
+from scheduler import ScheduleStore, Scheduler  # 常驻调度：按到期时间的优先队列
+from metrics import METRICS  # 抓取指标：阶段耗时、结果计数、Prometheus 输出
+from asin_input import input_name, iter_asins  # 直接输入的 ASIN 列表（CSV / JSONL / 标准输入）
+from shard import Coordinator, ShardClient, read_asin_file, run_shard_worker  # 多进程 / 多主机分片抓取
+from settings import CONFIG_FILE, Settings  # 运行配置，由入口读取后显式传入
+from lazy import PLAYWRIGHT_HINT, require  # playwright 在启动浏览器时才加载
+from log_setup import setup_logging_from_config
+
+# 导入本模块不读取配置、不配置日志、不加载 playwright；由 cli.py（或下方的兼容入口）读取配置后调用各函数
+
+REFRESH_QUERY = "asin_refresh"  # 常驻模式下单独刷新的 ASIN 的输出文件名前缀
+
+def build_pool(settings, browser, search=True):
     """
-    while not queue.empty():  # 当队列不为空时持续处理
-        try:
-            asin = await queue.get()  # 从队列中获取一个 ASIN
-        except asyncio.CancelledError:
-            logging.warning("⚠️ 获取 ASIN 时任务被取消")
-            queue.task_done()
-            raise
-        page = None  # 初始化 page 为 None
-        try:
-            if asin in seen_asins:  # 如果 ASIN 已处理过，跳过
-                queue.task_done()  # 标记任务完成
-                continue
-            logging.info(f"🛒 任务队列领取 ASIN: {asin}")  # 显示当前处理的 ASIN
-            page = await context.new_page()  # 创建新页面
-            # 拦截并禁用不必要的资源请求，优化加载速度
-            await page.route("**/*.{png,jpg,jpeg,gif,svg,webp,css,woff,woff2,js,mp4,webm}", lambda route: route.abort())
-            product_data = await get_product_details(asin, page)  # 抓取商品详情
-            await page.close()  # 关闭页面，释放资源
-            queue.task_done()  # 标记任务完成
-            if product_data:  # 如果成功抓取到数据
-                seen_asins.add(asin)  # 将 ASIN 标记为已处理
-                results.append(product_data)  # 添加到结果列表
-            else:  # 如果抓取失败
-                failed_asins.add(asin)  # 记录失败的 ASIN
-        except asyncio.CancelledError:
-            logging.warning(f"⚠️ 任务处理 ASIN {asin} 被取消")
-            if page is not None:  # 检查 page 是否已创建
-                try:
-                    await page.close()
-                except Exception as e:
-                    logging.debug(f"关闭页面 {asin} 时出错: {str(e)}")
-            queue.task_done()
-            raise
-
-async def process_query(query, csv_file_base, output_file_base, browser, task_list):
-    """处理单个搜索词的爬取流程"""
-    timestamp = datetime.now().strftime("%Y%m%d%H%M")  # 生成时间戳，如 202503011430
-    csv_file_path = os.path.join(CSV_DIR, f"{query}_{timestamp}_{csv_file_base}")
-    output_file_path = os.path.join(CSV_DIR, f"{query}_{timestamp}_{output_file_base}")
-    
-    # 调用 search_products 获取 ASIN 列表
-    asins = await search_products(query, csv_file_path, MAX_PAGES)
-    if not asins:  # 如果没有找到 ASIN，跳过
-        logging.warning(f"❌ 没有找到 ASIN for '{query}'，跳过！")
-        return
+    根据配置创建共享浏览器的页面池
 
-    # 创建任务队列，用于分发 ASIN 给工作进程
-    queue = asyncio.Queue()
-    seen_asins = set()  # 成功抓取的 ASIN
-    failed_asins = set()  # 失败的 ASIN
-    # 将所有 ASIN 添加到队列中
-    for asin in asins:
-        await queue.put(asin)
+    :param settings: Settings，运行配置
+    :param search: bool，是否需要搜索页面（直接输入 ASIN 和分片工作进程不需要）
+    """
+    return BrowserPool(
+        browser, settings.cookies_file, settings.search_concurrency if search else 0, settings.max_workers,
+        block_pattern=BLOCKED_RESOURCES,
+        max_navigations=settings.pool.get("max_navigations", 50),
+        report_interval=settings.pool.get("report_interval", 60),
+        search_headers=SEARCH_HEADERS,
+        sessions=SessionPool.from_config(settings.sessions, settings.cookies_file),
+        detail_contexts=settings.sessions.get("detail_contexts", 0),
+        intercept={name: InterceptPolicy.from_config(name, settings.intercept) for name in ("search", "detail")}
+    )
 
-    # 创建新的浏览上下文
-    context = await browser.new_context()
+def build_pipeline(settings, pool, http_fetcher=None, cache=None, controller=None, journal=None, monitor=None,
+                   archive=None, refresh_groups=()):
+    """根据配置创建多搜索词流水线"""
+    output_formats = settings.output_formats
+    if monitor is not None and not settings.monitor.get("snapshot", False):  # 监控模式默认只输出变化
+        output_formats = ()
+    return CrawlPipeline(
+        pool, settings.max_workers, settings.max_pages, settings.csv_dir, settings.csv_file_base,
+        settings.output_file_base,
+        search_concurrency=settings.search_concurrency, extract_mode=settings.extract_mode, http_fetcher=http_fetcher,
+        cache=cache, controller=controller, journal=journal, output_formats=output_formats,
+        retry_policy=RetryPolicy.from_config(settings.retry),
+        variants=VariantExpander.from_config(settings.variants, settings.fields),
+        monitor=monitor, fields=settings.fields, max_queue=settings.memory.get("max_queue", 0),
+        spill_path=settings.memory.get("spill_path") or None,
+        expected_asins=settings.memory.get("expected_asins", 100000),
+        search_mode=settings.search_mode, archive=archive, refresh_groups=refresh_groups
+    )
 
-    # 加载 Amazon 登录 Cookies
+async def process_query(settings, query, pool, task_list, http_fetcher=None, cache=None, controller=None, archive=None):
+    """处理单个搜索词的爬取流程（单搜索词的流水线）"""
+    pipeline = build_pipeline(settings, pool, http_fetcher, cache, controller, archive=archive)
     try:
-        with open(COOKIES_FILE, "r") as f:
-            cookies = json.load(f)
-            await context.add_cookies(cookies)  # 将 Cookies 添加到上下文
-            logging.info(f"✅ 已加载 Amazon 登录 Cookies for '{query}'")
-    except:
-        logging.warning(f"⚠️ 没有找到 Cookies，可能需要先运行 `login.py` 手动登录")
-        try:
-            await context.close()
-        except Exception as e:
-            logging.debug(f"关闭上下文时出错: {str(e)}")
-        return
+        await pipeline.run([query], task_list)
+    finally:
+        pipeline.close()
 
-    # 初始化结果列表
-    results = []
-    # 创建并行任务，数量为 ASIN 总数和 MAX_WORKERS 的较小值
-    tasks = [asyncio.create_task(worker(queue, context, results, seen_asins, failed_asins)) 
-             for _ in range(min(len(asins), MAX_WORKERS))]
-    task_list.extend(tasks)  # 将任务添加到全局任务列表以便中断时取消
+async def run_daemon(settings, pool, task_list, http_fetcher=None, cache=None, controller=None, monitor=None,
+                     archive=None):
+    """
+    常驻模式：浏览器、页面池和各类资源在轮次之间保持打开，按调度表循环抓取到期的搜索词和 ASIN。
 
+    :param settings: Settings，运行配置
+    :param pool: BrowserPool，已启动的页面池
+    :param task_list: list，登记创建的任务，便于中断时取消
+    """
+    daemon_config = settings.daemon
+    store = ScheduleStore(daemon_config.get("path", "schedule.sqlite3"))
+    scheduler = Scheduler(store, jitter=daemon_config.get("jitter", 0.1))
+    query_interval = daemon_config.get("query_interval", 24 * 3600)
+    asin_interval = daemon_config.get("asin_interval", 6 * 3600)
+    intervals = daemon_config.get("intervals", {})  # 单个搜索词或 ASIN 的刷新间隔
+    batch_size = daemon_config.get("batch_size", 500)
+    track_asins = daemon_config.get("track_asins", True)  # 搜索到的 ASIN 是否单独按 asin_interval 刷新
+    for query in settings.search_queries:
+        scheduler.add("query", query, intervals.get(query, query_interval))
+    for asin in daemon_config.get("asins", []):
+        scheduler.add("asin", asin, intervals.get(asin, asin_interval))
+    store.commit()
+    cycle = 0
     try:
-        await asyncio.gather(*tasks)  # 等待所有任务完成
-    except asyncio.CancelledError:
-        logging.warning(f"⚠️ 处理 '{query}' 的任务被取消")
-        # 确保所有任务被取消并完成
-        for task in tasks:
-            if not task.done():
-                task.cancel()
-        await asyncio.gather(*tasks, return_exceptions=True)
-        # 关闭上下文，不处理异常
-        try:
-            await context.close()
-        except Exception:
-            pass  # 忽略关闭时的异常
-        raise
+        while True:
+            items = scheduler.pop_due(limit=batch_size)
+            if not items:  # 睡到下一个调度项到期，最多一分钟
+                next_due = scheduler.next_due()
+                await asyncio.sleep(60 if next_due is None else min(60, max(1, next_due - time.time())))
+                continue
+            cycle += 1
+            queries = [key for kind, key in items if kind == "query"]
+            asins = [key for kind, key in items if kind == "asin"]
+            logging.info("🔁 第 %d 轮：%d 个搜索词，%d 个 ASIN 到期", cycle, len(queries), len(asins))
+            # 到期刷新的 ASIN 强制重新抓取 refresh_groups，不会只命中缓存就被重新排期
+            pipeline = build_pipeline(settings, pool, http_fetcher, cache, controller, None, monitor, archive,
+                                      daemon_config.get("refresh_groups", ["volatile"]))
+            await pipeline.run(queries, task_list, seeds={REFRESH_QUERY: asins} if asins else None)
+            task_list[:] = [task for task in task_list if not task.done()]
 
-    # 正常完成时关闭上下文
-    try:
-        await context.close()
-    except Exception as e:
-        logging.debug(f"关闭上下文时出错: {str(e)}")
+            now = time.time()
+            for kind, key in items:
+                if kind == "query" or key not in pipeline.done:
+                    scheduler.reschedule(kind, key, now)
+            for asin in pipeline.done:  # 本轮抓取过的 ASIN（包括搜索结果和变体）从现在起重新计时
+                if not track_asins and ("asin", asin) not in scheduler.intervals:
+                    continue
+                scheduler.add("asin", asin, intervals.get(asin, asin_interval), now)
+                # 变化越频繁，下次刷新越早（间隔 0.5x ~ 1.5x）
+                factor = 1.5 - monitor.volatility(asin) if monitor is not None else 1.0
+                scheduler.reschedule("asin", asin, now, factor)
+            store.commit()
+            pipeline.close()
+            logging.info("📅 第 %d 轮完成，共 %d 个调度项，下次到期 %s", cycle, len(scheduler),
+                         time.strftime("%H:%M:%S", time.localtime(scheduler.next_due() or now)))
+    finally:
+        store.close()
+
+async def coordinate(settings, asin_file):
+    """
+    分片协调器：读取 ASIN 列表分批分发给工作进程，结果流式写入 csv/shard_<时间戳>_<output_file>。
+    配置了 shard.processes 时在本机启动对应数量的工作进程（各自拥有独立的浏览器和事件循环）。
+
+    :param settings: Settings，运行配置；本机工作进程使用同一配置文件
+    :param asin_file: str，ASIN 列表文件（search 保存的 ASIN CSV，或每行一个 ASIN）
+    """
+    asins = read_asin_file(asin_file)
+    timestamp = datetime.now().strftime("%Y%m%d%H%M")
+    sink = open_sinks(os.path.join(settings.csv_dir, f"shard_{timestamp}_{settings.output_file_base}"),
+                      settings.output_formats)
+    shard_config = settings.shard
+    host = shard_config.get("host", "127.0.0.1")
+    port = shard_config.get("port", 8765)
+
+    def on_result(asin, product_data):
+        if product_data:
+            sink.write(product_data)
 
-    # 如果没有抓取到数据，提示并返回
-    if not results:
-        logging.warning(f"❌ 没有爬取到数据 for '{query}'")
+    coordinator = Coordinator(
+        asins, on_result,
+        batch_size=shard_config.get("batch_size", 20), lease_timeout=shard_config.get("lease_timeout", 300),
+        retry_policy=RetryPolicy.from_config(settings.retry), token=shard_config.get("token", "")
+    )
+    serve_task = asyncio.create_task(coordinator.serve(host, port))
+    # 开始监听后才启动工作进程；监听失败（端口被占用、缺少口令等）时直接抛出
+    listening = asyncio.create_task(coordinator.listening.wait())
+    await asyncio.wait((serve_task, listening), return_when=asyncio.FIRST_COMPLETED)
+    if not listening.done():
+        listening.cancel()
+        sink.close()
+        serve_task.result()  # 抛出监听失败的原因
         return
+    connect_host = "127.0.0.1" if host in ("0.0.0.0", "") else host
+    cli = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py")
+    worker_args = ["--config", settings.path] if settings.path else []
+    processes = [
+        await asyncio.create_subprocess_exec(sys.executable, cli, *worker_args, "scrape", "--worker", f"{connect_host}:{port}")
+        for _ in range(shard_config.get("processes", 0))
+    ]
+    try:
+        await serve_task
+        await asyncio.gather(*(process.wait() for process in processes))
+    finally:
+        for process in processes:
+            if process.returncode is None:
+                process.terminate()
+        sink.close()
 
-    # 从第一个结果动态获取字段名
-    fieldnames = list(results[0].keys())
-    # 将结果写入 CSV 文件
-    with open(output_file_path, "w", newline="", encoding="utf-8") as file:
-        writer = csv.writer(file)
-        # 排除 url 和 brand_link 字段，生成表头
-        field_names = [field for field in fieldnames if field not in ["url", "brand_link"]]
-        writer.writerow(field_names)  # 写入表头
-        # 遍历所有抓取结果
-        for product_data in results:
-            # 将 ASIN 转换为超链接格式
-            product_data["asin"] = f'=HYPERLINK("https://www.amazon.com/dp/{product_data["asin"]}", "{product_data["asin"]}")'
-            # 如果有品牌链接，将品牌转换为超链接
-            if product_data.get("brand_link"):
-                product_data["brand"] = f'=HYPERLINK("{product_data["brand_link"]}", "{product_data.get("brand", "N/A")}")'
-            # 写入一行数据，使用 get 方法避免字段缺失
-            writer.writerow([product_data.get(field, "N/A") for field in field_names])
-
-    # 输出抓取统计信息
-    total_asins = len(asins)
-    successful_asins = len(results)
-    failed_count = total_asins - successful_asins
-    logging.info(f"🎉 '{query}' 商品信息已保存到 `{output_file_path}`！共爬取 {total_asins} 个 ASIN，成功 {successful_asins} 个，失败 {failed_count} 个，失败的 ASIN: {list(failed_asins)}")
+async def run_worker(settings, address, pool, http_fetcher=None, cache=None, controller=None, archive=None):
+    """
+    分片工作进程：连接协调器，租用 ASIN 批次并用本进程的浏览器抓取，结果逐条回传。
+
+    :param settings: Settings，运行配置
+    :param address: str，协调器地址 host:port
+    :param pool: BrowserPool，已启动的页面池
+    """
+    host, port = address.rsplit(":", 1)
+    client = ShardClient(host, int(port), f"{socket.gethostname()}-{os.getpid()}", settings.shard.get("token", ""))
+    await client.connect()
+    logging.info("🔌 已连接分片协调器 %s", address)
+
+    async def scrape(asin):
+        product_data, _ = await scrape_asin(asin, pool.detail, settings.extract_mode, http_fetcher, cache, controller,
+                                            fields=settings.fields, archive=archive)
+        return product_data
+
+    try:
+        await run_shard_worker(client, scrape, concurrency=settings.max_workers,
+                               batch_size=settings.shard.get("batch_size", 20))
+    finally:
+        await client.close()
 
 # 定义主函数，协调搜索和抓取流程
-async def main():
-    """主函数：负责循环处理所有搜索词并调用爬取流程"""
+async def main(settings, resume=False, daemon=False, worker=None, input_path=None):
+    """
+    主函数：所有搜索词在同一条流水线中并发搜索、共享工作池抓取
+
+    :param settings: Settings，运行配置
+    :param resume: bool，是否从抓取日志恢复上次中断的运行
+    :param daemon: bool，是否以常驻调度模式运行
+    :param worker: str，可选；协调器地址 host:port，提供时作为分片工作进程运行
+    :param input_path: str，可选；ASIN 列表（CSV / JSONL，"-" 为标准输入），提供时跳过搜索直接抓取这些 ASIN
+    """
     task_list = []  # 存储所有异步任务以便中断时取消
+    settings.apply()
+    metrics_config = settings.metrics
+    METRICS.configure(metrics_config.get("enabled", True), metrics_config.get("trace_file"))
+    async_playwright = require("playwright.async_api", PLAYWRIGHT_HINT).async_playwright
     async with async_playwright() as p:
         browser = await p.chromium.launch(
             headless=True,
             args=["--disable-gpu", "--disable-web-security", "--disable-dev-shm-usage", "--no-sandbox"]
         )
+        pool = build_pool(settings, browser, search=not (worker or input_path))
+        if not await pool.start():  # 没有 Cookies 时不启动抓取
+            await browser.close()
+            return
+        reporter = None
+        if METRICS.enabled:  # 定期输出摘要、写出 Prometheus 文件，可选 HTTP 端点
+            reporter = asyncio.create_task(METRICS.report_loop(
+                metrics_config.get("report_interval", 60), metrics_config.get("prometheus_file"),
+                metrics_config.get("http_port", 0), metrics_config.get("http_host", "127.0.0.1")
+            ))
+        http_fetcher = None
+        if settings.fetch_backend == "http":  # 所有搜索词共享一个 HTTP 连接池
+            http_fetcher = HttpFetcher(settings.cookies_file, pool_size=settings.http_pool_size)
+            await http_fetcher.open()
+        cache = AsinCache.from_config(settings.cache)  # 未启用时为 None
+        archive = PageArchive.from_config(settings.archive)  # 未启用时为 None
+        controller = RateController.from_config(settings.rate, settings.max_workers)  # 未启用时沿用固定并发和随机延迟
+        monitor = None if worker else ChangeMonitor.from_config(settings.monitor)  # 未启用时为 None，照常输出全量快照
+        journal = None
+        if not daemon and not worker:  # 常驻模式的进度由调度表持久化，分片模式由协调器跟踪
+            journal = CrawlJournal(settings.journal_file)
+            journal.open(resume)
         try:
-            for query in SEARCH_QUERIES:
-                logging.info(f"=== 开始处理搜索词: {query} ===")
-                await process_query(query, CSV_FILE_BASE, OUTPUT_FILE_BASE, browser, task_list)
+            if worker:
+                await run_worker(settings, worker, pool, http_fetcher, cache, controller, archive)
+            elif daemon:
+                await run_daemon(settings, pool, task_list, http_fetcher, cache, controller, monitor, archive)
+            else:
+                pipeline = build_pipeline(settings, pool, http_fetcher, cache, controller, journal, monitor, archive)
+                try:
+                    if input_path:  # 流式读取 ASIN 列表，不启动搜索
+                        await pipeline.run([], task_list, seeds={input_name(input_path): iter_asins(input_path)})
+                    else:
+                        await pipeline.run(settings.search_queries, task_list)
+                finally:
+                    pipeline.close()
         except KeyboardInterrupt:
             logging.warning("用户中断程序，正在清理资源...")
             # 取消所有正在运行的任务
@@ -212,22 +288,52 @@ async def main():
             await asyncio.gather(*pending, return_exceptions=True)
             return
         finally:
+            if journal is not None:
+                journal.close()
+            await pool.close()
+            if http_fetcher is not None:
+                await http_fetcher.close()
+            if cache is not None:
+                cache.close()
+            if archive is not None:
+                archive.close()
+            if monitor is not None:
+                monitor.close()
+            if reporter is not None:
+                reporter.cancel()
+                await asyncio.gather(reporter, return_exceptions=True)
+                METRICS.log_summary()
+            METRICS.close()
             # 确保浏览器在正常完成时也被关闭
             try:
                 await browser.close()
             except Exception as e:
-                logging.debug(f"关闭浏览器时出错: {str(e)}")
+                logging.debug("关闭浏览器时出错: %s", e)
 
-# 程序入口，运行主函数并计时
+# 兼容入口（推荐使用 cli.py），运行主函数并计时
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Amazon 搜索词商品抓取")
+    parser.add_argument("--config", default=CONFIG_FILE, help="配置文件路径")
+    parser.add_argument("--resume", action="store_true", help="从抓取日志恢复上次中断的运行，只抓取未完成的 ASIN")
+    parser.add_argument("--daemon", action="store_true", help="常驻调度模式：保持浏览器常开，按刷新间隔循环抓取")
+    parser.add_argument("--coordinator", metavar="ASIN_FILE", help="分片协调器：把 ASIN 列表分批分发给工作进程")
+    parser.add_argument("--worker", metavar="HOST:PORT", help="分片工作进程：从协调器租用 ASIN 批次抓取")
+    parser.add_argument("--input", metavar="ASIN_FILE", help="直接抓取 ASIN 列表（CSV / JSONL，- 为标准输入），跳过搜索")
+    args = parser.parse_args()
+    settings = Settings.load(args.config)
+    setup_logging_from_config(settings.logging)
     start_time = time.perf_counter()  # 记录开始时间
     try:
-        asyncio.run(main())  # 运行异步主函数
+        if args.coordinator:
+            asyncio.run(coordinate(settings, args.coordinator))
+        else:
+            asyncio.run(main(settings, resume=args.resume, daemon=args.daemon, worker=args.worker, input_path=args.input))  # 运行异步主函数
     except KeyboardInterrupt:
         logging.warning("用户中断程序，程序已退出")
     finally:
         end_time = time.perf_counter()  # 记录结束时间
         total_time = end_time - start_time  # 计算总耗时
         logging.info("=" * 50)
-        logging.info(f"整个 `main.py` 运行时间: {total_time:.2f} 秒")
+        logging.info("整个 `main.py` 运行时间: %.2f 秒", total_time)
         logging.info("=" * 50)
\ No newline at end of file
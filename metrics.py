@@ -0,0 +1,235 @@
+import asyncio
+import bisect
+import contextvars
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+# 耗时直方图的分桶上界（秒），覆盖从单次 evaluate 到超时等待的范围
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# 当前协程正在抓取的 ASIN 的逐阶段耗时，由 start_trace 设置（每个工作协程各自独立）
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+class Histogram:
+    """累积分桶直方图，格式与 Prometheus histogram 一致"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个为 +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """按分桶估算分位数（返回所在桶的上界），无数据时返回 None"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+class CrawlMetrics:
+    """
+    抓取指标：逐阶段耗时直方图（goto、等待选择器、抽取、排队等待、重试延迟等）、
+    结果计数器和工作协程利用率。可以定期输出摘要、写出 Prometheus 文本、通过 HTTP 暴露，
+    并可选地把每个 ASIN 的逐阶段耗时写入 trace JSONL。
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.histograms = {}  # 阶段名 -> Histogram
+        self.counters = {}  # (指标名, 标签元组) -> 计数
+        self.busy_workers = 0
+        self.total_workers = 0
+        self.busy_seconds = 0.0  # 工作协程处理 ASIN 的累计时间
+        self.idle_seconds = 0.0  # 工作协程等待队列的累计时间
+        self.started = time.time()
+        self.trace_file = None
+
+    def configure(self, enabled=True, trace_file=None):
+        """
+        :param enabled: bool，是否记录指标；关闭后 phase / inc 几乎没有开销
+        :param trace_file: str，可选；逐 ASIN 的 trace JSONL 路径
+        """
+        self.enabled = enabled
+        if trace_file and enabled:
+            self.trace_file = open(trace_file, "a", encoding="utf-8")
+
+    def observe(self, phase, seconds):
+        """记录一次阶段耗时，同时计入当前 ASIN 的 trace"""
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(phase)
+        if histogram is None:
+            histogram = self.histograms[phase] = Histogram()
+        histogram.observe(seconds)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace["phases"][phase] = round(trace["phases"].get(phase, 0.0) + seconds, 4)
+
+    def phase(self, name):
+        """
+        计时上下文管理器：with METRICS.phase("goto"): await page.goto(...)
+
+        :param name: str，阶段名
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def inc(self, name, value=1, **labels):
+        """计数器加一：METRICS.inc("outcomes_total", outcome="captcha")"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def worker_busy(self, busy):
+        """工作协程开始（True）或结束（False）处理一个 ASIN"""
+        self.busy_workers += 1 if busy else -1
+
+    def worker_time(self, busy_seconds=0.0, idle_seconds=0.0):
+        self.busy_seconds += busy_seconds
+        self.idle_seconds += idle_seconds
+
+    def utilization(self):
+        """工作协程利用率：处理时间 / (处理时间 + 等待队列时间)"""
+        total = self.busy_seconds + self.idle_seconds
+        return self.busy_seconds / total if total else 0.0
+
+    def start_trace(self, asin, attempt=1):
+        """开始记录当前协程正在处理的 ASIN 的逐阶段耗时"""
+        if not self.enabled or self.trace_file is None:
+            return
+        _current_trace.set({"asin": asin, "attempt": attempt, "start": time.perf_counter(), "phases": {}})
+
+    def finish_trace(self, outcome):
+        """结束当前 ASIN 的 trace 并写出一行 JSONL"""
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        _current_trace.set(None)
+        record = {
+            "ts": time.time(),
+            "asin": trace["asin"],
+            "attempt": trace["attempt"],
+            "outcome": outcome,
+            "total": round(time.perf_counter() - trace["start"], 4),
+            "phases": trace["phases"],
+        }
+        self.trace_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.trace_file.flush()
+
+    def prometheus_text(self):
+        """:return: str，Prometheus 文本格式的全部指标"""
+        lines = ["# TYPE amz_phase_seconds histogram"]
+        for phase, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'amz_phase_seconds_bucket{{phase="{phase}",le="{le}"}} {cumulative}')
+            lines.append(f'amz_phase_seconds_sum{{phase="{phase}"}} {histogram.sum:.6f}')
+            lines.append(f'amz_phase_seconds_count{{phase="{phase}"}} {histogram.count}')
+        names = sorted({name for name, _ in self.counters})
+        for name in names:
+            lines.append(f"# TYPE amz_{name} counter")
+            for (counter_name, labels), value in sorted(self.counters.items()):
+                if counter_name != name:
+                    continue
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels)
+                lines.append(f"amz_{name}{{{label_text}}} {value}" if label_text else f"amz_{name} {value}")
+        lines += [
+            "# TYPE amz_workers_busy gauge",
+            f"amz_workers_busy {self.busy_workers}",
+            "# TYPE amz_workers_total gauge",
+            f"amz_workers_total {self.total_workers}",
+            "# TYPE amz_worker_utilization gauge",
+            f"amz_worker_utilization {self.utilization():.4f}",
+            "# TYPE amz_uptime_seconds gauge",
+            f"amz_uptime_seconds {time.time() - self.started:.1f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """原子地写出 Prometheus 文本文件（可供 node_exporter textfile collector 读取）"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def log_summary(self):
+        """输出各阶段的次数、平均耗时和 p50 / p95，以及结果计数和工作协程利用率"""
+        for phase, histogram in sorted(self.histograms.items()):
+            logging.info("⏱️ 阶段 %s: %d 次，平均 %.2fs，p50 ≤ %ss，p95 ≤ %ss", phase, histogram.count,
+                         histogram.sum / histogram.count, histogram.quantile(0.5), histogram.quantile(0.95))
+        outcomes = {dict(labels).get("outcome"): value for (name, labels), value in self.counters.items()
+                    if name == "outcomes_total"}
+        logging.info("📈 结果统计 %s，工作协程 %d/%d 忙碌，利用率 %.0f%%",
+                     outcomes, self.busy_workers, self.total_workers, self.utilization() * 100)
+
+    async def _serve_http(self, reader, writer):
+        try:
+            await reader.readuntil(b"\r\n\r\n")  # 任何路径都返回全部指标
+            body = self.prometheus_text().encode("utf-8")
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii") + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def report_loop(self, interval=60, prometheus_file=None, http_port=0, http_host="127.0.0.1"):
+        """
+        定期输出摘要并写出 Prometheus 文件；http_port 非 0 时同时提供 /metrics 文本端点。
+
+        :param interval: float，输出间隔（秒）
+        :param prometheus_file: str，可选；Prometheus 文本文件路径
+        :param http_port: int，HTTP 端点端口，0 表示不开启
+        :param http_host: str，HTTP 端点监听地址
+        """
+        server = None
+        if http_port:
+            server = await asyncio.start_server(self._serve_http, http_host, http_port)
+            logging.info("📈 指标端点 http://%s:%s/metrics", http_host, http_port)
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                self.log_summary()
+                if prometheus_file:
+                    self.write_prometheus(prometheus_file)
+        finally:
+            if server is not None:
+                server.close()
+            if prometheus_file:
+                self.write_prometheus(prometheus_file)
+
+    def close(self):
+        if self.trace_file is not None:
+            self.trace_file.close()
+            self.trace_file = None
+
+# 进程内共享的指标实例，热路径直接 from metrics import METRICS 使用
+METRICS = CrawlMetrics()
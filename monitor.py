@@ -0,0 +1,199 @@
+import json
+import logging
+import sqlite3
+import sys
+import time
+from sinks import to_typed_row  # 统一转换为带类型的值后再比较，避免 "$12.99" / "$12.99 " 之类的伪变化
+
+# 默认监控的字段：价格、销量、评分、评论数和高退货率标记
+MONITORED_FIELDS = ("price", "bought", "rating", "review_count", "frequently_returned")
+
+class ChangeMonitor:
+    """
+    变化监控：为每个 ASIN 保存最近一次的监控字段值，新结果逐字段比较，
+    只把变化写入增量流（ASIN、字段、旧值、新值、时间）和按 ASIN 索引的历史表。
+    同时统计每个 ASIN 的变化频率，变化越频繁的 ASIN 越优先重新抓取。
+    """
+
+    def __init__(self, path, delta_file=None, fields=MONITORED_FIELDS):
+        """
+        :param path: str，SQLite 文件路径
+        :param delta_file: str，可选；增量流 JSONL 路径，每条变化追加一行
+        :param fields: iterable，需要监控的字段
+        """
+        self.path = path
+        self.fields = tuple(fields)
+        self.observed = 0  # 本次运行比较过的 ASIN 数
+        self.changed = 0  # 本次运行发生变化的 ASIN 数
+        self.delta_count = 0  # 本次运行写出的变化条数
+        self.delta_file = open(delta_file, "a", encoding="utf-8") if delta_file else None
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS state (
+                asin TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                observations INTEGER NOT NULL,
+                changes INTEGER NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                last_changed REAL
+            )
+            """
+        )
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS changes (
+                asin TEXT NOT NULL,
+                field TEXT NOT NULL,
+                old TEXT,
+                new TEXT,
+                ts REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_changes_asin ON changes(asin, ts)")
+        self.conn.commit()
+
+    @classmethod
+    def from_config(cls, monitor_config):
+        """
+        根据 config.json 中的 monitor 配置创建监控器。
+
+        :param monitor_config: dict，monitor 配置段
+        :return: ChangeMonitor；未启用时返回 None
+        """
+        if not monitor_config or not monitor_config.get("enabled", False):
+            return None
+        return cls(
+            monitor_config.get("path", "monitor.sqlite3"),
+            delta_file=monitor_config.get("delta_file", "changes.jsonl"),
+            fields=monitor_config.get("fields", MONITORED_FIELDS),
+        )
+
+    def observe(self, asin, product, now=None):
+        """
+        与上次的值逐字段比较并更新状态。首次出现的 ASIN 只记录基线，不产生变化。
+        本次未抓到的字段（值为 None）不视为变化，沿用旧值。
+
+        :param asin: str，商品的 ASIN
+        :param product: dict，get_product_details 的返回值
+        :param now: float，抓取时间戳，默认 time.time()
+        :return: list，本次的变化 [{"asin", "field", "old", "new", "ts"}, ...]
+        """
+        now = time.time() if now is None else now
+        typed = to_typed_row(product)
+        current = {field: typed.get(field) for field in self.fields}
+        row = self.conn.execute(
+            "SELECT data, observations, changes, first_seen, last_changed FROM state WHERE asin = ?", (asin,)
+        ).fetchone()
+        self.observed += 1
+        if row is None:
+            self.conn.execute(
+                "INSERT INTO state (asin, data, observations, changes, first_seen, last_seen, last_changed) "
+                "VALUES (?, ?, 1, 0, ?, ?, NULL)",
+                (asin, json.dumps(current), now, now)
+            )
+            self.conn.commit()
+            return []
+
+        previous = json.loads(row[0])
+        deltas = []
+        merged = dict(previous)
+        for field in self.fields:
+            new = current[field]
+            if new is None:
+                continue
+            old = previous.get(field)
+            merged[field] = new
+            if old is not None and old != new:
+                deltas.append({"asin": asin, "field": field, "old": old, "new": new, "ts": now})
+        self.conn.execute(
+            "UPDATE state SET data = ?, observations = ?, changes = ?, last_seen = ?, last_changed = ? WHERE asin = ?",
+            (json.dumps(merged), row[1] + 1, row[2] + (1 if deltas else 0), now,
+             now if deltas else row[4], asin)
+        )
+        if deltas:
+            self.conn.executemany(
+                "INSERT INTO changes (asin, field, old, new, ts) VALUES (?, ?, ?, ?, ?)",
+                [(d["asin"], d["field"], json.dumps(d["old"]), json.dumps(d["new"]), now) for d in deltas]
+            )
+            self._emit(deltas)
+        self.conn.commit()
+        return deltas
+
+    def _emit(self, deltas):
+        self.changed += 1
+        self.delta_count += len(deltas)
+        for delta in deltas:
+            logging.info("🔔 ASIN %s %s: %s -> %s", delta["asin"], delta["field"], delta["old"], delta["new"])
+            if self.delta_file is not None:
+                self.delta_file.write(json.dumps(delta, ensure_ascii=False) + "\n")
+        if self.delta_file is not None:
+            self.delta_file.flush()
+
+    def history(self, asin, field=None):
+        """
+        :param asin: str，商品的 ASIN
+        :param field: str，可选；只返回该字段的变化
+        :return: list，按时间排序的变化记录
+        """
+        sql = "SELECT field, old, new, ts FROM changes WHERE asin = ?"
+        params = [asin]
+        if field is not None:
+            sql += " AND field = ?"
+            params.append(field)
+        rows = self.conn.execute(sql + " ORDER BY ts", params).fetchall()
+        return [
+            {"asin": asin, "field": f, "old": json.loads(old), "new": json.loads(new), "ts": ts}
+            for f, old, new, ts in rows
+        ]
+
+    def volatility(self, asin):
+        """
+        变化频率：发生变化的抓取次数占比（加一平滑），从未抓取过的 ASIN 为 1.0。
+
+        :param asin: str，商品的 ASIN
+        :return: float，0~1，越大越应优先重新抓取
+        """
+        row = self.conn.execute("SELECT observations, changes FROM state WHERE asin = ?", (asin,)).fetchone()
+        if row is None:
+            return 1.0
+        observations, changes = row
+        return (changes + 1) / (observations + 1)
+
+    def prioritize(self, asins):
+        """按变化频率从高到低排序（新 ASIN 最先），同频率时保持原顺序"""
+        return sorted(asins, key=self.volatility, reverse=True)
+
+    def most_volatile(self, limit=20):
+        """返回变化最频繁的 ASIN 列表 [(asin, observations, changes, last_changed), ...]"""
+        return self.conn.execute(
+            "SELECT asin, observations, changes, last_changed FROM state "
+            "ORDER BY CAST(changes + 1 AS REAL) / (observations + 1) DESC, last_changed DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+
+    def close(self):
+        if self.delta_file is not None:
+            self.delta_file.close()
+            self.delta_file = None
+        self.conn.close()
+        logging.info("🔔 变化监控：比较 %d 个 ASIN，%d 个发生变化，共 %d 条变化",
+                     self.observed, self.changed, self.delta_count)
+
+# 程序入口：查看单个 ASIN 的历史，或列出变化最频繁的 ASIN
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("用法: python monitor.py <monitor.sqlite3> [ASIN]")
+        sys.exit(1)
+    monitor = ChangeMonitor(sys.argv[1])
+    if len(sys.argv) > 2:
+        for change in monitor.history(sys.argv[2]):
+            ts = time.strftime("%Y-%m-%d %H:%M", time.localtime(change["ts"]))
+            print(f"{ts}  {change['field']}: {change['old']} -> {change['new']}")
+    else:
+        for asin, observations, changes, last_changed in monitor.most_volatile():
+            print(f"{asin}  抓取 {observations} 次，变化 {changes} 次")
+    monitor.conn.close()
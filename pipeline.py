@@ -0,0 +1,531 @@
+import asyncio
+import csv
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime
+from search import iter_search_products  # 导入搜索模块，逐页获取 ASIN
+from scraper import ScrapeError, scrape_product  # 导入抓取模块，获取商品详情
+from fields import CARD_FIELDS, FIELDS, resolve_fields  # 按运行配置启用字段
+from retry_policy import RetryPolicy  # 失败分类与重试退避
+from fetcher import fetch_product_details  # 原始 HTTP 抓取快速路径
+from sinks import open_sinks  # 流式结果写入
+from metrics import METRICS  # 排队等待、重试延迟、结果计数和工作协程利用率
+from cache import FIELD_GROUPS  # 只部分启用字段时，缓存只更新完整覆盖的分组
+from seenset import ResultStore, SeenSet, open_spill  # 去重集合与结果表，可溢写到磁盘
+from log_setup import log_context  # 日志附带 ASIN、搜索词和阶段字段
+
+# 详情页拦截的资源类型，优化加载速度
+BLOCKED_RESOURCES = "**/*.{png,jpg,jpeg,gif,svg,webp,css,woff,woff2,js,mp4,webm}"
+
+async def scrape_asin(asin, page_pool, extract_mode="evaluate", http_fetcher=None, cache=None, controller=None,
+                      shared_fields=None, fields=None, archive=None, refresh_groups=()):
+    """
+    抓取单个 ASIN：依次尝试缓存、HTTP 快速路径和浏览器渲染。
+
+    :param asin: str，商品的 ASIN
+    :param page_pool: ContextPool，详情页面池，浏览器渲染时从中租用长寿页面
+    :param extract_mode: str，详情页抽取模式
+    :param http_fetcher: HttpFetcher，可选；提供时先走 HTTP 快速路径，解析失败再用浏览器兜底
+    :param cache: AsinCache，可选；相关分组都未过期时直接复用缓存，否则只抓取过期分组的字段并与缓存合并
+    :param controller: RateController，可选；网络请求需先占用控制器的并发名额
+    :param shared_fields: dict，可选；同一变体家族已抓取到的共享字段，提供时浏览器抽取跳过这些字段
+    :param fields: tuple，可选；本次运行启用的字段，None 表示全部字段
+    :param archive: PageArchive，可选；提供时存档抓取到的详情页
+    :param refresh_groups: iterable，无论是否过期都重新抓取的缓存分组（常驻模式按调度刷新的 ASIN）
+    :return: (dict, bool)，商品详情，以及是否完全来自缓存（未访问网络）
+    :raises ScrapeError: 本次尝试失败；所用页面会被页面池回收，下次尝试使用新页面
+    """
+    cached, fresh_fields, fetch_fields = None, (), fields
+    if cache is not None:
+        enabled = set(fields or FIELDS)
+        # 只检查含有启用字段的分组，其余分组过期不影响本次结果
+        groups = [group for group, names in FIELD_GROUPS.items() if enabled.intersection(names)]
+        cached, stale = cache.lookup(asin, groups=groups)
+        stale |= set(refresh_groups).intersection(groups)
+        if cached is not None and not stale:  # 相关分组都未过期，跳过抓取
+            logging.info("💾 ASIN %s 命中缓存，跳过抓取", asin)
+            METRICS.inc("cache_hits_total")
+            return cached, True
+        if cached is not None:  # 部分分组过期：只抓取过期分组（及不进缓存）的字段，未过期的分组沿用缓存
+            fresh_fields = {name for group in groups if group not in stale for name in FIELD_GROUPS[group]}
+            fetch_fields = tuple(name for name in resolve_fields(fields) if name not in fresh_fields)
+            logging.info("💾 ASIN %s 缓存分组 %s 已过期，只抓取 %d 个字段", asin, sorted(stale), len(fetch_fields))
+            METRICS.inc("cache_partial_total")
+    product_data = None
+    async with controller.slot() if controller is not None else nullcontext():
+        if http_fetcher is not None:  # 快速路径：HTTP 请求 + 离线解析
+            with METRICS.phase("http_fetch"):
+                product_data = await fetch_product_details(asin, http_fetcher, controller, fetch_fields, archive)
+        if product_data is None:  # 浏览器渲染（默认路径或快速路径的兜底）
+            async with page_pool.lease() as page:  # 资源拦截规则已在上下文级别安装
+                product_data = await scrape_product(
+                    asin, page, extract_mode, controller, skip_family=shared_fields is not None, fields=fetch_fields,
+                    archive=archive
+                )  # 抓取商品详情
+    for name in fresh_fields:  # 合并缓存中未过期分组的字段
+        if name in cached and product_data.get(name) is None:
+            product_data[name] = cached[name]
+    if shared_fields:  # 补齐家族共享字段（HTTP 快速路径已自带，以家族记录为准保持一致）
+        product_data.update(shared_fields)
+    if cache is not None:
+        groups = None
+        if fetch_fields is not None:  # 部分字段的结果只刷新全部字段都已抓取的分组，其余分组保留旧值
+            covered = set(fetch_fields) | set(shared_fields or ())
+            groups = [group for group, names in FIELD_GROUPS.items()
+                      if all(name in covered or name not in FIELDS for name in names)]
+        cache.store(asin, product_data, groups)  # 写入缓存，刷新所覆盖分组的时间
+    return product_data, False
+
+class QueryState:
+    """单个搜索词在流水线中的状态：输出路径、命中的 ASIN 和结果写入器"""
+
+    def __init__(self, query, csv_dir, csv_file_base, output_file_base, output_formats=("csv",), seen=None):
+        timestamp = datetime.now().strftime("%Y%m%d%H%M")  # 生成时间戳，如 202503011430
+        self.query = query
+        self.csv_file_path = os.path.join(csv_dir, f"{query}_{timestamp}_{csv_file_base}")
+        self.output_file_path = os.path.join(csv_dir, f"{query}_{timestamp}_{output_file_base}")
+        self.output_formats = output_formats
+        self.asins = seen if seen is not None else set()  # 该搜索词找到的全部 ASIN（去重）
+        self.sink = None  # 结果写入器，第一次路由结果时创建
+        self.success_count = 0  # 成功抓取并写出的数量
+        self.failed_asins = set()  # 失败的 ASIN
+
+    def write(self, product_data):
+        """抓取完成即写出一行，不在内存中累积结果"""
+        if self.sink is None:  # 输出路径在恢复模式下可能被替换，因此延迟创建
+            self.sink = open_sinks(self.output_file_path, self.output_formats)
+        self.sink.write(product_data)
+        self.success_count += 1
+
+    def close(self):
+        if self.sink is not None:
+            self.sink.close()
+
+class CrawlPipeline:
+    """
+    多搜索词流水线：
+    - 所有搜索词并发搜索（受 search_concurrency 限制）；
+    - 每解析完一页，ASIN 立即进入共享的去重队列；
+    - 单个大小为 max_workers 的工作池跨搜索词消费队列；
+    - 结果按 ASIN -> 搜索词的路由表写回各自的 CSV；
+    - 启用变体扩展时，抓取完成的 ASIN 的变体按广度优先加入同一队列，并路由到父 ASIN 的搜索词。
+    """
+
+    def __init__(self, pool, max_workers, max_pages, csv_dir, csv_file_base, output_file_base,
+                 search_concurrency=3, extract_mode="evaluate", http_fetcher=None, cache=None, controller=None,
+                 journal=None, output_formats=("csv",), retry_policy=None, variants=None, monitor=None, fields=None,
+                 max_queue=0, spill_path=None, expected_asins=100000, search_mode="asins", archive=None,
+                 refresh_groups=()):
+        """
+        :param pool: BrowserPool，已启动的共享浏览器页面池（search / detail）
+        :param controller: RateController，可选；全局并发与速率控制，max_workers 为窗口上限
+        :param journal: CrawlJournal，可选；已打开的抓取日志，记录进度；恢复模式下从中重建队列
+        :param output_formats: iterable，结果输出格式（csv / parquet），每完成一个 ASIN 立即写出
+        :param retry_policy: RetryPolicy，可选；失败的 ASIN 按策略延后重新排队，默认 RetryPolicy()
+        :param variants: VariantExpander，可选；提供时沿变体图扩展抓取，同家族共享字段只抓一次
+        :param monitor: ChangeMonitor，可选；提供时与上次结果比较并写出变化，变化频繁的 ASIN 优先入队
+        :param fields: iterable，可选；只抽取这些字段（如价格监控只需要 price），None 表示全部字段
+        :param max_queue: int，队列中待抓取 ASIN 的上限，所有入队方都受此限制：队列满时新 ASIN 先进入溢出区，
+                          工作协程取走任务后依次补入；队列加溢出区达到上限时搜索和批量入队暂停。0 表示不限
+        :param spill_path: str，可选；提供时去重集合和已完成结果溢写到该 SQLite 临时库，内存中只保留布隆过滤器
+        :param expected_asins: int，预计的 ASIN 数量，用于确定布隆过滤器大小
+        :param search_mode: str，search.SEARCH_MODES 之一；cards 时 CARD_FIELDS 直接取自搜索卡片，
+                            启用的字段都能由卡片提供时不再访问详情页
+        :param archive: PageArchive，可选；提供时存档抓取到的搜索页和详情页，供离线重新抽取
+        :param refresh_groups: iterable，直接入队（seeds）的 ASIN 无论缓存是否过期都重新抓取的分组，
+                               常驻模式用于按调度刷新的 ASIN，避免到期刷新只命中缓存
+        """
+        self.pool = pool
+        self.max_workers = max_workers
+        self.max_pages = max_pages
+        self.csv_dir = csv_dir
+        self.csv_file_base = csv_file_base
+        self.output_file_base = output_file_base
+        self.search_concurrency = search_concurrency
+        self.extract_mode = extract_mode
+        self.http_fetcher = http_fetcher
+        self.cache = cache
+        self.controller = controller
+        self.journal = journal
+        self.output_formats = tuple(output_formats)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.variants = variants
+        self.monitor = monitor
+        self.fields = resolve_fields(fields) if fields else None
+        self.search_mode = search_mode
+        self.archive = archive
+        self.refresh_groups = tuple(refresh_groups)
+        self.seed_names = set()  # 直接入队的名称，其 ASIN 按 refresh_groups 强制刷新
+        enabled = self.fields or tuple(FIELDS)
+        self.card_fields = tuple(name for name in enabled if name in CARD_FIELDS)  # 从卡片取值的字段
+        self.detail_fields = tuple(name for name in enabled if name not in CARD_FIELDS)  # 仍需详情页的字段
+        self.cards = {}  # ASIN -> 搜索卡片记录，ASIN 完成时移除，数量受队列长度限制
+        self.queue = asyncio.Queue()  # 元素为 (asin, 第几次尝试)；长度不超过 max_queue，由 _put 控制
+        self.max_queue = max_queue
+        # 队列满时到达的任务按到达顺序暂存于此。变体扩展和重试来自工作协程和定时器，不能等待，
+        # 其数量受 variants.max_total 和失败的 ASIN 数限制
+        self.overflow = deque()
+        self._room = asyncio.Event()  # 队列加溢出区未满，搜索和批量入队可以继续
+        self._room.set()
+        self.expected_asins = expected_asins
+        self.spill_path = spill_path
+        self.spill = open_spill(spill_path) if spill_path else None
+        self.pending = 0  # 已入队但尚未最终完成的 ASIN 数（包括等待重试的）
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._retry_timers = {}  # ASIN -> 等待重试的定时器，关闭时统一取消
+        self.queries = {}  # 搜索词 -> QueryState
+        self.routes = {}  # ASIN -> 请求了该 ASIN 的搜索词集合
+        self.done = ResultStore(self.spill, expected_asins)  # 已完成的 ASIN -> 结果（失败为 None），供后到的搜索词直接复用
+
+    def enqueue(self, query, asins, record=True):
+        """
+        将某个搜索词的一批 ASIN 加入共享队列，已入队或已完成的 ASIN 只登记路由不重复抓取。
+
+        :param query: str，搜索词
+        :param asins: list，ASIN 列表
+        :param record: bool，是否写入抓取日志（从日志恢复时为 False）
+        """
+        state = self.queries[query]
+        new_count = 0
+        added = []
+        if self.monitor is not None:  # 变化频繁（或从未抓取过）的 ASIN 先抓
+            asins = self.monitor.prioritize(asins)
+        for asin in asins:
+            if not asin or asin in state.asins:
+                continue
+            state.asins.add(asin)
+            added.append(asin)
+            if asin in self.done:  # 其他搜索词已经抓取过，直接路由结果
+                self._route_one(state, asin, self.done[asin])
+                continue
+            if asin not in self.routes:
+                if self.variants is not None:
+                    self.variants.set_root(asin)
+                self.routes[asin] = set()
+                self.pending += 1
+                self._drained.clear()
+                self._put((asin, 1))
+                new_count += 1
+            self.routes[asin].add(query)
+        if record and self.journal is not None:
+            self.journal.record_enqueue(query, added)
+        logging.info("📥 '%s' 新增 %d 个待抓取 ASIN，队列长度 %d", query, new_count, self.backlog())
+
+    def backlog(self):
+        """:return: int，等待工作协程领取的任务数（队列加溢出区）"""
+        return self.queue.qsize() + len(self.overflow)
+
+    def _put(self, item):
+        """所有入队方的唯一入口：队列未满且溢出区为空时直接入队，否则进入溢出区，保持先到先抓"""
+        if self.max_queue and (self.overflow or self.queue.qsize() >= self.max_queue):
+            self.overflow.append(item)
+        else:
+            self.queue.put_nowait(item)
+        if self.max_queue and self.backlog() >= self.max_queue:
+            self._room.clear()
+
+    def _refill(self):
+        """工作协程取走任务后，从溢出区补入队列；积压降到上限以下时放行搜索和批量入队"""
+        if not self.max_queue:
+            return
+        while self.overflow and self.queue.qsize() < self.max_queue:
+            self.queue.put_nowait(self.overflow.popleft())
+        if self.backlog() < self.max_queue:
+            self._room.set()
+
+    async def _wait_for_room(self):
+        """队列加溢出区达到 max_queue 时等待工作协程取走任务（工作协程和重试定时器从不等待，避免互相等待）"""
+        if not self._room.is_set():
+            with METRICS.phase("backpressure_wait"):
+                await self._room.wait()
+
+    def _route_one(self, state, asin, product_data):
+        if product_data:
+            state.write(product_data)
+        else:
+            state.failed_asins.add(asin)
+
+    def _route(self, asin, product_data, from_cache=False):
+        """
+        将 ASIN 的抓取结果分发给所有请求过它的搜索词
+
+        :param from_cache: bool，结果是否完全来自缓存；缓存命中不是新的观测，不交给变化监控（否则会稀释变化频率）
+        """
+        self.done[asin] = product_data
+        self.cards.pop(asin, None)
+        if self.journal is not None:  # 每完成一个 ASIN 立即落盘
+            self.journal.record_result(asin, product_data)
+        if self.monitor is not None and product_data and not from_cache:
+            self.monitor.observe(asin, product_data)
+        if self.controller is not None and len(self.done) % 50 == 0:  # 定期输出控制器状态
+            self.controller.log_state()
+        for query in self.routes.pop(asin, ()):
+            self._route_one(self.queries[query], asin, product_data)
+        self.pending -= 1
+        if self.pending == 0:
+            self._drained.set()
+
+    def _expand(self, asin, product_data):
+        """将变体 ASIN 加入队列，路由到请求了父 ASIN 的所有搜索词"""
+        new_asins = self.variants.expand(asin, product_data)
+        if not new_asins:
+            return
+        for query in sorted(self.routes.get(asin, ())):
+            self.enqueue(query, new_asins)
+
+    def _schedule_retry(self, asin, attempt, kind):
+        """失败的 ASIN 在 not-before 时间之后重新排队，工作协程立即去处理其他 ASIN"""
+        delay = self.retry_policy.delay(attempt)
+        METRICS.observe("retry_delay", delay)
+        not_before = datetime.now().timestamp() + delay
+        logging.warning("⚠️ ASIN %s 第 %s 次尝试失败（%s），%s 后重新排队",
+                        asin, attempt, kind, datetime.fromtimestamp(not_before).strftime("%H:%M:%S"))
+        loop = asyncio.get_running_loop()
+        self._retry_timers[asin] = loop.call_later(delay, self._requeue, asin, attempt + 1)
+
+    def _requeue(self, asin, attempt):
+        self._retry_timers.pop(asin, None)
+        self._put((asin, attempt))
+
+    async def _search(self, query, semaphore):
+        """单个搜索词的搜索任务，边翻页边把 ASIN 送入队列"""
+        with log_context(query=query, phase="search"):
+            state = self.queries[query]
+            found = 0
+            asin_file = None  # ASIN 列表边搜索边写出，不在内存中累积
+            async with semaphore:
+                logging.info("=== 开始处理搜索词: %s ===", query)
+                try:
+                    cards = self.search_mode == "cards"
+                    disabled_card_fields = [name for name in CARD_FIELDS if name not in self.card_fields]
+                    async for page_items in iter_search_products(
+                        query, self.max_pages, self.pool.search, self.controller, cards, self.archive
+                    ):
+                        page_asins = page_items
+                        if cards:
+                            page_asins = [card["asin"] for card in page_items]
+                            for card in page_items:  # 只为新入队的 ASIN 保存卡片，已完成或已排队的不重复保存
+                                if card["asin"] not in self.routes and card["asin"] not in self.done:
+                                    # 未启用的字段与详情页抓取一致，置为 None
+                                    self.cards[card["asin"]] = dict(card, **dict.fromkeys(disabled_card_fields))
+                        if asin_file is None and page_asins:
+                            asin_file = open(state.csv_file_path, "w", newline="", encoding="utf-8")
+                            writer = csv.writer(asin_file)
+                            writer.writerow(["ASIN"])  # 写入表头
+                        if page_asins:
+                            writer.writerows([asin] for asin in page_asins)
+                        found += len(page_asins)
+                        self.enqueue(query, page_asins)  # 边翻页边喂给工作池
+                        await self._wait_for_room()  # 队列已满时暂停翻页
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logging.error("❌ 搜索 '%s' 失败: %s", query, e)
+                finally:
+                    if asin_file is not None:
+                        asin_file.close()
+            if self.journal is not None:
+                self.journal.record_search_done(query)
+            if not found:  # 如果没有找到 ASIN，跳过
+                logging.warning("❌ 没有找到 ASIN for '%s'，跳过！", query)
+                return
+            logging.info("✅ ASIN 列表已保存到 %s", state.csv_file_path)
+
+    async def _feed(self, name, asins, chunk_size=500):
+        """
+        直接入队的 ASIN（不经过搜索）分批送入队列，队列已满时等待。
+
+        :param name: str，输出名称
+        :param asins: iterable，ASIN 列表或迭代器（如 asin_input.iter_asins），在线程中逐批读取，不阻塞事件循环
+        :param chunk_size: int，每批读取的 ASIN 数
+        """
+        iterator = iter(asins)
+        total = 0
+        while True:
+            chunk = await asyncio.to_thread(lambda: list(itertools.islice(iterator, chunk_size)))
+            if not chunk:
+                break
+            total += len(chunk)
+            self.enqueue(name, chunk)  # 已入队或已完成的 ASIN 只登记，不重复抓取
+            await self._wait_for_room()
+        if self.journal is not None:
+            self.journal.record_search_done(name)
+        logging.info("📥 '%s' 共读取 %d 个 ASIN", name, total)
+
+    async def worker(self):
+        """工作协程：从共享队列中获取 ASIN 抓取，收到 None 时退出"""
+        METRICS.total_workers += 1
+        while True:
+            wait_start = time.perf_counter()
+            item = await self.queue.get()
+            busy_start = time.perf_counter()
+            METRICS.observe("queue_wait", busy_start - wait_start)
+            asin = None
+            try:
+                if item is None:  # 所有搜索已结束且所有 ASIN 都已最终完成
+                    METRICS.total_workers -= 1
+                    return
+                asin, attempt = item
+                self._refill()
+                with log_context(asin=asin, query=",".join(sorted(self.routes.get(asin, ()))) or None,
+                                 phase="detail"):
+                    logging.info("🛒 任务队列领取 ASIN: %s（第 %d 次尝试）", asin, attempt)  # 显示当前处理的 ASIN
+                    shared_fields = self.variants.shared_fields(asin) if self.variants is not None else None
+                    METRICS.worker_busy(True)
+                    METRICS.start_trace(asin, attempt)
+                    card = self.cards.get(asin)
+                    scheduled = not self.seed_names.isdisjoint(self.routes.get(asin, ()))  # 直接入队的 ASIN
+                    refresh_groups = self.refresh_groups if scheduled else ()
+                    from_cache = False
+                    try:
+                        if card is not None and not self.detail_fields:  # 卡片已提供全部启用字段，不访问详情页
+                            product_data = card
+                            METRICS.inc("card_only_total")
+                        else:
+                            product_data, from_cache = await scrape_asin(
+                                asin, self.pool.detail, self.extract_mode, self.http_fetcher, self.cache, self.controller,
+                                shared_fields, self.detail_fields if card is not None else self.fields, self.archive,
+                                refresh_groups
+                            )
+                            if card is not None:  # 详情页只抓卡片没有的字段，其余取卡片上的值
+                                product_data = dict(product_data, **{name: card[name] for name in self.card_fields})
+                        METRICS.inc("outcomes_total", outcome="success")
+                        METRICS.finish_trace("success")
+                    except Exception as e:  # 单个 ASIN 的错误不影响整个工作池
+                        kind = e.kind if isinstance(e, ScrapeError) else "error"
+                        METRICS.inc("outcomes_total", outcome=kind)
+                        METRICS.finish_trace(kind)
+                        if self.retry_policy.should_retry(kind, attempt):
+                            METRICS.inc("retries_total", kind=kind)
+                            self._schedule_retry(asin, attempt, kind)
+                            continue
+                        logging.error("🚨 ASIN %s 放弃爬取（%s，已尝试 %d 次），错误: %s", asin, kind, attempt, e)
+                        product_data = None
+                    finally:
+                        METRICS.worker_busy(False)
+                    if product_data and self.variants is not None:
+                        self._expand(asin, product_data)  # 先入队变体再完成当前 ASIN，避免队列提前排空
+                    self._route(asin, product_data, from_cache)
+            except asyncio.CancelledError:
+                logging.warning("⚠️ 任务处理 ASIN %s 被取消", asin)
+                METRICS.total_workers -= 1
+                raise
+            finally:
+                self.queue.task_done()
+                METRICS.worker_time(time.perf_counter() - busy_start, busy_start - wait_start)
+
+    async def run(self, queries, task_list=None, seeds=None):
+        """
+        运行流水线直到所有搜索词的 ASIN 都处理完毕，并写出各自的结果 CSV。
+
+        :param queries: list，搜索词列表
+        :param task_list: list，可选；登记创建的任务，便于中断时由调用方取消
+        :param seeds: dict，可选；名称 -> ASIN 列表或迭代器，流式入队抓取、不经过搜索，结果按名称单独输出
+        """
+        resume_state = self.journal.state if self.journal is not None else None
+        if resume_state is not None:
+            if resume_state.finished:
+                logging.info("📒 抓取日志显示上次运行已完成，无需恢复")
+                return
+            queries = list(resume_state.queries) or queries  # 恢复上次运行的搜索词
+            # 直接入队的 ASIN 重新读取一遍，日志中已入队或已完成的 ASIN 会被去重跳过
+        seeds = seeds or {}
+        self.seed_names = set(seeds)
+        for index, query in enumerate(list(queries) + [name for name in seeds if name not in queries]):
+            seen = SeenSet(self.spill, f"query_{index}", self.expected_asins) if self.spill is not None else None
+            self.queries[query] = QueryState(
+                query, self.csv_dir, self.csv_file_base, self.output_file_base, self.output_formats, seen
+            )
+        to_search = [query for query in self.queries if query not in seeds]
+        if resume_state is not None:
+            to_search = self._restore(resume_state, seeds)
+        elif self.journal is not None:
+            for state in self.queries.values():
+                source = "input" if state.query in seeds else "search"
+                self.journal.record_query(state.query, state.csv_file_path, state.output_file_path, source)
+        semaphore = asyncio.Semaphore(self.search_concurrency)
+        search_tasks = [asyncio.create_task(self._search(query, semaphore)) for query in to_search]
+        search_tasks += [asyncio.create_task(self._feed(name, asins)) for name, asins in seeds.items()]
+        worker_tasks = [asyncio.create_task(self.worker()) for _ in range(self.max_workers)]
+        if task_list is not None:
+            task_list.extend(search_tasks + worker_tasks)  # 将任务添加到全局任务列表以便中断时取消
+
+        try:
+            await asyncio.gather(*search_tasks)
+            await self._drained.wait()  # 等待所有 ASIN（包括延后重试的）最终完成
+            # 为每个工作协程放入一个结束标记，依次退出
+            for _ in worker_tasks:
+                await self.queue.put(None)
+            await asyncio.gather(*worker_tasks)
+        except asyncio.CancelledError:
+            logging.warning("⚠️ 流水线任务被取消")
+            for task in search_tasks + worker_tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*search_tasks, *worker_tasks, return_exceptions=True)
+            raise
+        finally:
+            for timer in self._retry_timers.values():
+                timer.cancel()
+            for state in self.queries.values():  # 已写出的行在中断时也完整保留
+                state.close()
+
+        for state in self.queries.values():
+            self._report_query(state)
+        if self.journal is not None:
+            self.journal.record_run_done()
+        if self.controller is not None:
+            self.controller.log_state()
+
+    def close(self):
+        """关闭并删除溢写用的临时库（run 结束后 done 仍可读取，用完再关闭）"""
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+            for suffix in ("", "-journal"):
+                if os.path.exists(self.spill_path + suffix):
+                    os.remove(self.spill_path + suffix)
+
+    def _restore(self, resume_state, seeds):
+        """
+        按抓取日志恢复进度：沿用上次的输出路径，已完成的 ASIN 直接路由结果，只把未完成的重新入队。
+        直接输入的 ASIN 列表从不拿去搜索：未读完的输入必须由调用方重新提供（seeds），否则拒绝恢复。
+
+        :param resume_state: JournalState，上次运行的进度
+        :param seeds: dict，本次直接入队的 ASIN 列表（名称 -> ASIN 列表或迭代器）
+        :return: list，搜索尚未完成、需要重新搜索的搜索词
+        """
+        unfinished = [query for query, saved in resume_state.queries.items()
+                      if saved["source"] == "input" and not saved["search_done"] and query not in seeds]
+        if unfinished:
+            raise RuntimeError(f"上次运行的 ASIN 列表 {unfinished} 尚未读完，请用 `cli.py scrape <ASIN_FILE> --resume` "
+                               f"重新提供同一输入文件后再恢复")
+        self.done.update(resume_state.results)
+        to_search = []
+        for query, saved in resume_state.queries.items():
+            state = self.queries[query]
+            state.csv_file_path = saved["csv_file_path"]
+            state.output_file_path = saved["output_file_path"]
+            self.enqueue(query, saved["asins"], record=False)
+            if saved["source"] == "search" and not saved["search_done"] and query not in seeds:
+                to_search.append(query)
+        logging.info("📒 已恢复 %d 个已完成 ASIN，重新排队 %d 个，重新搜索 %d 个搜索词",
+                     len(self.done), self.backlog(), len(to_search))
+        return to_search
+
+    def _report_query(self, state):
+        """输出单个搜索词的统计信息"""
+        if not state.success_count:
+            logging.warning("❌ 没有爬取到数据 for '%s'", state.query)
+            return
+        total_asins = len(state.asins)
+        successful_asins = state.success_count
+        failed_count = total_asins - successful_asins
+        saved_to = ", ".join(state.sink.paths) or "（监控模式，仅输出变化）"
+        logging.info("🎉 '%s' 商品信息已保存到 `%s`！共爬取 %d 个 ASIN，成功 %d 个，失败 %d 个，失败的 ASIN: %s",
+                     state.query, saved_to, total_asins, successful_asins, failed_count, list(state.failed_asins))
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from metrics import METRICS  # 记录节奏等待和全局退避的耗时
+
+# 抓取结果分类：success 成功；captcha 验证码；blocked 503/429 等限流；non_detail 非详情页；error 其他错误
+OUTCOMES = ("success", "captcha", "blocked", "non_detail", "error")
+
+class RateController:
+    """
+    AIMD 风格的全局并发与速率控制器，替代固定的 MAX_WORKERS 和随机 sleep。
+    - 并发窗口 window：同时进行的请求数上限；
+    - 速率 rate：每秒允许开始的请求数，请求按 1/rate 的间隔（带抖动）错开；
+    - 成功且延迟健康时加性增大窗口和速率，遇到验证码、503 或非详情页时乘性减小，
+      并让所有协程一起暂停 backoff 秒，而不是只有触发的那一个协程在等。
+    """
+
+    def __init__(self, initial_window=4, min_window=1, max_window=10, initial_rate=1.0, min_rate=0.2,
+                 max_rate=10.0, target_latency=8.0, min_success_rate=0.8, decrease=0.5,
+                 captcha_backoff=60, blocked_backoff=30, non_detail_backoff=5, history=100):
+        """
+        :param initial_window: int，初始并发窗口
+        :param min_window: int，最小并发窗口
+        :param max_window: int，最大并发窗口（工作协程数量）
+        :param initial_rate: float，初始速率（请求/秒）
+        :param min_rate: float，最小速率
+        :param max_rate: float，最大速率
+        :param target_latency: float，健康的单次抓取耗时上限（秒），超过视为拥塞
+        :param min_success_rate: float，近期成功率低于该值时停止增长
+        :param decrease: float，乘性减小系数
+        :param captcha_backoff: float，遇到验证码时全局暂停的秒数
+        :param blocked_backoff: float，遇到 503/429 时全局暂停的秒数
+        :param non_detail_backoff: float，遇到非详情页时全局暂停的秒数
+        :param history: int，统计成功率和延迟的滑动窗口大小
+        """
+        self.min_window = min_window
+        self.max_window = max_window
+        self.window = float(min(max(initial_window, min_window), max_window))
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = float(min(max(initial_rate, min_rate), max_rate))
+        self.target_latency = target_latency
+        self.min_success_rate = min_success_rate
+        self.decrease = decrease
+        self.backoffs = {
+            "captcha": captcha_backoff,
+            "blocked": blocked_backoff,
+            "non_detail": non_detail_backoff,
+        }
+        self.inflight = 0
+        self.backoff_until = 0.0
+        self._next_start = 0.0
+        self._last_decrease = 0.0
+        self._slot_freed = asyncio.Event()
+        self.latencies = deque(maxlen=history)
+        self.outcomes = deque(maxlen=history)
+        self.counts = {outcome: 0 for outcome in OUTCOMES}
+
+    @classmethod
+    def from_config(cls, rate_config, max_workers):
+        """
+        根据 config.json 中的 rate 配置创建控制器。
+
+        :param rate_config: dict，rate 配置段
+        :param max_workers: int，max_processes，作为默认的最大并发窗口
+        :return: RateController；未启用时返回 None（沿用固定并发和随机延迟）
+        """
+        if not rate_config or not rate_config.get("enabled", False):
+            return None
+        options = {key: value for key, value in rate_config.items() if key != "enabled"}
+        options.setdefault("max_window", max_workers)
+        return cls(**options)
+
+    async def wait_backoff(self):
+        """等待全局退避结束"""
+        while True:
+            remaining = self.backoff_until - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(remaining)
+
+    async def pace(self):
+        """按当前速率错开请求开始时间（带抖动），并遵守全局退避"""
+        with METRICS.phase("pace"):
+            await self.wait_backoff()
+            now = time.monotonic()
+            interval = 1.0 / self.rate
+            start = max(now, self._next_start)
+            self._next_start = start + interval
+            await asyncio.sleep(start - now + random.uniform(0, interval / 2))
+            await self.wait_backoff()  # 等待期间可能又触发了退避
+
+    async def acquire(self):
+        """占用一个并发窗口名额，再按速率等待开始"""
+        with METRICS.phase("window_wait"):
+            while self.inflight >= int(self.window):
+                self._slot_freed.clear()
+                await self._slot_freed.wait()
+        self.inflight += 1
+        try:
+            await self.pace()
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self):
+        """释放并发窗口名额"""
+        self.inflight -= 1
+        self._slot_freed.set()
+
+    @asynccontextmanager
+    async def slot(self):
+        """以上下文管理器形式占用名额：async with controller.slot(): ..."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def success_rate(self):
+        if not self.outcomes:
+            return 1.0
+        return sum(1 for outcome in self.outcomes if outcome == "success") / len(self.outcomes)
+
+    def record(self, outcome, latency=None):
+        """
+        记录一次抓取结果并调整窗口和速率。
+
+        :param outcome: str，OUTCOMES 之一
+        :param latency: float，本次抓取耗时（秒），仅 success 需要
+        """
+        self.counts[outcome] += 1
+        self.outcomes.append(outcome)
+        now = time.monotonic()
+        if outcome == "success":
+            if latency is not None:
+                self.latencies.append(latency)
+            if latency is not None and latency > self.target_latency:
+                self._multiplicative_decrease(now, f"耗时 {latency:.1f}s 超过目标 {self.target_latency}s")
+            elif self.success_rate() >= self.min_success_rate:
+                # 加性增大：每完成约一个窗口的成功请求，窗口 +1
+                self.window = min(self.max_window, self.window + 1.0 / self.window)
+                self.rate = min(self.max_rate, self.rate + 1.0 / max(self.rate, 1.0) * 0.1)
+                self._slot_freed.set()
+            return
+        if outcome in self.backoffs:
+            self.backoff_until = max(self.backoff_until, now + self.backoffs[outcome])
+            self._multiplicative_decrease(now, f"遇到 {outcome}，全局暂停 {self.backoffs[outcome]}s", force=True)
+
+    def _multiplicative_decrease(self, now, reason, force=False):
+        # 同一拥塞事件只减小一次，冷却时间为一个目标延迟
+        if not force and now - self._last_decrease < self.target_latency:
+            return
+        self._last_decrease = now
+        self.window = max(self.min_window, self.window * self.decrease)
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        logging.warning("🐢 速率控制器退避（%s）：窗口 %.1f，速率 %.2f/s", reason, self.window, self.rate)
+
+    def snapshot(self):
+        """返回控制器当前状态"""
+        import statistics  # 连带加载 fractions / decimal，只在输出状态时导入
+        return {
+            "window": round(self.window, 2),
+            "rate": round(self.rate, 3),
+            "inflight": self.inflight,
+            "backoff_remaining": max(0.0, round(self.backoff_until - time.monotonic(), 1)),
+            "success_rate": round(self.success_rate(), 3),
+            "p50_latency": round(statistics.median(self.latencies), 2) if self.latencies else None,
+            "counts": dict(self.counts),
+        }
+
+    def log_state(self):
+        state = self.snapshot()
+        logging.info(
+            "🚦 速率控制器：窗口 %s，速率 %s/s，进行中 %s，成功率 %.0f%%，p50 耗时 %ss，结果统计 %s",
+            state["window"], state["rate"], state["inflight"], state["success_rate"] * 100, state["p50_latency"],
+            state["counts"]
+        )
@@ -0,0 +1,96 @@
+import sys
+from fields import FIELDS  # 带类型的字段转换
+from urls import product_url
+
+def _render_price(value):
+    return "Price not found" if value is None else f"${value:.2f}"
+
+def _render_bought(value):
+    if value is None:
+        return None
+    if value == 0:
+        return "< 50"
+    return f"{value // 1000}K+" if value >= 1000 and value % 1000 == 0 else f"{value}+"
+
+def _render_number(missing):
+    return lambda value: missing if value is None else str(value)
+
+# 数值字段：内存中只保存带类型的值，输出时还原为 get_product_details 的字符串形式
+RENDERERS = {
+    "price": _render_price,
+    "bought": _render_bought,
+    "rating": _render_number("Rating not found"),
+    "review_count": _render_number("Review count not found"),
+}
+
+# 大量商品共用的短字符串（品牌、面料、负面反馈词、变体 ASIN），驻留后只保存一份
+INTERNED_FIELDS = ("brand", "brand_link", "fabric_type")
+INTERNED_LIST_FIELDS = ("variants", "negative_aspects")
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+class ProductRecord:
+    """
+    紧凑的商品结果：__slots__ 存储、数值字段为 float / int、重复出现的字符串驻留、列表为元组。
+    to_product() 还原为与 get_product_details 完全一致的 dict；无法由带类型的值还原的原始字符串
+    （如 '1.5K+'、未启用字段的 None）单独保存在 overrides 中，通常为 None。
+    """
+
+    __slots__ = ("asin",) + tuple(FIELDS) + ("overrides",)
+
+    @classmethod
+    def from_product(cls, product):
+        """
+        :param product: dict，get_product_details 的返回值
+        :return: ProductRecord
+        """
+        record = cls.__new__(cls)
+        record.asin = product["asin"]
+        overrides = {}
+        if product.get("url") != product_url(record.asin):
+            overrides["url"] = product.get("url")
+        for name, field in FIELDS.items():
+            value = product.get(name)
+            if name in RENDERERS:
+                stored = field.typed(value) if value is not None else None
+                if RENDERERS[name](stored) != value:
+                    overrides[name] = value
+            elif name in INTERNED_LIST_FIELDS:
+                stored = tuple(_intern(item) for item in value) if value is not None else None
+            elif name in INTERNED_FIELDS:
+                stored = _intern(value)
+            else:
+                stored = value
+            setattr(record, name, stored)
+        record.overrides = overrides or None
+        return record
+
+    def to_product(self):
+        """:return: dict，与 get_product_details 的返回值结构和取值一致"""
+        product = {"asin": self.asin, "url": product_url(self.asin)}
+        for name in FIELDS:
+            value = getattr(self, name)
+            if name in RENDERERS:
+                value = RENDERERS[name](value)
+            elif name in INTERNED_LIST_FIELDS and value is not None:
+                value = list(value)
+            product[name] = value
+        if self.overrides:
+            product.update(self.overrides)
+        return product
+
+    def pack(self):
+        """:return: list，按槽位顺序的值，可直接 JSON 序列化，用于写入磁盘"""
+        return [getattr(self, name) for name in self.__slots__]
+
+    @classmethod
+    def unpack(cls, values):
+        record = cls.__new__(cls)
+        for name, value in zip(cls.__slots__, values):
+            if name in INTERNED_LIST_FIELDS and value is not None:
+                value = tuple(_intern(item) for item in value)
+            elif name in INTERNED_FIELDS:
+                value = _intern(value)
+            setattr(record, name, value)
+        return record
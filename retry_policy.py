@@ -0,0 +1,41 @@
+import random
+
+MAX_RETRIES = 5  # 最大重试次数，处理抓取失败的情况
+
+# 默认值得重试的失败类型；not_detail（商品下架、跳转到非详情页）和 parse（选择器失效）重试也无济于事
+RETRYABLE_KINDS = ("timeout", "captcha", "blocked", "error")
+
+class RetryPolicy:
+    """
+    重试策略：根据失败类型判断是否值得重试，并给出指数退避的等待时间。
+    失败的 ASIN 由调度器带着 not-before 时间戳重新排队，而不是占着工作协程原地重试。
+    """
+
+    def __init__(self, max_retries=MAX_RETRIES, base_delay=2.0, max_delay=120.0, retry_on=RETRYABLE_KINDS):
+        """
+        :param max_retries: int，每个 ASIN 最多重试的次数
+        :param base_delay: float，第一次重试前的等待秒数，之后每次翻倍
+        :param max_delay: float，单次等待上限（秒）
+        :param retry_on: iterable，值得重试的失败类型（见 scraper.ERROR_KINDS）
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = set(retry_on)
+
+    @classmethod
+    def from_config(cls, retry_config):
+        """根据 config.json 中的 retry 配置创建重试策略"""
+        return cls(**(retry_config or {}))
+
+    def should_retry(self, kind, attempt):
+        """
+        :param kind: str，失败类型
+        :param attempt: int，已完成的尝试次数（从 1 开始）
+        :return: bool，是否重新排队
+        """
+        return kind in self.retry_on and attempt <= self.max_retries
+
+    def delay(self, attempt):
+        """第 attempt 次失败后的等待秒数：指数退避加抖动"""
+        return min(self.max_delay, self.base_delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
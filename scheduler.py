@@ -0,0 +1,150 @@
+import heapq
+import logging
+import random
+import sqlite3
+import time
+
+# 调度项类型：query 为搜索词（搜索并抓取全部结果），asin 为单个商品（只重新抓取详情）
+ITEM_KINDS = ("query", "asin")
+
+class ScheduleStore:
+    """
+    持久化的调度表：每个调度项的刷新间隔、下次到期时间和上次运行时间，进程重启后继续按原计划执行。
+    """
+
+    def __init__(self, path):
+        """
+        :param path: str，SQLite 文件路径
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schedule (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                interval REAL NOT NULL,
+                next_due REAL NOT NULL,
+                last_run REAL,
+                PRIMARY KEY (kind, key)
+            )
+            """
+        )
+        self.conn.commit()
+
+    def load(self):
+        """:return: list，[(kind, key, interval, next_due), ...]"""
+        return self.conn.execute("SELECT kind, key, interval, next_due FROM schedule").fetchall()
+
+    def upsert(self, kind, key, interval, next_due, last_run=None):
+        self.conn.execute(
+            """
+            INSERT INTO schedule (kind, key, interval, next_due, last_run) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(kind, key) DO UPDATE SET
+                interval = excluded.interval, next_due = excluded.next_due,
+                last_run = COALESCE(excluded.last_run, schedule.last_run)
+            """,
+            (kind, key, interval, next_due, last_run)
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+class Scheduler:
+    """
+    按下次到期时间排序的优先队列，同时调度搜索词和单个 ASIN。
+    每个调度项有自己的刷新间隔，重新排期时加入随机抖动，避免同一批调度项总是同时到期。
+    堆中可能残留被重新排期前的旧条目，弹出时与 due 表比对后丢弃（惰性删除）。
+    """
+
+    def __init__(self, store, jitter=0.1):
+        """
+        :param store: ScheduleStore，持久化调度表
+        :param jitter: float，抖动比例，实际间隔为 interval * (1 ± jitter)
+        """
+        self.store = store
+        self.jitter = jitter
+        self.heap = []  # (next_due, kind, key)
+        self.due = {}  # (kind, key) -> next_due，当前有效的到期时间
+        self.intervals = {}  # (kind, key) -> interval
+        for kind, key, interval, next_due in store.load():
+            self._push(kind, key, interval, next_due)
+        logging.info("📅 从 %s 载入 %d 个调度项", store.path, len(self))
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def _push(self, kind, key, interval, next_due):
+        self.due[(kind, key)] = next_due
+        self.intervals[(kind, key)] = interval
+        heapq.heappush(self.heap, (next_due, kind, key))
+
+    def add(self, kind, key, interval, now=None):
+        """
+        登记调度项。新调度项立即到期；已有调度项只更新刷新间隔，不打乱原计划。
+        调用方刚处理过的新调度项可以紧接着调用 reschedule，从下一个间隔开始。
+
+        :param kind: str，ITEM_KINDS 之一
+        :param key: str，搜索词或 ASIN
+        :param interval: float，刷新间隔（秒）
+        :param now: float，当前时间戳，默认 time.time()
+        """
+        now = time.time() if now is None else now
+        if (kind, key) in self.intervals:
+            if self.intervals[(kind, key)] != interval:
+                self.intervals[(kind, key)] = interval
+                self.store.upsert(kind, key, interval, self.due.get((kind, key), now))
+            return
+        self._push(kind, key, interval, now)
+        self.store.upsert(kind, key, interval, now)
+
+    def next_due(self):
+        """:return: float | None，最早的到期时间"""
+        while self.heap:
+            next_due, kind, key = self.heap[0]
+            if self.due.get((kind, key)) == next_due:
+                return next_due
+            heapq.heappop(self.heap)  # 丢弃已被重新排期的旧条目
+        return None
+
+    def pop_due(self, now=None, limit=None):
+        """
+        取出所有已到期的调度项（到期最早的在前）。取出的调度项需在处理完后调用 reschedule。
+
+        :param now: float，当前时间戳，默认 time.time()
+        :param limit: int，可选；最多取出的数量
+        :return: list，[(kind, key), ...]
+        """
+        now = time.time() if now is None else now
+        items = []
+        while self.heap and (limit is None or len(items) < limit):
+            next_due, kind, key = self.heap[0]
+            if self.due.get((kind, key)) != next_due:
+                heapq.heappop(self.heap)
+                continue
+            if next_due > now:
+                break
+            heapq.heappop(self.heap)
+            del self.due[(kind, key)]  # 处理期间不再出现在队列中，reschedule 后重新入队
+            items.append((kind, key))
+        return items
+
+    def reschedule(self, kind, key, now=None, factor=1.0):
+        """
+        处理完成后按刷新间隔（加抖动）重新排期，并写入调度表。
+
+        :param kind: str，ITEM_KINDS 之一
+        :param key: str，搜索词或 ASIN
+        :param now: float，完成时间戳，默认 time.time()
+        :param factor: float，间隔缩放系数，例如按变化频率缩短经常变化的 ASIN 的间隔
+        """
+        now = time.time() if now is None else now
+        interval = self.intervals[(kind, key)]
+        next_due = now + interval * factor * random.uniform(1 - self.jitter, 1 + self.jitter)
+        self._push(kind, key, interval, next_due)
+        self.store.upsert(kind, key, interval, next_due, last_run=now)
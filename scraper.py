@@ -1,61 +1,175 @@
 import asyncio
 import logging
-from playwright.async_api import async_playwright  # 导入 Playwright 的异步 API
 import json
 import random
-import pandas as pd  # 用于将数据保存为 CSV
+import sys
 import time
-import re  # 用于正则表达式处理
-
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("crawler.log", encoding="utf-8")
-    ]
-)
+from collections import deque
+from fields import FAMILY_FIELDS, FIELDS, build_product_record, raw_specs, resolve_fields  # 字段注册表：读取规格、清洗和类型
+from metrics import METRICS  # 逐阶段耗时与结果计数
+from interception import DEFAULT_TYPES, InterceptPolicy, TrafficStats  # 详情页请求拦截
+from urls import product_url  # 站点根地址可切换到本地替身服务器
+from lazy import PLAYWRIGHT_HINT, require  # playwright、pandas 只在测试函数中加载
+from log_setup import setup_logging
 
 # 定义常量
 COOKIES_FILE = "amazon_cookies.json"  # Cookies 文件路径，用于模拟登录
 OUTPUT_FILE = "amazon_products.csv"  # 测试模式下保存结果的 CSV 文件名
-MAX_RETRIES = 5  # 最大重试次数，处理抓取失败的情况
 
-# 获取商品变体 ASIN 的辅助函数
-async def get_variants_asins(page):
+# 单次往返抽取脚本：按读取规格（fields.RAW_SPECS）在页面内一次性收集原始字段，以 JSON 形式返回
+# 只做 DOM 读取，不做任何清洗，清洗统一在 Python 侧的 build_product_record 中完成
+# 可选参数 {specs: {...}} 只读取指定的原始字段（由 fields.raw_specs 按启用的字段生成），缺省时读取全部字段
+EXTRACT_SCRIPT = """
+(options) => {
+    const specs = (options && options.specs) || __DEFAULT_SPECS__;
+    const selectors = css => [].concat(css);
+    const first = css => {
+        for (const selector of selectors(css)) {
+            const el = document.querySelector(selector);
+            if (el) return el;
+        }
+        return null;
+    };
+    const text = el => (el ? el.innerText : null);
+    const readers = {
+        text: spec => text(first(spec.css)),
+        attr: spec => { const el = first(spec.css); return el ? el.getAttribute(spec.attr) : null; },
+        exists: spec => !!first(spec.css),
+        all_text: spec => Array.from(document.querySelectorAll(spec.css)).map(el => el.innerText),
+        all_attr: spec => Array.from(document.querySelectorAll(spec.css))
+            .map(el => spec.attrs.map(name => el.getAttribute(name)).find(Boolean))
+            .filter(Boolean),
+        // 与 :has-text(label) 后取相邻行值元素的逻辑一致
+        labelled: spec => {
+            const scope = first(spec.css);
+            if (!scope) return null;
+            const label = Array.from(scope.querySelectorAll(spec.label_css))
+                .find(el => el.textContent.toLowerCase().includes(spec.label));
+            const row = label && label.parentElement && label.parentElement.parentElement;
+            const sibling = row && row.nextElementSibling;
+            return text(sibling && sibling.querySelector(spec.value_css));
+        }
+    };
+    const raw = {};
+    for (const [key, spec] of Object.entries(specs)) {
+        raw[key] = spec.fallback_for && raw[spec.fallback_for] != null ? null : readers[spec.mode](spec);
+    }
+    return raw;
+}
+""".replace("__DEFAULT_SPECS__", json.dumps(raw_specs()))
+
+# 支持的抽取模式：evaluate 为单次往返，dom 为逐元素查询（旧实现，保留用于对比和排查）
+EXTRACT_MODES = ("evaluate", "dom")
+
+async def _first_element(page, css):
+    """依次尝试选择器，返回第一个有匹配的元素"""
+    for selector in [css] if isinstance(css, str) else css:
+        element = await page.query_selector(selector)
+        if element:
+            return element
+    return None
+
+# 逐元素查询方式收集原始字段，每个字段至少一次 CDP 往返
+async def extract_raw_dom(page, title_element=None, price_element=None, fields=None):
     """
-    从商品详情页提取所有变体 ASIN（如颜色、尺寸等变体的 ASIN）。
-    
+    使用 query_selector / inner_text 按读取规格逐个读取原始字段，返回值结构与 EXTRACT_SCRIPT 一致。
+
     :param page: Playwright 页面对象
-    :return: list，包含变体 ASIN 的列表
+    :param title_element: 已查询到的标题元素（可能为 None），避免重复查询
+    :param price_element: 已查询到的价格元素（可能为 None），避免重复查询
+    :param fields: tuple，可选；启用的字段，None 表示全部字段
+    :return: dict，未清洗的原始字段
     """
-    variant_asins = set()  # 使用集合避免重复
-    # 查找包含变体 ASIN 的元素，可能出现在不同标签中
-    variant_elements = await page.query_selector_all("li[data-asin], div[data-defaultasin], div[data-csa-c-asin]")
-    for elem in variant_elements:
-        # 从不同属性中提取 ASIN
-        asin = await elem.get_attribute("data-asin") or await elem.get_attribute("data-defaultasin") or await elem.get_attribute("data-csa-c-asin")
-        if asin:  # 如果找到 ASIN，添加到集合
-            variant_asins.add(asin.strip())
-    return list(variant_asins)  # 返回去重后的列表
+    known = {"title": title_element, "price": price_element, "has_title": title_element, "has_price": price_element}
+    raw = {}
+    for key, spec in raw_specs(fields).items():
+        if spec.get("fallback_for") and raw.get(spec["fallback_for"]) is not None:
+            raw[key] = None  # 只有在没有完整价格时才查询整数和小数部分
+            continue
+        mode = spec["mode"]
+        if mode in ("all_text", "all_attr"):
+            values = []
+            for element in await page.query_selector_all(spec["css"]):
+                if mode == "all_text":
+                    values.append(await element.inner_text())
+                    continue
+                for name in spec["attrs"]:  # 按属性优先级取第一个非空值
+                    value = await element.get_attribute(name)
+                    if value:
+                        values.append(value)
+                        break
+            raw[key] = values
+            continue
+        element = known.get(key) if known.get(key) is not None else await _first_element(page, spec["css"])
+        if mode == "exists":
+            raw[key] = bool(element)
+        elif not element:
+            raw[key] = None
+        elif mode == "text":
+            raw[key] = await element.inner_text()
+        elif mode == "attr":
+            raw[key] = await element.get_attribute(spec["attr"])
+        else:  # labelled
+            label_element = await element.query_selector(f"{spec['label_css']}:has-text('{spec['label']}')")
+            raw[key] = None
+            if label_element:
+                value_element = await label_element.evaluate_handle(
+                    "(el, css) => el.parentElement.parentElement.nextElementSibling.querySelector(css)",
+                    spec["value_css"]
+                )
+                raw[key] = await value_element.inner_text() if value_element.as_element() else None
+    return raw
 
-# 核心函数，抓取单个商品的详情
-async def get_product_details(asin, page, retry_count=0):
+# 抓取失败的分类，调度器据此决定是否值得重试
+ERROR_KINDS = ("timeout", "captcha", "blocked", "not_detail", "parse", "error")
+
+class ScrapeError(Exception):
     """
-    从 Amazon 商品页面抓取详细信息（如标题、品牌、价格等）。
-    
+    单次抓取失败。
+
+    :param kind: str，ERROR_KINDS 之一：timeout 超时；captcha 验证码；blocked 503/429 限流；
+                 not_detail 非商品详情页；parse 字段清洗失败；error 其他错误
+    """
+
+    def __init__(self, kind, message):
+        super().__init__(message)
+        self.kind = kind
+
+def _is_timeout(error):
+    """是否为 Playwright 的超时错误；能拿到 Playwright 页面时其模块必然已导入，这里不触发导入"""
+    api = sys.modules.get("playwright.async_api")
+    return api is not None and isinstance(error, api.TimeoutError)
+
+# 核心函数，抓取单个商品的详情（单次尝试，不在函数内部重试）
+async def scrape_product(asin, page, extract_mode="evaluate", controller=None, skip_family=False, fields=None,
+                         archive=None):
+    """
+    访问一次商品详情页并抽取详细信息（如标题、品牌、价格等），失败时抛出带分类的 ScrapeError。
+    重试由调用方的调度器负责，每次尝试应使用新的或回收过的页面。
+
     :param asin: str，商品的 ASIN
     :param page: Playwright 页面对象
-    :param retry_count: int，当前重试次数，默认为 0
-    :return: dict，包含商品详情；若失败或非详情页，返回 None
+    :param extract_mode: str，抽取模式，"evaluate" 单次往返（默认），"dom" 逐元素查询
+    :param controller: RateController，可选；提供时由控制器负责节奏和退避，并上报每次的抓取结果
+    :param skip_family: bool，跳过 FAMILY_FIELDS（由调用方从同家族已抓取的记录补齐）
+    :param fields: iterable，可选；本次运行启用的字段（如价格监控只需要 price），None 表示全部字段
+    :param archive: PageArchive，可选；提供时存档详情页 HTML（包括非详情页），供离线重新抽取
+    :return: dict，包含商品详情，未启用的字段为 None
+    :raises ScrapeError: 抓取失败
     """
-    url = f"https://www.amazon.com/dp/{asin}"  # 构造商品详情页 URL
-    logging.info(f"📦 正在爬取商品详情: {url}")
+    if extract_mode not in EXTRACT_MODES:
+        raise ValueError(f"未知的抽取模式: {extract_mode}，可选: {EXTRACT_MODES}")
+    fields = resolve_fields(fields, FAMILY_FIELDS if skip_family else ())
+    # 只读取启用字段的原始字段；全部启用时使用脚本内置的默认规格，不必每次传参
+    options = {"specs": raw_specs(fields)} if len(fields) < len(FIELDS) else None
+    url = product_url(asin)  # 构造商品详情页 URL
+    logging.info("📦 正在爬取商品详情: %s", url)
     start_time = time.perf_counter()  # 记录开始时间
     try:
-        # 随机延迟，模拟人类行为，降低反爬风险
-        await asyncio.sleep(random.uniform(0.2, 0.8))
+        if controller is None:
+            # 随机延迟，模拟人类行为，降低反爬风险（使用速率控制器时由控制器统一错开请求）
+            with METRICS.phase("jitter_sleep"):
+                await asyncio.sleep(random.uniform(0.2, 0.8))
         # 定义常见的 User-Agent，伪装为真实浏览器
         user_agents = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -65,152 +179,93 @@ async def get_product_details(asin, page, retry_count=0):
         # 设置请求头，随机选择 User-Agent
         await page.set_extra_http_headers({"User-Agent": random.choice(user_agents)})
         # 访问商品页面，等待 DOM 加载完成
-        await page.goto(url, timeout=60000, wait_until="domcontentloaded")
-
-        # 检查是否为商品详情页
-        title_element = await page.query_selector("#productTitle")  # 商品标题元素
-        price_element = await page.query_selector("span.a-price") or await page.query_selector("span.a-offscreen")  # 价格元素
-        if not title_element and not price_element:  # 如果标题和价格都不存在，认为是非详情页
-            content = await page.content()
-            logging.warning(f"⚠️ ASIN {asin} 不是商品详情页，跳过爬取。页面内容: {content[:500]}")
-            return None
-
-        # 检查是否遇到验证码
-        captcha = await page.query_selector("input#captchacharacters")
-        if captcha:
-            logging.warning(f"❌ ASIN {asin} 遇到验证码，暂停等待手动解决...")
-            await asyncio.sleep(60)  # 暂停 60 秒，等待手动解决
-            await page.reload()  # 重新加载页面
+        with METRICS.phase("goto"):
+            response = await page.goto(url, timeout=60000, wait_until="domcontentloaded")
+        status = response.status if response else None
 
-        # 等待标题元素加载，确保页面完全可用
-        await page.wait_for_selector("#productTitle", timeout=90000)
-        title = await title_element.inner_text() if title_element else "Title not found"  # 获取标题
-
-        # 获取品牌信息
-        brand_element = await page.query_selector("#bylineInfo")
-        brand = await brand_element.inner_text() if brand_element else "Brand not found"  # 获取品牌文字
-        brand_link = await brand_element.get_attribute("href") if brand_element else None  # 获取品牌链接
-        if "Visit the" in brand and "Store" in brand:  # 清理品牌名称中的冗余部分
-            brand = brand.replace("Visit the", "").replace("Store", "").strip()
-        elif "Brand:" in brand:
-            brand = brand.replace("Brand:", "").strip()
-        brand = re.sub(r'[^a-zA-Z0-9\s-]', '', brand).strip()  # 移除特殊字符
-        if brand_link and not brand_link.startswith("http"):  # 补全品牌链接
-            brand_link = f"https://www.amazon.com{brand_link}"
-
-        # 提取价格
-        price = "Price not found"
-        if price_element:
-            price_text = await price_element.inner_text()
-            price_match = re.search(r'\$\d+\.\d{2}', price_text)  # 提取第一个合法价格
-            if price_match:
-                price = price_match.group(0)
-            else:
-                price_text = re.sub(r'[\n\r\s]+', '', price_text.strip())  # 清理文本
-                if price_text:
-                    price = price_text
+        if extract_mode == "evaluate":
+            # 一次 evaluate 拿到详情页判断、验证码判断和全部字段
+            with METRICS.phase("extract"):
+                raw = await page.evaluate(EXTRACT_SCRIPT, options)
+            is_detail_page = raw["has_title"] or raw["has_price"]
+            has_captcha = raw["captcha"]
         else:
-            # 如果未找到完整价格，尝试拼接整数和小数部分
-            price_whole_element = await page.query_selector("span.a-price-whole")
-            price_fraction_element = await page.query_selector("span.a-price-fraction")
-            whole_text = (await price_whole_element.inner_text()).strip() if price_whole_element else ""
-            fraction_text = (await price_fraction_element.inner_text()).strip() if price_fraction_element else ""
-            whole_text = re.sub(r'[\n\r\s.]', '', whole_text)  # 清理整数部分
-            fraction_text = re.sub(r'[\n\r\s]', '', fraction_text)  # 清理小数部分
-            if whole_text and fraction_text:
-                price = f"${whole_text}.{fraction_text}"
-            elif whole_text:
-                price = f"${whole_text}"
-
-        # 获取上月销量
-        bought_element = await page.query_selector("#social-proofing-faceout-title-tk_bought .a-text-bold")
-        bought = (await bought_element.inner_text()).split()[0] if bought_element else "< 50"
+            # 检查是否为商品详情页
+            with METRICS.phase("probe"):
+                title_element = await page.query_selector("#productTitle")  # 商品标题元素
+                price_element = await page.query_selector("span.a-price") or await page.query_selector("span.a-offscreen")  # 价格元素
+                is_detail_page = bool(title_element or price_element)
+                has_captcha = bool(await page.query_selector("input#captchacharacters"))
 
-        # 获取面料类型
-        fabric_type = None
-        details_section = await page.query_selector("#productFactsDesktopExpander")
-        if details_section:
-            fabric_element = await details_section.query_selector("span.a-color-base:has-text('Fabric type')")
-            if fabric_element:
-                fabric_type_element = await fabric_element.evaluate_handle(
-                    "el => el.parentElement.parentElement.nextElementSibling.querySelector('.a-color-base')"
-                )
-                fabric_type = await fabric_type_element.inner_text() if fabric_type_element else None
-
-        # 检查是否为“经常退货”商品
-        frequently_returned_element = await page.query_selector(
-            "div#buyingOptionNostosBadge_feature_div .hrrv-badge-T2-title p span.a-text-bold"
-        )
-        frequently_returned = True if frequently_returned_element else False
+        # 检查是否遇到验证码：交给调度器延后重试，不在当前页面上干等
+        if has_captcha:
+            if controller is not None:
+                controller.record("captcha")  # 所有协程一起暂停
+            raise ScrapeError("captcha", "遇到验证码")
 
-        # 获取变体 ASIN
-        variant_asins = await get_variants_asins(page)
+        if not is_detail_page:  # 如果标题和价格都不存在，认为是非详情页
+            content = await page.content()
+            logging.warning("⚠️ ASIN %s 不是商品详情页（HTTP %s），跳过爬取", asin, status)
+            logging.debug("页面内容: %s", content[:500])  # 页面内容只在 DEBUG 级别输出
+            if archive is not None:
+                await archive.save("detail", asin, url, content, status, ok=False)
+            kind = "blocked" if status in (429, 503) else "not_detail"  # 503/429 视为限流
+            if controller is not None:
+                controller.record("blocked" if kind == "blocked" else "non_detail")
+            raise ScrapeError(kind, f"不是商品详情页（HTTP {status}）")
 
-        # 获取评分和评论数
-        rating = "Rating not found"
-        review_count = "Review count not found"
-        rating_element = await page.query_selector("#averageCustomerReviews .a-icon-alt")
-        review_count_element = await page.query_selector("#acrCustomerReviewText")
-        if rating_element:
-            rating_text = await rating_element.inner_text()
-            rating_match = re.search(r"(\d+\.\d+|\d+)", rating_text)  # 提取评分数字
-            rating = rating_match.group(0) if rating_match else "Rating not found"
-        if review_count_element:
-            review_text = await review_count_element.inner_text()
-            review_match = re.search(r"(\d+,?\d*)", review_text)  # 提取评论数
-            review_count = review_match.group(0).replace(",", "") if review_match else "Review count not found"
+        if extract_mode == "evaluate":
+            # 标题缺失时，等待标题出现后再抽取一次
+            if not raw["has_title"]:
+                with METRICS.phase("wait_selector"):
+                    await page.wait_for_selector("#productTitle", timeout=90000)
+                with METRICS.phase("extract"):
+                    raw = await page.evaluate(EXTRACT_SCRIPT, options)
+        else:
+            # 等待标题元素加载，确保页面完全可用
+            with METRICS.phase("wait_selector"):
+                await page.wait_for_selector("#productTitle", timeout=90000)
+            with METRICS.phase("extract"):
+                raw = await extract_raw_dom(page, title_element, price_element, fields)
+        if archive is not None:
+            await archive.save("detail", asin, url, await page.content(), status)
+    except ScrapeError:
+        raise
+    except Exception as e:
+        if controller is not None:
+            controller.record("error")
+        raise ScrapeError("timeout" if _is_timeout(e) else "error", str(e)) from e
 
-        # 获取“客户评价”总结
-        customer_say = "Customer say not found"
-        insights_section = await page.query_selector("#cr-product-insights-cards")
-        if insights_section:
-            summary_element = await insights_section.query_selector("#product-summary p span")
-            if summary_element:
-                customer_say = await summary_element.inner_text()
+    try:
+        with METRICS.phase("build"):
+            product = build_product_record(asin, url, raw, fields)
+    except Exception as e:
+        raise ScrapeError("parse", str(e)) from e
 
-        # 获取负面反馈词
-        negative_aspects = []
-        if insights_section:
-            negative_elements = await insights_section.query_selector_all("a[data-csa-c-item-id*='_NEGATIVE']")
-            for elem in negative_elements:
-                aspect_text = await elem.inner_text()
-                aspect_cleaned = re.sub(r'[^a-zA-Z\s]', '', aspect_text).strip()  # 清理文本
-                if aspect_cleaned:
-                    negative_aspects.append(aspect_cleaned)
+    # 计算耗时并输出
+    end_time = time.perf_counter()
+    elapsed_time = end_time - start_time
+    logging.info("✅ 爬取成功，耗时 %.2f 秒", elapsed_time)
+    if controller is not None:
+        controller.record("success", elapsed_time)
+    # 返回所有抓取到的数据
+    return product
 
-        # 如果是重试成功，提示用户
-        if retry_count > 0:
-            logging.info(f"🔄 ASIN {asin} 重试成功！")
-        # 计算耗时并输出
-        end_time = time.perf_counter()
-        elapsed_time = end_time - start_time
-        logging.info(f"✅ 爬取成功，耗时 {elapsed_time:.2f} 秒")
-        # 返回所有抓取到的数据
-        return {
-            "asin": asin,
-            "brand": brand,
-            "brand_link": brand_link,
-            "title": title,
-            "price": price,
-            "bought": bought,
-            "fabric_type": fabric_type,
-            "url": url,
-            "frequently_returned": frequently_returned,
-            "variants": variant_asins,
-            "rating": rating,
-            "review_count": review_count,
-            "negative_aspects": negative_aspects,
-            "customer_say": customer_say
-        }
-    except Exception as e:
-        logging.error(f"❌ 爬取失败: {asin}，错误: {str(e)}")
-        if retry_count < MAX_RETRIES:  # 如果未达到最大重试次数，继续尝试
-            logging.warning(f"⚠️ ASIN {asin} 加入重试队列，重试次数: {retry_count + 1}")
-            await asyncio.sleep(random.uniform(2, 5))  # 随机延迟后重试
-            return await get_product_details(asin, page, retry_count + 1)
-        else:
-            logging.error(f"🚨 ASIN {asin} 重试次数已达上限，放弃爬取")
-            return None  # 重试失败，返回 None
+async def get_product_details(asin, page, extract_mode="evaluate", controller=None):
+    """
+    从 Amazon 商品页面抓取详细信息（如标题、品牌、价格等），单次尝试，失败时返回 None。
+    
+    :param asin: str，商品的 ASIN
+    :param page: Playwright 页面对象
+    :param extract_mode: str，抽取模式，"evaluate" 单次往返（默认），"dom" 逐元素查询
+    :param controller: RateController，可选；提供时由控制器负责节奏和退避，并上报每次的抓取结果
+    :return: dict，包含商品详情；若失败或非详情页，返回 None
+    """
+    try:
+        return await scrape_product(asin, page, extract_mode, controller)
+    except ScrapeError as e:
+        logging.error("❌ 爬取失败: %s（%s），错误: %s", asin, e.kind, e)
+        return None
 
 # 测试函数，用于单个 ASIN 的抓取和调试
 async def test_scraper():
@@ -219,11 +274,12 @@ async def test_scraper():
     """
     test_asin = "B0CN8SL6MV"  # 测试用的初始 ASIN
     scraped_data = {}  # 存储抓取结果
-    to_scrape = [test_asin]  # 待抓取的 ASIN 队列
-    seen_asins = set()  # 记录已处理的 ASIN
+    to_scrape = deque([test_asin])  # 待抓取的 ASIN 队列
+    seen_asins = {test_asin}  # 记录已发现的 ASIN（包括待抓取的），集合判重
     start_time = time.perf_counter()  # 记录开始时间
 
     # 使用 Playwright 启动浏览器
+    async_playwright = require("playwright.async_api", PLAYWRIGHT_HINT).async_playwright
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)  # 无头模式启动 Chromium
         context = await browser.new_context()  # 创建新的浏览上下文
@@ -237,45 +293,48 @@ async def test_scraper():
             logging.warning("⚠️ 没有找到 Cookies，可能需要先运行 `login.py` 手动登录")
             await browser.close()
             return
+        traffic = TrafficStats()  # 与页面池相同的详情页拦截策略，统计整个测试的流量
+        await InterceptPolicy("detail", DEFAULT_TYPES["detail"]).install(context, lambda request: traffic)
         page = await context.new_page()  # 创建新页面
 
         # 循环处理待抓取的 ASIN
         while to_scrape:
-            current_asin = to_scrape.pop(0)  # 从队列中取出一个 ASIN
-            if current_asin in seen_asins:  # 如果已处理，跳过
-                continue
-            seen_asins.add(current_asin)  # 标记为已处理
+            current_asin = to_scrape.popleft()  # 从队列中取出一个 ASIN
             product_info = await get_product_details(current_asin, page)  # 抓取详情
             if product_info:  # 如果抓取成功
                 scraped_data[current_asin] = product_info  # 保存结果
                 # 如果有变体 ASIN，加入待抓取队列
                 if "variants" in product_info:
                     for variant_asin in product_info["variants"]:
-                        if variant_asin not in seen_asins and variant_asin not in to_scrape:
+                        if variant_asin not in seen_asins:
+                            seen_asins.add(variant_asin)
                             to_scrape.append(variant_asin)
         await page.close()  # 关闭页面
         await browser.close()  # 关闭浏览器
+        logging.info("🛡️ 共传输 %.0f KB、%d 个请求，拦截 %d 个", traffic.bytes / 1024, traffic.requests, traffic.blocked_total())
 
         # 计算总耗时
         end_time = time.perf_counter()
         total_time = end_time - start_time
         # 将结果保存为 CSV
+        pd = require("pandas", "保存测试结果需要 pandas，请先执行 `pip install pandas`")
         df = pd.DataFrame(scraped_data.values())
         df.to_csv(OUTPUT_FILE, index=False)
-        logging.info(f"✅ 数据已保存到 {OUTPUT_FILE}")
+        logging.info("✅ 数据已保存到 %s", OUTPUT_FILE)
 
         # 打印所有抓取到的数据，方便调试
         logging.info("🛒 爬取完成！所有数据如下：")
         for asin, data in scraped_data.items():
             logging.info("=" * 50)
-            logging.info(f"ASIN: {asin}")
+            logging.info("ASIN: %s", asin)
             for key, value in data.items():
                 if key != "asin":  # ASIN 已单独打印，避免重复
-                    logging.info(f"{key}: {value}")
+                    logging.info("%s: %s", key, value)
         logging.info("=" * 50)
-        logging.info(f"⏱️ 总爬取时间: {total_time:.2f} 秒")
+        logging.info("⏱️ 总爬取时间: %.2f 秒", total_time)
         logging.info("=" * 50)
 
 # 程序入口，运行测试函数
 if __name__ == "__main__":
+    setup_logging()
     asyncio.run(test_scraper())  # 启动异步测试流程
\ No newline at end of file
@@ -1,91 +1,204 @@
 import logging
-from playwright.async_api import async_playwright
 import asyncio
 import random
 import csv
+from fields import CARD_FIELDS, CARD_SPECS, build_product_record  # 搜索卡片的读取规格和清洗
+from metrics import METRICS  # 搜索页加载耗时
+import urls  # 站点根地址可切换到本地替身服务器
+from interception import DEFAULT_TYPES, InterceptPolicy, TrafficStats  # 单独启动浏览器时使用默认拦截策略
+from urls import product_url
+from lazy import PLAYWRIGHT_HINT, require  # 单独启动浏览器时才加载 playwright
+from log_setup import setup_logging
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("crawler.log", encoding="utf-8")
-    ]
-)
-
-async def search_products(query, csv_file, max_pages=1):
+# 伪装真实浏览器的搜索请求头
+SEARCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Connection": "keep-alive",
+    "DNT": "1",
+    "Upgrade-Insecure-Requests": "1"
+}
+
+# 搜索模式：asins 只取 ASIN，商品字段全部从详情页抓取；cards 同时从搜索卡片读取 CARD_FIELDS，
+# 详情页只用于卡片上没有的字段（面料、买家评价、退货提示、变体等）
+SEARCH_MODES = ("asins", "cards")
+
+# 单次往返读取当前页所有卡片：按 fields.CARD_SPECS 在每个卡片内部查询，返回 [{asin, 原始字段...}]
+# 与 scraper.EXTRACT_SCRIPT 一样只做 DOM 读取，清洗在 Python 侧的 build_product_record 中完成
+CARD_SCRIPT = """
+(specs) => Array.from(document.querySelectorAll("div.s-main-slot div[data-asin]")).map(card => {
+    const read = spec => {
+        for (const selector of [].concat(spec.css)) {
+            const el = Array.from(card.querySelectorAll(selector))
+                .find(el => !spec.contains || el.textContent.includes(spec.contains));
+            if (el) return el.textContent.trim();
+        }
+        return null;
+    };
+    const raw = {asin: card.getAttribute("data-asin")};
+    for (const [key, spec] of Object.entries(specs)) {
+        raw[key] = spec.fallback_for && raw[spec.fallback_for] != null ? null : read(spec);
+    }
+    return raw;
+})
+"""
+
+# 没有速率控制器时翻页前后的随机等待范围（秒），离线基准可以用 set_page_pause 缩短或关闭
+PAGE_PAUSE = (3, 5)
+
+def set_page_pause(low, high):
     """
-    搜索 Amazon 关键词，获取 ASIN 列表，并存入 CSV。
+    :param low: float，最短等待（秒）
+    :param high: float，最长等待（秒），为 0 时不等待
+    """
+    global PAGE_PAUSE
+    PAGE_PAUSE = (low, high)
+
+async def _pause(controller):
+    """翻页等待：有速率控制器时按控制器节奏，否则在 PAGE_PAUSE 范围内随机休息；等待时间计入 search_pause 阶段"""
+    with METRICS.phase("search_pause"):
+        if controller is not None:
+            await controller.pace()
+        elif PAGE_PAUSE[1] > 0:
+            await asyncio.sleep(random.uniform(*PAGE_PAUSE))
+
+async def _read_page(page, cards):
+    """读取当前结果页：返回 [(ASIN, 卡片记录或 None)]，ASIN 未去重"""
+    if not cards:
+        # 一次调用取回当前页所有卡片的 data-asin
+        raw_asins = await page.eval_on_selector_all(
+            "div.s-main-slot div[data-asin]", "els => els.map(el => el.getAttribute('data-asin'))"
+        )
+        return [((asin or "").strip(), None) for asin in raw_asins]
+    with METRICS.phase("search_cards"):
+        raw_cards = await page.evaluate(CARD_SCRIPT, CARD_SPECS)
+    items = []
+    for raw in raw_cards:
+        asin = (raw.pop("asin") or "").strip()
+        items.append((asin, build_product_record(asin, product_url(asin), raw, CARD_FIELDS) if asin else None))
+    return items
+
+async def _iter_search_pages(page, query, max_pages, controller=None, cards=False, archive=None):
+    """在给定页面上逐页搜索，产出每页新出现的 ASIN（cards 为 True 时产出卡片记录）"""
+    search_url = urls.search_url(query)  # 构造搜索 URL
+    seen_asins = set()  # 跨页去重
+    current_page = 1  # 当前页码
+
+    logging.info("🔍 正在搜索关键词: %s", query)  # 显示搜索关键词
+    with METRICS.phase("search_goto"):
+        await page.goto(search_url, timeout=90000)  # 访问搜索页面
+    with METRICS.phase("search_wait_selector"):
+        await page.wait_for_selector("div.s-main-slot", timeout=60000)  # 等待搜索结果加载
+
+    while current_page <= max_pages:
+        logging.info("📄 正在爬取第 %d 页...", current_page)
+        if archive is not None:
+            await archive.save("search", f"{query}#{current_page}", page.url, await page.content())
+        current_asins = []
+        for asin, card in await _read_page(page, cards):
+            if asin and asin not in seen_asins:  # 过滤空值和重复 ASIN
+                seen_asins.add(asin)
+                current_asins.append(card if cards else asin)
+
+        if not current_asins:  # 如果未找到 ASIN，可能触发反爬
+            logging.warning("⚠️ 没有找到 ASIN，可能触发了反爬机制！")
+            if controller is not None:
+                controller.record("blocked")
+            break
+
+        logging.info("✅ 第 %d 页找到 %d 个 ASIN", current_page, len(current_asins))
+        yield current_asins  # 先交给下游，再执行翻页等待
+
+        if current_page >= max_pages:
+            break
+
+        # 随机休息（默认 3-5 秒），降低反爬风险
+        await _pause(controller)
+
+        # 处理翻页逻辑
+        next_button = await page.query_selector('a.s-pagination-next')
+        class_attr = (await next_button.get_attribute("class")) or "" if next_button else ""
+        if next_button and "s-pagination-disabled" not in class_attr:
+            logging.info("➡️ 翻页中...")
+            await next_button.click()
+            await _pause(controller)  # 等待页面加载
+            current_page += 1
+        else:
+            break
+    logging.info("🚀 所有搜索结果已爬取完毕！共找到 %d 个 ASIN", len(seen_asins))  # 输出总 ASIN 数
+
+async def iter_search_products(query, max_pages=1, page_pool=None, controller=None, cards=False, archive=None):
+    """
+    逐页搜索 Amazon 关键词的异步生成器，每解析完一页立即产出该页新出现的 ASIN。
 
     :param query: 搜索关键词
-    :param csv_file: 存储 ASIN 的 CSV 文件路径
     :param max_pages: 最大翻页数（默认 1）
-    :return: ASIN 列表
+    :param page_pool: ContextPool，可选；提供时从共享浏览器的页面池租用页面，否则单独启动浏览器
+    :param controller: RateController，可选；翻页节奏由控制器决定，并上报疑似反爬
+    :param cards: bool，是否同时读取搜索卡片上的字段（每页一次 evaluate）
+    :param archive: PageArchive，可选；提供时存档每个结果页的 HTML
+    :return: 异步生成器，每次产出一页去重后的 ASIN 列表（空值和已出现过的 ASIN 已过滤）；
+             cards 为 True 时产出卡片记录列表，结构与 get_product_details 一致，只有 CARD_FIELDS 有值
     """
-    search_url = f"https://www.amazon.com/s?k={query.replace(' ', '+')}"  # 构造搜索 URL
-    asin_list = []  # 存储所有 ASIN
-    current_page = 1  # 当前页码
+    if page_pool is not None:
+        async with page_pool.lease() as page:
+            async for current_asins in _iter_search_pages(page, query, max_pages, controller, cards, archive):
+                yield current_asins
+        return
 
+    async_playwright = require("playwright.async_api", PLAYWRIGHT_HINT).async_playwright
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)  # 启动无头浏览器
-        page = await browser.new_page()  # 创建新页面
-
-        # 伪装真实浏览器，设置请求头
-        await page.set_extra_http_headers({
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Connection": "keep-alive",
-            "DNT": "1",
-            "Upgrade-Insecure-Requests": "1"
-        })
-
-        logging.info(f"🔍 正在搜索关键词: {query}")  # 显示搜索关键词
-        await page.goto(search_url, timeout=90000)  # 访问搜索页面
-        await page.wait_for_selector("div.s-main-slot", timeout=60000)  # 等待搜索结果加载
+        traffic = TrafficStats()  # 在 try 之前创建，new_context 等失败时 finally 中仍可输出
+        try:
+            context = await browser.new_context()
+            await InterceptPolicy("search", DEFAULT_TYPES["search"]).install(context, lambda request: traffic)
+            page = await context.new_page()  # 创建新页面
+            await page.set_extra_http_headers(SEARCH_HEADERS)  # 伪装真实浏览器，设置请求头
+            async for current_asins in _iter_search_pages(page, query, max_pages, controller, cards, archive):
+                yield current_asins
+        finally:
+            logging.info("🛡️ 搜索传输 %.0f KB、%d 个请求，拦截 %d 个",
+                         traffic.bytes / 1024, traffic.requests, traffic.blocked_total())
+            await browser.close()  # 关闭浏览器
 
-        while current_page <= max_pages:
-            logging.info(f"📄 正在爬取第 {current_page} 页...")
-            # 获取当前页的 ASIN
-            asin_elements = await page.query_selector_all("div.s-main-slot div[data-asin]")
-            current_asins = [await elem.get_attribute("data-asin") for elem in asin_elements if await elem.get_attribute("data-asin")]
-
-            if not current_asins:  # 如果未找到 ASIN，可能触发反爬
-                logging.warning("⚠️ 没有找到 ASIN，可能触发了反爬机制！")
-                break
-
-            logging.info(f"✅ 第 {current_page} 页找到 {len(current_asins)} 个 ASIN")
-            asin_list.extend(current_asins)  # 添加到总列表
-
-            # 随机休息 3-5 秒，降低反爬风险
-            await asyncio.sleep(random.uniform(3, 5))
-
-            # 处理翻页逻辑
-            next_button = await page.query_selector('a.s-pagination-next')
-            class_attr = (await next_button.get_attribute("class")) or "" if next_button else ""
-            if current_page < max_pages and next_button and "s-pagination-disabled" not in class_attr:
-                logging.info("➡️ 翻页中...")
-                await next_button.click()
-                await asyncio.sleep(random.uniform(3, 5))  # 等待页面加载
-                current_page += 1
-            else:
-                logging.info(f"🚀 所有搜索结果已爬取完毕！共找到 {len(asin_list)} 个 ASIN")  # 输出总 ASIN 数
-                break
-
-        await browser.close()  # 关闭浏览器
-
-    # 将 ASIN 存入 CSV 文件
-    if asin_list:
-        with open(csv_file, "w", newline="", encoding="utf-8") as file:
-            writer = csv.writer(file)
-            writer.writerow(["ASIN"])  # 写入表头
-            for asin in asin_list:
-                writer.writerow([asin])  # 写入每行 ASIN
-        logging.info(f"✅ ASIN 列表已保存到 {csv_file}")
+def save_asins_csv(csv_file, asin_list):
+    """
+    将 ASIN 列表存入 CSV 文件。
 
+    :param csv_file: 存储 ASIN 的 CSV 文件路径
+    :param asin_list: ASIN 列表
+    """
+    if not asin_list:
+        return
+    with open(csv_file, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["ASIN"])  # 写入表头
+        for asin in asin_list:
+            writer.writerow([asin])  # 写入每行 ASIN
+    logging.info("✅ ASIN 列表已保存到 %s", csv_file)
+
+async def search_products(query, csv_file, max_pages=1, on_asins=None, page_pool=None):
+    """
+    搜索 Amazon 关键词，获取 ASIN 列表，并存入 CSV。
+
+    :param query: 搜索关键词
+    :param csv_file: 存储 ASIN 的 CSV 文件路径
+    :param max_pages: 最大翻页数（默认 1）
+    :param on_asins: 可选回调，每解析完一页即以该页的 ASIN 列表调用，便于下游边搜索边抓取
+    :param page_pool: ContextPool，可选；复用共享浏览器的搜索页面池
+    :return: ASIN 列表（已去重）
+    """
+    asin_list = []  # 存储所有 ASIN
+    async for current_asins in iter_search_products(query, max_pages, page_pool):
+        asin_list.extend(current_asins)  # 添加到总列表
+        if on_asins is not None:  # 立即把本页 ASIN 交给下游
+            on_asins(current_asins)
+    save_asins_csv(csv_file, asin_list)  # 将 ASIN 存入 CSV 文件
     return asin_list  # 返回 ASIN 列表
 
 # 程序入口（仅用于独立测试）
 if __name__ == "__main__":
+    setup_logging()
     asyncio.run(search_products("floral apron", "amazon_asins.csv", 7))
\ No newline at end of file
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import math
+import os
+import sqlite3
+from records import ProductRecord  # 内存中的紧凑结果
+
+class BloomFilter:
+    """定长位图的布隆过滤器：判断为不存在时一定不存在，判断为存在时有 fp_rate 的误判概率"""
+
+    def __init__(self, expected_items=100000, fp_rate=0.01):
+        """
+        :param expected_items: int，预计元素数量，超出后误判率逐渐升高（结果仍然正确，只是更多地查询磁盘）
+        :param fp_rate: float，目标误判率
+        """
+        expected_items = max(1, expected_items)
+        self.size = max(8, int(-expected_items * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / expected_items * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]  # 双重哈希生成 k 个位置
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+def open_spill(path):
+    """
+    打开溢写用的 SQLite 临时库（每次运行重新创建，不需要持久化保证）。
+
+    :param path: str，SQLite 文件路径
+    :return: sqlite3.Connection
+    """
+    for suffix in ("", "-journal", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    return conn
+
+class SeenSet:
+    """
+    去重集合：提供 conn 时溢写到 SQLite，内存中只保留布隆过滤器和少量待写入的键，
+    绝大多数新键由布隆过滤器直接判定，无需查询磁盘；未提供 conn 时就是普通的内存集合。
+    """
+
+    def __init__(self, conn=None, table="seen", expected_items=100000, fp_rate=0.01, batch_size=1000):
+        """
+        :param conn: sqlite3.Connection，可选；open_spill 打开的溢写库
+        :param table: str，表名，同一个库中的多个集合使用不同的表
+        :param expected_items: int，布隆过滤器的预计元素数量
+        :param fp_rate: float，布隆过滤器的目标误判率
+        :param batch_size: int，累积多少个新键后批量写入
+        """
+        self.conn = conn
+        self.table = table
+        self.batch_size = batch_size
+        self.count = 0
+        if conn is None:
+            self.memory = set()
+            return
+        self.bloom = BloomFilter(expected_items, fp_rate)
+        self.buffer = set()  # 尚未写入磁盘的新键
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY) WITHOUT ROWID")
+
+    def __contains__(self, key):
+        if self.conn is None:
+            return key in self.memory
+        if key not in self.bloom:
+            return False
+        if key in self.buffer:
+            return True
+        return self.conn.execute(f"SELECT 1 FROM {self.table} WHERE key = ?", (key,)).fetchone() is not None
+
+    def add(self, key):
+        if key in self:
+            return
+        self.count += 1
+        if self.conn is None:
+            self.memory.add(key)
+            return
+        self.bloom.add(key)
+        self.buffer.add(key)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.conn is not None and self.buffer:
+            self.conn.executemany(f"INSERT OR IGNORE INTO {self.table} (key) VALUES (?)", ((k,) for k in self.buffer))
+            self.conn.commit()
+            self.buffer.clear()
+
+    def __len__(self):
+        return self.count
+
+class ResultStore:
+    """
+    已完成 ASIN 的结果表（ASIN -> 商品详情 dict，失败为 None），接口与 dict 一致。
+    内存中保存紧凑的 ProductRecord；提供 conn 时结果溢写到 SQLite，内存中只保留布隆过滤器，
+    后到的搜索词命中已完成的 ASIN 时再从磁盘读回。
+    """
+
+    def __init__(self, conn=None, expected_items=100000, fp_rate=0.01):
+        self.conn = conn
+        self.count = 0
+        self.succeeded = 0
+        if conn is None:
+            self.memory = {}
+            return
+        self.bloom = BloomFilter(expected_items, fp_rate)
+        conn.execute("CREATE TABLE IF NOT EXISTS results (asin TEXT PRIMARY KEY, data TEXT) WITHOUT ROWID")
+
+    def __contains__(self, asin):
+        if self.conn is None:
+            return asin in self.memory
+        if asin not in self.bloom:
+            return False
+        return self.conn.execute("SELECT 1 FROM results WHERE asin = ?", (asin,)).fetchone() is not None
+
+    def __getitem__(self, asin):
+        if self.conn is None:
+            record = self.memory[asin]
+        else:
+            row = self.conn.execute("SELECT data FROM results WHERE asin = ?", (asin,)).fetchone()
+            if row is None:
+                raise KeyError(asin)
+            record = ProductRecord.unpack(json.loads(row[0])) if row[0] is not None else None
+        return record.to_product() if record is not None else None
+
+    def __setitem__(self, asin, product_data):
+        if asin not in self:
+            self.count += 1
+            self.succeeded += 1 if product_data else 0
+        record = ProductRecord.from_product(product_data) if product_data else None
+        if self.conn is None:
+            self.memory[asin] = record
+            return
+        self.bloom.add(asin)
+        data = json.dumps(record.pack(), ensure_ascii=False) if record is not None else None
+        # 每条结果都已由各搜索词的输出文件和抓取日志落盘，这里只是去重用的临时库，不逐条提交
+        self.conn.execute("INSERT OR REPLACE INTO results (asin, data) VALUES (?, ?)", (asin, data))
+        if self.count % 1000 == 0:
+            self.conn.commit()
+
+    def update(self, results):
+        for asin, product_data in results.items():
+            self[asin] = product_data
+
+    def __iter__(self):
+        if self.conn is None:
+            return iter(list(self.memory))
+        return (row[0] for row in self.conn.execute("SELECT asin FROM results"))
+
+    def __len__(self):
+        return self.count
@@ -0,0 +1,146 @@
+import glob
+import json
+import logging
+import time
+from collections import deque
+
+class Session:
+    """一组登录 Cookies（login.py 保存的文件）及其健康统计"""
+
+    def __init__(self, name, cookies, history=50):
+        """
+        :param name: str，会话名称（Cookies 文件路径）
+        :param cookies: list，Playwright Cookies
+        :param history: int，统计健康度的滑动窗口大小
+        """
+        self.name = name
+        self.cookies = cookies
+        self.outcomes = deque(maxlen=history)  # 最近的抓取结果
+        self.counts = {}  # 结果类型 -> 累计次数
+        self.budget_used = 0  # 自上次分配以来的请求数
+        self.assigned = 0  # 当前使用该会话的上下文数
+        self.quarantined_until = 0.0
+
+    def rate(self, kind):
+        """最近窗口内某类结果的占比"""
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for outcome in self.outcomes if outcome == kind) / len(self.outcomes)
+
+    def health(self):
+        """健康度：最近成功率减去验证码占比（验证码对会话的伤害更大），无记录时为 1.0"""
+        if not self.outcomes:
+            return 1.0
+        return self.rate("success") - self.rate("captcha")
+
+    def is_quarantined(self, now=None):
+        return (time.time() if now is None else now) < self.quarantined_until
+
+class SessionPool:
+    """
+    多会话池：把多组 Cookies 分配给浏览上下文，按会话统计验证码和失败率。
+    - 验证码占比过高的会话被隔离 quarantine_seconds 秒，期间不再分配；
+    - 每个会话连续使用 request_budget 次后轮换，分散单个账号的请求量。
+    """
+
+    def __init__(self, sessions, request_budget=200, quarantine_seconds=1800, max_captcha_rate=0.2,
+                 min_requests=5):
+        """
+        :param sessions: list，Session 列表
+        :param request_budget: int，单个会话分配后最多连续使用的请求数，0 表示不轮换
+        :param quarantine_seconds: float，隔离时长（秒）
+        :param max_captcha_rate: float，最近验证码占比超过该值时隔离
+        :param min_requests: int，最近记录少于该数量时不做隔离判断
+        """
+        self.sessions = sessions
+        self.request_budget = request_budget
+        self.quarantine_seconds = quarantine_seconds
+        self.max_captcha_rate = max_captcha_rate
+        self.min_requests = min_requests
+
+    @staticmethod
+    def load_sessions(paths, history=50):
+        """
+        读取 Cookies 文件，不存在或无法解析的文件跳过。
+
+        :param paths: iterable，文件路径，支持 glob（如 sessions/*.json）
+        :return: list，Session 列表
+        """
+        sessions = []
+        for pattern in paths:
+            for path in sorted(glob.glob(pattern)) or [pattern]:
+                try:
+                    with open(path, "r") as f:
+                        sessions.append(Session(path, json.load(f), history))
+                except (OSError, json.JSONDecodeError) as e:
+                    logging.warning("⚠️ 无法加载会话 Cookies %s: %s", path, e)
+        return sessions
+
+    @classmethod
+    def from_config(cls, session_config, cookies_file):
+        """
+        根据 config.json 中的 sessions 配置创建会话池。
+
+        :param session_config: dict，sessions 配置段；cookie_files 为空时只使用 cookies_file
+        :param cookies_file: str，默认的 Cookies 文件
+        :return: SessionPool
+        """
+        session_config = session_config or {}
+        paths = session_config.get("cookie_files") or [cookies_file]
+        options = {
+            key: session_config[key]
+            for key in ("request_budget", "quarantine_seconds", "max_captcha_rate", "min_requests")
+            if key in session_config
+        }
+        return cls(cls.load_sessions(paths, session_config.get("history", 50)), **options)
+
+    def acquire(self, exclude=None):
+        """
+        分配一个会话：跳过隔离中的会话，优先分配使用中上下文最少、健康度最高的会话。
+        所有会话都被隔离时，分配最早解除隔离的会话。
+
+        :param exclude: Session，可选；轮换时排除刚换下的会话
+        :return: Session
+        """
+        now = time.time()
+        candidates = [session for session in self.sessions if session is not exclude] or self.sessions
+        available = [session for session in candidates if not session.is_quarantined(now)]
+        if available:
+            session = min(available, key=lambda s: (s.assigned, -s.health(), s.budget_used))
+        else:
+            session = min(candidates, key=lambda s: s.quarantined_until)
+            logging.warning("⚠️ 所有会话都在隔离中，提前启用 %s", session.name)
+        session.assigned += 1
+        session.budget_used = 0
+        return session
+
+    def release(self, session):
+        session.assigned -= 1
+
+    def record(self, session, outcome):
+        """
+        记录一次抓取结果，验证码占比过高时隔离会话。
+
+        :param session: Session
+        :param outcome: str，success / captcha / blocked / not_detail / timeout / parse / error
+        """
+        session.outcomes.append(outcome)
+        session.counts[outcome] = session.counts.get(outcome, 0) + 1
+        session.budget_used += 1
+        if (outcome == "captcha" and len(session.outcomes) >= self.min_requests
+                and session.rate("captcha") > self.max_captcha_rate and not session.is_quarantined()):
+            session.quarantined_until = time.time() + self.quarantine_seconds
+            logging.warning("🚫 会话 %s 验证码占比 %.0f%%，隔离 %ss",
+                            session.name, session.rate("captcha") * 100, self.quarantine_seconds)
+
+    def needs_rotation(self, session):
+        """会话被隔离或用完请求预算时需要换下"""
+        if session.is_quarantined():
+            return len(self.sessions) > 1
+        return bool(self.request_budget) and session.budget_used >= self.request_budget and len(self.sessions) > 1
+
+    def log_state(self):
+        for session in self.sessions:
+            state = "隔离中" if session.is_quarantined() else "可用"
+            logging.info("🔑 会话 %s（%s）：健康度 %.2f，验证码占比 %.0f%%，结果统计 %s",
+                         session.name, state, session.health(), session.rate("captcha") * 100, session.counts)
@@ -0,0 +1,99 @@
+import json
+from cache import DEFAULT_TTL, FIELD_GROUPS
+from fetcher import FETCH_BACKENDS  # 以下模块导入时不加载 playwright / aiohttp / pyarrow，只取常量
+from fields import resolve_fields
+from search import SEARCH_MODES
+from sinks import OUTPUT_FORMATS
+from urls import set_base_url
+
+# 默认配置文件路径
+CONFIG_FILE = "config.json"
+# CSV 文件保存目录
+CSV_DIR = "csv"  # 直接定义，不检查和创建
+
+class Settings:
+    """
+    一次运行的配置，由 config.json 的内容创建，显式传给各个入口函数；导入本模块不读取任何文件。
+    各配置段（cache、memory、shard 等）保持原样的 dict，交给对应组件的 from_config。
+    """
+
+    def __init__(self, config, path=None):
+        """
+        :param config: dict，config.json 的内容
+        :param path: str，可选；配置文件路径，分片协调器启动本机工作进程时传给子进程
+        :raises ValueError: 输出格式、抓取后端、搜索模式或字段名无效
+        """
+        self.path = path
+        self.raw = config
+        self.csv_dir = CSV_DIR
+        self.search_queries = config["search_query"]  # 搜索关键词列表，例如 ["toilet paper holder", "vintage apron"]
+        self.csv_file_base = config["csv_file"]  # 保存 ASIN 列表的 CSV 文件基础名
+        self.output_file_base = config["output_file"]  # 保存最终商品数据的 CSV 文件基础名
+        self.output_formats = config.get("output_formats", ["csv"])  # 结果输出格式：csv（Excel 友好）/ parquet（带类型列）
+        self.max_workers = config["max_processes"]  # 最大并行任务数（所有搜索词共享的工作池大小）
+        self.search_concurrency = config.get("search_concurrency", 3)  # 同时进行搜索的搜索词数量上限
+        self.max_pages = config["max_pages"]  # 搜索结果的最大翻页数
+        self.cookies_file = config["cookies_file"]  # Cookies 文件路径，用于模拟登录
+        self.extract_mode = config.get("extract_mode", "evaluate")  # 详情页抽取模式：evaluate 单次往返 / dom 逐元素查询
+        self.fields = config.get("fields") or None  # 只抽取这些字段（如价格监控只需要 ["price"]），为空表示全部字段
+        self.search_mode = config.get("search_mode", "asins")  # 搜索模式：asins 只取 ASIN / cards 同时读取卡片上的字段
+        self.fetch_backend = config.get("fetch_backend", "playwright")  # 抓取后端：playwright 浏览器渲染 / http 原始请求 + 离线解析
+        self.http_pool_size = config.get("http_pool_size", 20)  # http 后端的连接池大小
+        self.journal_file = config.get("journal_file", "crawl_journal.jsonl")  # 抓取日志路径，用于断点恢复
+        self.base_url = config.get("base_url")  # 仅用于指向本地替身服务器做基准测试
+        self.pool = config.get("pool", {})  # 页面池配置：页面回收阈值、指标输出间隔
+        self.intercept = config.get("intercept", {})  # 请求拦截配置：各阶段放行的资源类型、第一方域名、拦截域名、静态缓存
+        self.rate = config.get("rate", {})  # 速率控制器配置：初始/最小/最大窗口和速率、目标耗时、退避时间
+        self.retry = config.get("retry", {})  # 重试配置：最大次数、退避时间、值得重试的失败类型
+        self.cache = config.get("cache", {})  # 结果缓存配置：路径、各分组 TTL、淘汰策略
+        self.archive = config.get("archive", {})  # 页面存档配置：是否启用、存档目录、压缩格式（gzip / zstd）
+        self.variants = config.get("variants", {})  # 变体扩展配置：是否启用、最大深度、家族和总数上限
+        self.monitor = config.get("monitor", {})  # 变化监控配置：状态库路径、增量流路径、监控字段、是否同时输出全量快照
+        self.daemon = config.get("daemon", {})  # 常驻调度配置：调度表路径、刷新间隔、抖动、单轮批量上限
+        self.sessions = config.get("sessions", {})  # 会话池配置：Cookies 文件列表、请求预算、隔离阈值和时长
+        self.metrics = config.get("metrics", {})  # 指标配置：摘要间隔、Prometheus 文件 / HTTP 端口、逐 ASIN trace 文件
+        self.memory = config.get("memory", {})  # 内存上限配置：队列容量、去重集合和结果的溢写库、预计 ASIN 数量
+        self.shard = config.get("shard", {})  # 分片配置：协调器地址、批量大小、租约超时、本机工作进程数、共享口令
+        self.logging = config.get("logging", {})  # 日志配置：级别、文件
+        self._validate()
+
+    @classmethod
+    def load(cls, path=CONFIG_FILE):
+        """
+        :param path: str，配置文件路径
+        :return: Settings
+        """
+        with open(path, "r") as f:
+            return cls(json.load(f), path)
+
+    def _validate(self):
+        if set(self.output_formats) - set(OUTPUT_FORMATS):
+            raise ValueError(f"未知的输出格式: {self.output_formats}，可选: {OUTPUT_FORMATS}")
+        if self.fetch_backend not in FETCH_BACKENDS:
+            raise ValueError(f"未知的抓取后端: {self.fetch_backend}，可选: {FETCH_BACKENDS}")
+        if self.search_mode not in SEARCH_MODES:
+            raise ValueError(f"未知的搜索模式: {self.search_mode}，可选: {SEARCH_MODES}")
+        if self.fields is not None:
+            if self.variants.get("enabled", False) and "variants" not in self.fields:  # 变体扩展依赖变体 ASIN
+                self.fields = list(self.fields) + ["variants"]
+            self.fields = resolve_fields(self.fields)
+        self._validate_daemon()
+
+    def _validate_daemon(self):
+        """常驻模式下 ASIN 的刷新间隔（变化频繁时最短为 0.5 倍）必须长于 volatile 分组的缓存 TTL，
+        除非到期刷新强制重新抓取 volatile 分组，否则到期的 ASIN 只会命中缓存"""
+        refresh_groups = self.daemon.get("refresh_groups", ["volatile"])
+        if set(refresh_groups) - set(FIELD_GROUPS):
+            raise ValueError(f"未知的缓存分组: {refresh_groups}，可选: {list(FIELD_GROUPS)}")
+        if not self.cache.get("enabled", False) or "volatile" in refresh_groups:
+            return
+        volatile_ttl = self.cache.get("ttl", {}).get("volatile", DEFAULT_TTL["volatile"])
+        shortest = self.daemon.get("asin_interval", 6 * 3600) * (0.5 if self.monitor.get("enabled", False) else 1.0)
+        if shortest <= volatile_ttl:
+            raise ValueError(f"daemon.asin_interval 的最短刷新间隔 {shortest:.0f} 秒不长于缓存 volatile TTL "
+                             f"{volatile_ttl} 秒，到期刷新只会命中缓存；请加大间隔或在 daemon.refresh_groups 中加入 volatile")
+
+    def apply(self):
+        """应用进程级设置（站点根地址），由入口在开始抓取前调用一次"""
+        if self.base_url:
+            set_base_url(self.base_url)
@@ -0,0 +1,265 @@
+import asyncio
+import heapq
+import ipaddress
+import itertools
+import json
+import logging
+import time
+from collections import deque
+from scraper import ScrapeError  # 失败分类
+from retry_policy import RetryPolicy  # 失败的 ASIN 由协调器按策略重新分发
+from asin_input import iter_asins  # ASIN 列表文件（CSV / JSONL）
+
+# 协议：每条消息为一行 JSON，工作进程发出请求，协调器逐条应答
+#   {"op": "lease", "worker": id, "n": 20}                      -> {"batch": id, "asins": [...]} / {"wait": 秒} / {"done": true}
+#   {"op": "result", "batch": id, "asin": ..., "data": {...} | null, "kind": 失败类型} -> {"ok": true}
+#   {"op": "complete", "batch": id}                             -> {"ok": true}
+# 每条请求都带上 "token"，与协调器配置的共享口令一致才会被处理
+
+def read_asin_file(path):
+    """
+    读取 ASIN 列表文件（格式见 asin_input.iter_asins）。
+
+    :param path: str，文件路径
+    :return: list，去重后保持原顺序的 ASIN 列表
+    """
+    return list(dict.fromkeys(iter_asins(path)))
+
+def is_loopback(host):
+    """
+    :param host: str，监听地址
+    :return: bool，是否只在本机可达（localhost / 127.0.0.0/8 / ::1）
+    """
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:  # 空字符串（所有网卡）或其他主机名
+        return False
+
+class Coordinator:
+    """
+    分片协调器：把 ASIN 分批租给多个工作进程（本机或其他主机），接收逐条回传的结果。
+    - 租约超时（批次在 lease_timeout 内没有回传任何结果）或连接断开时，批次中尚未回传结果的 ASIN 重新排队；
+    - 失败的 ASIN 按 RetryPolicy 等待退避时间后重新分发，最终结果交给 on_result 回调（写出、记录日志等）。
+    """
+
+    def __init__(self, asins, on_result, batch_size=20, lease_timeout=300, retry_policy=None, token=""):
+        """
+        :param asins: iterable，需要抓取的 ASIN
+        :param on_result: callable，on_result(asin, product_data)，每个 ASIN 最终完成时调用一次（失败为 None）
+        :param batch_size: int，单次租出的最大 ASIN 数
+        :param lease_timeout: float，批次租约超时（秒），每回传一条结果顺延一次；超时未完成的 ASIN 重新分发
+        :param retry_policy: RetryPolicy，可选；默认 RetryPolicy()
+        :param token: str，共享口令，为空时不校验
+        """
+        self.pending = deque(dict.fromkeys(asins))
+        self.on_result = on_result
+        self.batch_size = batch_size
+        self.lease_timeout = lease_timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.token = token
+        self.attempts = {}  # ASIN -> 已分发次数
+        self.leases = {}  # 批次 ID -> {"asins": set, "worker": str, "deadline": float}
+        self.delayed = []  # 等待重试的 ASIN：(可重新分发的时间, ASIN) 小顶堆
+        self.remaining = len(self.pending)  # 尚未最终完成的 ASIN 数
+        self.success_count = 0
+        self.failed_asins = set()
+        self._batch_ids = itertools.count(1)
+        self.listening = asyncio.Event()  # 已开始监听，此后启动的工作进程不会被拒绝连接
+        self.address = None  # 实际监听的 (host, port)，port 为 0 时由系统分配
+        self._done = asyncio.Event()
+        if not self.remaining:
+            self._done.set()
+
+    def handle(self, request, conn_batches):
+        """
+        处理一条请求。
+
+        :param request: dict，解析后的请求
+        :param conn_batches: set，当前连接持有的批次 ID，连接断开时据此回收
+        :return: dict，应答
+        """
+        if self.token and request.get("token") != self.token:
+            return {"error": "unauthorized"}
+        op = request.get("op")
+        if op == "lease":
+            self._reclaim_expired()
+            self._release_delayed()
+            if self._done.is_set():
+                return {"done": True}
+            if not self.pending:  # 剩余 ASIN 在其他工作进程手中或在等待重试，稍后再来
+                wait = self.delayed[0][0] - time.monotonic() if self.delayed else 2
+                return {"wait": round(min(max(wait, 0.1), 2), 2)}
+            n = min(int(request.get("n") or self.batch_size), self.batch_size)
+            asins = [self.pending.popleft() for _ in range(min(n, len(self.pending)))]
+            batch_id = next(self._batch_ids)
+            for asin in asins:
+                self.attempts[asin] = self.attempts.get(asin, 0) + 1
+            self.leases[batch_id] = {
+                "asins": set(asins), "worker": request.get("worker"), "deadline": time.monotonic() + self.lease_timeout
+            }
+            conn_batches.add(batch_id)
+            return {"batch": batch_id, "asins": asins}
+        if op == "result":
+            self._result(request.get("batch"), request["asin"], request.get("data"), request.get("kind"))
+            return {"ok": True}
+        if op == "complete":
+            self._release(request.get("batch"))
+            conn_batches.discard(request.get("batch"))
+            return {"ok": True}
+        return {"error": f"unknown op: {op}"}
+
+    def _result(self, batch_id, asin, product_data, kind):
+        lease = self.leases.get(batch_id)
+        if lease is None or asin not in lease["asins"]:  # 租约已超时回收，结果以重新分发的那次为准
+            return
+        lease["asins"].discard(asin)
+        lease["deadline"] = time.monotonic() + self.lease_timeout  # 工作进程仍在推进，顺延租约
+        attempt = self.attempts.get(asin, 1)
+        if product_data is None and self.retry_policy.should_retry(kind or "error", attempt):
+            delay = self.retry_policy.delay(attempt)
+            logging.warning("⚠️ ASIN %s 在 %s 第 %s 次尝试失败（%s），%.1f 秒后重新分发",
+                            asin, lease["worker"], attempt, kind, delay)
+            heapq.heappush(self.delayed, (time.monotonic() + delay, asin))
+            return
+        if product_data:
+            self.success_count += 1
+        else:
+            self.failed_asins.add(asin)
+        self.on_result(asin, product_data)
+        self.remaining -= 1
+        if self.remaining == 0:
+            self._done.set()
+
+    def _release(self, batch_id):
+        """归还批次，未回传结果的 ASIN 重新排队（不计入重试次数）"""
+        lease = self.leases.pop(batch_id, None)
+        if lease and lease["asins"]:
+            logging.warning("⚠️ %s 的批次 %s 有 %d 个 ASIN 未完成，重新排队", lease["worker"], batch_id, len(lease["asins"]))
+            for asin in lease["asins"]:
+                self.attempts[asin] -= 1
+            self.pending.extend(lease["asins"])
+
+    def _release_delayed(self):
+        """退避时间已到的失败 ASIN 重新排队"""
+        now = time.monotonic()
+        while self.delayed and self.delayed[0][0] <= now:
+            self.pending.append(heapq.heappop(self.delayed)[1])
+
+    def _reclaim_expired(self):
+        now = time.monotonic()
+        for batch_id in [b for b, lease in self.leases.items() if lease["deadline"] < now]:
+            self._release(batch_id)
+
+    async def _serve_connection(self, reader, writer):
+        conn_batches = set()
+        peer = writer.get_extra_info("peername")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = self.handle(json.loads(line), conn_batches)
+                except (json.JSONDecodeError, KeyError) as e:
+                    response = {"error": str(e)}
+                writer.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):  # 连接断开，或协调器结束时关闭仍未断开的连接
+            pass
+        finally:
+            for batch_id in conn_batches:  # 工作进程退出或崩溃，回收它持有的批次
+                self._release(batch_id)
+            writer.close()
+            logging.info("🔌 工作进程 %s 已断开", peer)
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        """
+        监听并分发 ASIN，直到所有 ASIN 最终完成。开始监听后设置 listening。
+
+        :param host: str，监听地址；跨主机分片时使用 0.0.0.0
+        :param port: int，监听端口
+        :raises ValueError: 监听地址不是本机回环地址但没有设置共享口令
+        """
+        if not self.token and not is_loopback(host):
+            raise ValueError(f"分片协调器监听 {host or '所有网卡'} 时必须设置 shard.token，拒绝接受未认证的工作进程")
+        server = await asyncio.start_server(self._serve_connection, host, port)
+        self.address = server.sockets[0].getsockname()[:2]
+        self.listening.set()
+        logging.info("🧭 分片协调器监听 %s:%s，共 %d 个 ASIN，每批 %d 个", host, port, self.remaining, self.batch_size)
+        async with server:
+            await self._done.wait()
+            await asyncio.sleep(3)  # 留出时间让工作进程取到 done 后自行退出
+        logging.info("🎉 分片抓取完成：成功 %d 个，失败 %d 个，失败的 ASIN: %s",
+                     self.success_count, len(self.failed_asins), list(self.failed_asins))
+
+class ShardClient:
+    """工作进程一侧的协调器连接，同一连接上的请求串行收发"""
+
+    def __init__(self, host, port, worker_id, token=""):
+        self.host = host
+        self.port = port
+        self.worker_id = worker_id
+        self.token = token
+        self.reader = None
+        self.writer = None
+        self._lock = asyncio.Lock()
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, op, **fields):
+        async with self._lock:
+            message = {"op": op, "worker": self.worker_id, "token": self.token, **fields}
+            self.writer.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+            await self.writer.drain()
+            line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("协调器已关闭连接")
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(f"协调器拒绝请求: {response['error']}")
+        return response
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+async def run_shard_worker(client, scrape, concurrency=4, batch_size=20):
+    """
+    工作进程主循环：并发地租用批次、逐个抓取并立即回传结果，协调器返回 done 时退出。
+
+    :param client: ShardClient，已连接的协调器客户端
+    :param scrape: async callable，scrape(asin) -> dict，失败时抛出 ScrapeError
+    :param concurrency: int，同时处理的批次数
+    :param batch_size: int，每次租用的 ASIN 数
+    :return: int，本进程完成的 ASIN 数
+    """
+    completed = 0
+
+    async def lease_loop():
+        nonlocal completed
+        while True:
+            response = await client.request("lease", n=batch_size)
+            if response.get("done"):
+                return
+            if "wait" in response:
+                await asyncio.sleep(response["wait"])
+                continue
+            batch_id = response["batch"]
+            for asin in response["asins"]:
+                try:
+                    product_data, kind = await scrape(asin), None
+                except Exception as e:  # 单个 ASIN 的错误交给协调器决定是否重试
+                    product_data = None
+                    kind = e.kind if isinstance(e, ScrapeError) else "error"
+                    logging.warning("⚠️ ASIN %s 抓取失败（%s）: %s", asin, kind, e)
+                await client.request("result", batch=batch_id, asin=asin, data=product_data, kind=kind)
+                completed += 1
+            await client.request("complete", batch=batch_id)
+
+    await asyncio.gather(*(lease_loop() for _ in range(concurrency)))
+    logging.info("✅ 工作进程 %s 完成 %d 个 ASIN", client.worker_id, completed)
+    return completed
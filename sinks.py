@@ -0,0 +1,165 @@
+import csv
+import logging
+import os
+from fields import FIELDS  # 字段注册表中的类型转换
+from lazy import require  # pyarrow 导入较慢，只在 parquet 输出时加载
+
+# 支持的输出格式
+OUTPUT_FORMATS = ("csv", "parquet")
+
+# 固定的 CSV 表头（与原来按第一个结果生成、去掉 url 和 brand_link 后的顺序一致）
+CSV_FIELDS = [
+    "asin", "brand", "title", "price", "bought", "fabric_type", "frequently_returned",
+    "variants", "rating", "review_count", "negative_aspects", "customer_say"
+]
+
+def _pyarrow():
+    """按需导入 pyarrow（可选依赖：仅 parquet 输出需要）"""
+    hint = "parquet 输出需要 pyarrow，请先执行 `pip install pyarrow`"
+    return require("pyarrow", hint), require("pyarrow.parquet", hint)
+
+def to_typed_row(product):
+    """
+    将 get_product_details 的字符串结果转换为带类型的行，供分析型格式使用。
+
+    :param product: dict，商品详情
+    :return: dict，price / rating 为 float，review_count / bought 为 int，缺失值和未启用的字段为 None
+    """
+    row = {"asin": product.get("asin"), "url": product.get("url")}
+    for name, field in FIELDS.items():
+        value = product.get(name)
+        row[name] = field.typed(value) if value is not None else None
+    return row
+
+class CsvSink:
+    """
+    Excel 友好的 CSV 输出：ASIN 和品牌写成 HYPERLINK 公式，每行写入后立即 flush。
+    文件在第一行写入时才创建，没有结果时不会产生空文件。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.writer = None
+        self.rows = 0
+
+    def write(self, product):
+        if self.file is None:
+            self.file = open(self.path, "w", newline="", encoding="utf-8")
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(CSV_FIELDS)  # 写入表头
+        row = dict(product)  # 不修改调用方的字典
+        # 将 ASIN 转换为超链接格式
+        row["asin"] = f'=HYPERLINK("https://www.amazon.com/dp/{product["asin"]}", "{product["asin"]}")'
+        # 如果有品牌链接，将品牌转换为超链接
+        if product.get("brand_link"):
+            row["brand"] = f'=HYPERLINK("{product["brand_link"]}", "{product.get("brand", "N/A")}")'
+        # 写入一行数据，使用 get 方法避免字段缺失
+        self.writer.writerow([row.get(field, "N/A") for field in CSV_FIELDS])
+        self.file.flush()
+        self.rows += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+class ParquetSink:
+    """
+    带类型列的 Parquet 输出，按 batch_size 行分批写入 row group，内存占用有上限。
+    """
+
+    def __init__(self, path, batch_size=500):
+        _pyarrow()  # 未安装时在创建时就报错，而不是在第一次写入时
+        self.path = path
+        self.batch_size = batch_size
+        self.buffer = []
+        self.writer = None
+        self.rows = 0
+
+    @staticmethod
+    def schema():
+        pa, _ = _pyarrow()
+        return pa.schema([
+            ("asin", pa.string()),
+            ("brand", pa.string()),
+            ("brand_link", pa.string()),
+            ("title", pa.string()),
+            ("price", pa.float64()),
+            ("bought", pa.int64()),
+            ("fabric_type", pa.string()),
+            ("url", pa.string()),
+            ("frequently_returned", pa.bool_()),
+            ("variants", pa.list_(pa.string())),
+            ("rating", pa.float64()),
+            ("review_count", pa.int64()),
+            ("negative_aspects", pa.list_(pa.string())),
+            ("customer_say", pa.string()),
+        ])
+
+    def write(self, product):
+        self.buffer.append(to_typed_row(product))
+        self.rows += 1
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        pa, pq = _pyarrow()
+        schema = self.schema()
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, schema)
+        self.writer.write_table(pa.Table.from_pylist(self.buffer, schema=schema))
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+class MultiSink:
+    """同时写入多个输出格式"""
+
+    def __init__(self, sinks):
+        self.sinks = sinks
+
+    @property
+    def rows(self):
+        return self.sinks[0].rows if self.sinks else 0
+
+    @property
+    def paths(self):
+        return [sink.path for sink in self.sinks]
+
+    def write(self, product):
+        for sink in self.sinks:
+            sink.write(product)
+
+    def close(self):
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                logging.error("❌ 关闭输出文件 %s 失败: %s", sink.path, e)
+
+def open_sinks(output_file_path, formats=("csv",), parquet_batch_size=500):
+    """
+    按输出格式创建结果写入器。
+
+    :param output_file_path: str，CSV 输出路径，其他格式替换扩展名
+    :param formats: iterable，OUTPUT_FORMATS 中的格式
+    :param parquet_batch_size: int，Parquet 每个 row group 的行数
+    :return: MultiSink
+    """
+    base, _ = os.path.splitext(output_file_path)
+    sinks = []
+    for fmt in formats:
+        if fmt == "csv":
+            sinks.append(CsvSink(output_file_path))
+        elif fmt == "parquet":
+            sinks.append(ParquetSink(f"{base}.parquet", parquet_batch_size))
+        else:
+            raise ValueError(f"未知的输出格式: {fmt}，可选: {OUTPUT_FORMATS}")
+    return MultiSink(sinks)
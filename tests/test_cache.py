@@ -0,0 +1,87 @@
+import asyncio
+import json
+import time
+from bench_server import StandInServer
+from cache import AsinCache
+from detail_parser import parse_product_html
+from pipeline import scrape_asin
+
+ASIN = "B0TESTCACHE"
+
+class FakeFetcher:
+    """代替 HttpFetcher：返回替身服务器的详情页，并记录请求次数"""
+
+    def __init__(self):
+        self.html = StandInServer(None).detail_page(ASIN)
+        self.calls = 0
+
+    async def fetch(self, url):
+        self.calls += 1
+        return 200, self.html
+
+def _cached_record():
+    record = parse_product_html(ASIN, FakeFetcher().html)
+    return dict(record, title="Cached title", price="$1.00", rating="1.0")
+
+def _group_times(cache):
+    row = cache.conn.execute("SELECT group_times FROM products WHERE asin = ?", (ASIN,)).fetchone()
+    return json.loads(row[0])
+
+def test_stale_volatile_group_refreshes_only_its_fields(tmp_path):
+    cache = AsinCache(str(tmp_path / "cache.sqlite3"))
+    stored_at = time.time() - 7 * 3600  # volatile（6h）已过期，reviews（24h）和 catalog（7d）未过期
+    cache.store(ASIN, _cached_record(), now=stored_at)
+    fetcher = FakeFetcher()
+
+    product, from_cache = asyncio.run(scrape_asin(ASIN, None, http_fetcher=fetcher, cache=cache))
+
+    assert not from_cache
+    assert fetcher.calls == 1
+    fresh = parse_product_html(ASIN, fetcher.html)
+    assert product["price"] == fresh["price"] != "$1.00"  # volatile 分组重新抓取
+    assert product["bought"] == fresh["bought"]
+    assert product["title"] == "Cached title"  # catalog 分组沿用缓存
+    assert product["rating"] == "1.0"  # reviews 分组沿用缓存
+    times = _group_times(cache)
+    assert times["volatile"] > stored_at
+    assert times["catalog"] == stored_at and times["reviews"] == stored_at
+    cached, stale = cache.lookup(ASIN)
+    assert not stale and cached["price"] == fresh["price"] and cached["title"] == "Cached title"
+    cache.close()
+
+def test_fresh_groups_skip_fetch(tmp_path):
+    cache = AsinCache(str(tmp_path / "cache.sqlite3"))
+    cache.store(ASIN, _cached_record())
+    fetcher = FakeFetcher()
+
+    product, from_cache = asyncio.run(scrape_asin(ASIN, None, http_fetcher=fetcher, cache=cache))
+
+    assert from_cache and fetcher.calls == 0
+    assert product["price"] == "$1.00"
+    cache.close()
+
+def test_only_enabled_groups_are_checked(tmp_path):
+    cache = AsinCache(str(tmp_path / "cache.sqlite3"))
+    now = time.time()
+    cache.store(ASIN, _cached_record(), now=now - 8 * 24 * 3600)  # 全部分组过期
+    cache.store(ASIN, {"price": "$2.00", "bought": None}, groups=["volatile"], now=now)
+    fetcher = FakeFetcher()
+
+    product, from_cache = asyncio.run(scrape_asin(ASIN, None, http_fetcher=fetcher, cache=cache, fields=("price",)))
+
+    assert from_cache and fetcher.calls == 0  # 只启用 price 时，catalog 过期不触发抓取
+    assert product["price"] == "$2.00"
+    cache.close()
+
+def test_refresh_groups_force_refetch_of_fresh_group(tmp_path):
+    cache = AsinCache(str(tmp_path / "cache.sqlite3"))
+    cache.store(ASIN, _cached_record())
+    fetcher = FakeFetcher()
+
+    product, from_cache = asyncio.run(
+        scrape_asin(ASIN, None, http_fetcher=fetcher, cache=cache, refresh_groups=("volatile",))
+    )
+
+    assert not from_cache and fetcher.calls == 1  # 常驻模式的到期刷新不会只命中缓存
+    assert product["price"] != "$1.00" and product["title"] == "Cached title"
+    cache.close()
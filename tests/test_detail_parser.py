@@ -0,0 +1,71 @@
+import os
+import lxml.html
+from detail_parser import parse_product_html
+
+ASIN = "B0CN8SL6MV"
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", f"{ASIN}.html")
+
+def _fixture():
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        return f.read()
+
+def _without(html, *element_ids):
+    """删去带指定 id 的元素，模拟页面上缺少对应模块"""
+    tree = lxml.html.fromstring(html)
+    for element_id in element_ids:
+        element = tree.get_element_by_id(element_id)
+        element.getparent().remove(element)
+    return lxml.html.tostring(tree, encoding="unicode")
+
+def test_parses_every_field_from_saved_page():
+    product = parse_product_html(ASIN, _fixture())
+    variants = product.pop("variants")
+    assert sorted(variants) == ["B0CN8SL6MV", "B0CN8T2QXR", "B0CN8V7LMK"]  # 空的 data-asin 被丢弃
+    assert product == {
+        "asin": ASIN,
+        "url": "https://www.amazon.com/dp/B0CN8SL6MV",
+        "brand": "Kitchen Joy",
+        "brand_link": "https://www.amazon.com/stores/KitchenJoy/page/5C7A2B4E-1F3D-4C6B-9A8E-2D1F0B3C4A5E?ref_=ast_bln",
+        "title": "Kitchen Joy Floral Apron for Women with 2 Pockets, Adjustable Neck Strap Cooking Apron",
+        "price": "$15.99",
+        "bought": "500+",
+        "fabric_type": "100% Cotton",
+        "frequently_returned": True,
+        "rating": "4.6",
+        "review_count": "1287",
+        "negative_aspects": ["Thin material", "Size"],
+        "customer_say": ("Customers like the pretty floral print, pockets and adjustable fit of this apron. "
+                         "They mention it washes well, but some say the fabric is thinner than expected."),
+    }
+
+def test_missing_fields_fall_back_to_defaults():
+    html = _without(_fixture(), "bylineInfo_feature_div", "corePriceDisplay_desktop_feature_div",
+                    "socialProofingAsinFaceout_feature_div", "productFactsDesktop_feature_div", "rightCol",
+                    "twister_feature_div", "averageCustomerReviews_feature_div", "reviewsMedley")
+    product = parse_product_html(ASIN, html)
+    assert product["title"].startswith("Kitchen Joy Floral Apron")
+    assert product["brand"] == "Brand not found"
+    assert product["brand_link"] is None
+    assert product["price"] == "Price not found"
+    assert product["bought"] == "< 50"
+    assert product["fabric_type"] is None
+    assert product["frequently_returned"] is False
+    assert product["variants"] == []
+    assert product["rating"] == "Rating not found"
+    assert product["review_count"] == "Review count not found"
+    assert product["negative_aspects"] == []
+    assert product["customer_say"] == "Customer say not found"
+
+def test_disabled_fields_are_none():
+    product = parse_product_html(ASIN, _fixture(), fields=("price",))
+    assert product["price"] == "$15.99"
+    assert product["rating"] is None
+    assert product["variants"] is None
+
+def test_non_detail_pages_return_none():
+    assert parse_product_html(ASIN, "") is None
+    # 搜索结果页、狗页面等没有 #productTitle
+    assert parse_product_html(ASIN, "<html><body><div data-asin='B0CN8SL6MV'>result</div></body></html>") is None
+    captcha = ("<html><body><form action='/errors/validateCaptcha'><input id='captchacharacters' name='field-keywords'>"
+               "</form><span id='productTitle'>x</span></body></html>")
+    assert parse_product_html(ASIN, captcha) is None
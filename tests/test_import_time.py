@@ -0,0 +1,18 @@
+import pytest
+from cli import LIBRARY_MODULES, probe_import
+
+@pytest.mark.parametrize("module", LIBRARY_MODULES)
+def test_library_import_has_no_side_effects(module):
+    # 已安装的重依赖（如 lxml、zstandard）也不得在导入时被加载
+    result = probe_import(module)
+    assert result["heavy"] == []
+    assert result["files"] == []
+    assert result["handlers"] == 0
+
+def test_zstandard_loaded_only_when_archive_uses_zstd(tmp_path):
+    pytest.importorskip("zstandard")
+    for module in ("archive", "main"):
+        assert "zstandard" not in probe_import(module)["heavy"]
+    from archive import PageArchive, _compress, _decompress
+    assert _decompress(_compress(b"<html></html>", "zstd"), "zstd") == b"<html></html>"
+    PageArchive(str(tmp_path / "archive"), codec="zstd").close()
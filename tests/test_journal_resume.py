@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from journal import CrawlJournal
+from pipeline import CrawlPipeline
+
+INPUT = "asins"  # asin_input.input_name("asins.csv")
+
+def _journal(tmp_path, input_done=False):
+    """上次运行：直接输入 INPUT（已完成一个 ASIN），以及一个尚未搜索完的搜索词"""
+    journal = CrawlJournal(str(tmp_path / "crawl_journal.jsonl"))
+    journal.open()
+    journal.record_query(INPUT, str(tmp_path / "in.csv"), str(tmp_path / "in_out.csv"), source="input")
+    journal.record_enqueue(INPUT, ["B0A"])
+    if input_done:
+        journal.record_search_done(INPUT)
+    journal.record_query("floral apron", str(tmp_path / "q.csv"), str(tmp_path / "q_out.csv"))
+    journal.record_result("B0A", {"asin": "B0A", "title": "Apron"})
+    journal.close()
+    resumed = CrawlJournal(journal.path)
+    resumed.open(resume=True)
+    return resumed
+
+def _pipeline(tmp_path, journal, searched):
+    pipeline = CrawlPipeline(None, 1, 1, str(tmp_path), "asins.csv", "out.csv", journal=journal)
+
+    async def fake_search(query, semaphore):
+        searched.append(query)
+        journal.record_search_done(query)
+    pipeline._search = fake_search
+    return pipeline
+
+def test_unfinished_input_is_never_searched(tmp_path):
+    journal, searched = _journal(tmp_path), []
+    with pytest.raises(RuntimeError):
+        asyncio.run(_pipeline(tmp_path, journal, searched).run([]))
+    assert searched == []
+    journal.close()
+
+def test_input_is_refed_instead_of_searched(tmp_path):
+    journal, searched = _journal(tmp_path), []
+    pipeline = _pipeline(tmp_path, journal, searched)
+    asyncio.run(pipeline.run([], seeds={INPUT: ["B0A"]}))
+    assert searched == ["floral apron"]
+    assert pipeline.queries[INPUT].success_count == 1
+    journal.close()
+
+def test_finished_input_resumes_without_the_file(tmp_path):
+    journal, searched = _journal(tmp_path, input_done=True), []
+    asyncio.run(_pipeline(tmp_path, journal, searched).run([]))
+    assert searched == ["floral apron"]
+    journal.close()
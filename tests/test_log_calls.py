@@ -0,0 +1,34 @@
+import ast
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEVELS = {"debug", "info", "warning", "error", "exception", "critical", "log"}
+
+def _eager_message(node):
+    """日志消息在调用处就已拼好：f-string、"..." % args、"...".format(...)"""
+    if isinstance(node, ast.JoinedStr):
+        return True
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Mod) and isinstance(node.left, ast.Constant):
+        return True
+    return (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "format"
+            and isinstance(node.func.value, ast.Constant))
+
+def test_log_calls_use_lazy_arguments():
+    # 日志消息统一用 %s 延迟格式化：被级别或 SampleFilter 丢弃的记录不做字符串拼接
+    offenders = []
+    for dirpath, dirnames, filenames in os.walk(ROOT):
+        dirnames[:] = [name for name in dirnames if not name.startswith(".") and name != "__pycache__"]
+        for filename in filenames:
+            if not filename.endswith(".py"):
+                continue
+            path = os.path.join(dirpath, filename)
+            with open(path, "r", encoding="utf-8") as f:
+                tree = ast.parse(f.read(), path)
+            for node in ast.walk(tree):
+                if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                        and node.func.attr in LEVELS and isinstance(node.func.value, ast.Name)
+                        and node.func.value.id in ("logging", "logger") and node.args):
+                    message = node.args[1] if node.func.attr == "log" and len(node.args) > 1 else node.args[0]
+                    if _eager_message(message):
+                        offenders.append(f"{os.path.relpath(path, ROOT)}:{node.lineno}")
+    assert offenders == []
@@ -0,0 +1,34 @@
+from pipeline import CrawlPipeline, QueryState
+
+def _pipeline(tmp_path, max_queue):
+    pipeline = CrawlPipeline(None, 1, 1, str(tmp_path), "asins.csv", "out.csv", max_queue=max_queue)
+    pipeline.queries["q"] = QueryState("q", str(tmp_path), "asins.csv", "out.csv")
+    return pipeline
+
+def _take(pipeline):
+    """模拟工作协程领取一个任务"""
+    item = pipeline.queue.get_nowait()
+    pipeline._refill()
+    return item
+
+def test_every_producer_respects_max_queue(tmp_path):
+    pipeline = _pipeline(tmp_path, max_queue=2)
+    pipeline.enqueue("q", ["B01", "B02", "B03"])  # 搜索或批量入队一次给出超过上限的 ASIN
+    pipeline._requeue("B00", 2)  # 重试定时器不能等待
+    assert pipeline.queue.qsize() == 2
+    assert list(pipeline.overflow) == [("B03", 1), ("B00", 2)]
+    assert not pipeline._room.is_set()  # 搜索和批量入队暂停
+
+    taken = []
+    while pipeline.backlog():
+        taken.append(_take(pipeline))
+        assert pipeline.queue.qsize() <= 2
+    assert taken == [("B01", 1), ("B02", 1), ("B03", 1), ("B00", 2)]  # 溢出区先到先抓
+    assert pipeline._room.is_set()
+
+def test_unbounded_queue_skips_overflow(tmp_path):
+    pipeline = _pipeline(tmp_path, max_queue=0)
+    pipeline.enqueue("q", ["B01", "B02", "B03"])
+    pipeline._requeue("B00", 2)
+    assert pipeline.queue.qsize() == 4 and not pipeline.overflow
+    assert pipeline._room.is_set()
@@ -0,0 +1,69 @@
+import asyncio
+import types
+import pytest
+import shard
+from retry_policy import RetryPolicy
+from shard import Coordinator, ShardClient, is_loopback
+
+class FixedDelayPolicy(RetryPolicy):
+    """退避时间固定，便于断言"""
+
+    def delay(self, attempt):
+        return 10.0
+
+def _coordinator(monkeypatch, asins, **kwargs):
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(shard, "time", types.SimpleNamespace(monotonic=lambda: clock.now))
+    results = {}
+    coordinator = Coordinator(asins, results.__setitem__, retry_policy=FixedDelayPolicy(), **kwargs)
+    return coordinator, clock, results
+
+def test_failed_asin_waits_for_retry_delay(monkeypatch):
+    coordinator, clock, results = _coordinator(monkeypatch, ["B0A"])
+    batch = coordinator.handle({"op": "lease", "n": 5}, set())
+    coordinator.handle({"op": "result", "batch": batch["batch"], "asin": "B0A", "data": None, "kind": "timeout"}, set())
+    coordinator.handle({"op": "complete", "batch": batch["batch"]}, set())
+
+    response = coordinator.handle({"op": "lease", "n": 5}, set())
+    assert "wait" in response and "B0A" not in coordinator.pending
+    clock.now += 9
+    assert "wait" in coordinator.handle({"op": "lease", "n": 5}, set())
+    clock.now += 1
+    assert coordinator.handle({"op": "lease", "n": 5}, set())["asins"] == ["B0A"]
+    assert coordinator.attempts["B0A"] == 2
+    assert not results
+
+def test_each_result_extends_the_lease(monkeypatch):
+    coordinator, clock, results = _coordinator(monkeypatch, ["B0A", "B0B", "B0C"], lease_timeout=60)
+    batch = coordinator.handle({"op": "lease", "n": 5}, set())["batch"]
+    for asin in ("B0A", "B0B"):
+        clock.now += 50
+        coordinator.handle({"op": "result", "batch": batch, "asin": asin, "data": {"asin": asin}}, set())
+        assert "wait" in coordinator.handle({"op": "lease", "n": 5}, set())  # 租约未被回收
+    assert coordinator.leases[batch]["asins"] == {"B0C"}
+
+    clock.now += 61  # 之后再没有结果回传，租约超时，剩余 ASIN 重新排队
+    assert coordinator.handle({"op": "lease", "n": 5}, set())["asins"] == ["B0C"]
+    assert set(results) == {"B0A", "B0B"}
+
+def test_serve_signals_listening_before_workers_connect():
+    async def scenario():
+        coordinator = Coordinator(["B0A"], lambda asin, data: None)
+        serve_task = asyncio.create_task(coordinator.serve("127.0.0.1", 0))
+        await asyncio.wait_for(coordinator.listening.wait(), 5)
+        client = ShardClient(*coordinator.address, "test-worker")
+        await client.connect()  # 设置 listening 后连接不会被拒绝
+        response = await client.request("lease", n=5)
+        await client.close()
+        serve_task.cancel()
+        await asyncio.gather(serve_task, return_exceptions=True)
+        return response
+    assert asyncio.run(scenario())["asins"] == ["B0A"]
+
+def test_serve_refuses_public_host_without_token():
+    coordinator = Coordinator(["B0A"], lambda asin, data: None)
+    with pytest.raises(ValueError):
+        asyncio.run(coordinator.serve("0.0.0.0", 0))
+    assert not coordinator.listening.is_set()
+    assert is_loopback("127.0.0.1") and is_loopback("::1") and is_loopback("localhost")
+    assert not is_loopback("") and not is_loopback("10.0.0.5")
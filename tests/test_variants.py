@@ -0,0 +1,26 @@
+from fields import FAMILY_FIELDS
+from variants import VariantExpander
+
+def _record(asin, variants, **family):
+    record = {"asin": asin, "variants": variants, "title": f"Apron {asin}", "price": "$15.99"}
+    record.update({field: None for field in FAMILY_FIELDS})  # build_product_record 对缺失字段输出 None
+    record.update(family)
+    return record
+
+FAMILY = {"brand": "Kitchen Joy", "brand_link": "https://www.amazon.com/stores/KitchenJoy",
+          "negative_aspects": ["Thin material"], "customer_say": "Customers like the print."}
+
+def test_record_without_family_fields_is_not_used_as_template():
+    expander = VariantExpander()
+    expander.set_root("B0A")
+    assert expander.expand("B0A", _record("B0A", ["B0A", "B0B", "B0C"])) == ["B0B", "B0C"]
+    assert expander.shared_fields("B0B") is None  # 第一个记录没有家族字段，兄弟变体仍需自己抽取
+
+    expander.expand("B0B", _record("B0B", ["B0A", "B0B", "B0C"], **FAMILY))
+    assert expander.shared_fields("B0C") == FAMILY
+
+def test_only_enabled_family_fields_are_shared():
+    expander = VariantExpander(fields=["price", "brand"])
+    expander.set_root("B0A")
+    expander.expand("B0A", _record("B0A", ["B0B"], brand="Kitchen Joy"))
+    assert expander.shared_fields("B0B") == {"brand": "Kitchen Joy"}
@@ -0,0 +1,24 @@
+import os
+
+# Amazon 站点根地址。基准测试时通过环境变量 AMZ_BASE_URL、config.json 的 base_url 或 set_base_url
+# 指向本地替身服务器（bench_server.py），搜索、详情页和 HTTP 快速路径都会跟着切换
+BASE_URL = os.environ.get("AMZ_BASE_URL", "https://www.amazon.com").rstrip("/")
+
+def set_base_url(url):
+    """
+    :param url: str，站点根地址，例如 http://127.0.0.1:8800
+    """
+    global BASE_URL
+    BASE_URL = url.rstrip("/")
+
+def product_url(asin):
+    """商品详情页 URL"""
+    return f"{BASE_URL}/dp/{asin}"
+
+def search_url(query):
+    """搜索结果第一页 URL"""
+    return f"{BASE_URL}/s?k={query.replace(' ', '+')}"
+
+def absolute_url(path):
+    """把页面中的站内相对链接（如品牌链接）补全为绝对地址"""
+    return f"{BASE_URL}{path}"
@@ -0,0 +1,92 @@
+import logging
+from fields import FAMILY_FIELDS, resolve_fields  # 同一变体家族共享的字段
+
+class VariantExpander:
+    """
+    变体图扩展：把详情页上的变体 ASIN 作为新节点按广度优先加入共享队列。
+    - 已发现的 ASIN 用集合（字典）判重，每个 ASIN 只入队一次；
+    - 同一家族（互为变体的 ASIN）的共享字段只抓取一次，后续变体抓取时跳过并直接补齐；
+    - 深度、单个家族大小和总扩展数量都有上限，避免一个商品的变体把整个抓取撑爆。
+    """
+
+    def __init__(self, max_depth=1, max_family_size=50, max_total=2000, fields=None):
+        """
+        :param max_depth: int，最大扩展深度，搜索结果为第 0 层，其直接变体为第 1 层
+        :param max_family_size: int，单个家族最多扩展出的变体数量
+        :param max_total: int，整次运行最多扩展出的变体数量
+        :param fields: iterable，可选；本次运行启用的字段，只共享其中的家族字段，None 表示全部字段
+        """
+        enabled = resolve_fields(fields)
+        self.shared = tuple(name for name in FAMILY_FIELDS if name in enabled)  # 启用的家族共享字段
+        self.max_depth = max_depth
+        self.max_family_size = max_family_size
+        self.max_total = max_total
+        self.depth = {}  # 已发现的 ASIN -> 深度，同时作为去重集合
+        self.family_of = {}  # ASIN -> 家族 ID（家族中第一个完成抓取的 ASIN）
+        self.family_fields = {}  # 家族 ID -> 共享字段
+        self.family_size = {}  # 家族 ID -> 已扩展出的变体数量
+        self.expanded_total = 0
+
+    @classmethod
+    def from_config(cls, variants_config, fields=None):
+        """
+        根据 config.json 中的 variants 配置创建扩展器。
+
+        :param variants_config: dict，variants 配置段
+        :param fields: iterable，可选；本次运行启用的字段（config.json 的 fields）
+        :return: VariantExpander；未启用时返回 None（只抓取搜索结果中的 ASIN）
+        """
+        if not variants_config or not variants_config.get("enabled", False):
+            return None
+        options = {key: value for key, value in variants_config.items() if key != "enabled"}
+        return cls(fields=fields, **options)
+
+    def set_root(self, asin):
+        """登记来自搜索结果（或恢复日志）的 ASIN，深度为 0"""
+        self.depth.setdefault(asin, 0)
+
+    def shared_fields(self, asin):
+        """
+        :param asin: str，即将抓取的 ASIN
+        :return: dict，所在家族已抓取到的共享字段；家族尚无完成的记录时返回 None
+        """
+        family = self.family_of.get(asin)
+        return self.family_fields.get(family) if family is not None else None
+
+    def expand(self, asin, product_data):
+        """
+        根据抓取结果扩展变体，并登记家族共享字段。
+
+        :param asin: str，已抓取完成的 ASIN
+        :param product_data: dict，商品详情
+        :return: list，需要新入队的变体 ASIN
+        """
+        variants = product_data.get("variants") or []
+        family = self.family_of.get(asin)
+        if family is None:  # 搜索结果中互为变体的 ASIN 归入同一家族
+            family = next((self.family_of[v] for v in variants if v in self.family_of), asin)
+            self.family_of[asin] = family
+        # build_product_record 输出全部字段，缺失或未抽取的为 None；共享字段齐全的记录才作为家族模板
+        if (family not in self.family_fields and self.shared
+                and all(product_data.get(field) is not None for field in self.shared)):
+            self.family_fields[family] = {field: product_data[field] for field in self.shared}
+
+        depth = self.depth.get(asin, 0)
+        if depth >= self.max_depth:
+            return []
+        new_asins = []
+        for variant in variants:
+            if variant in self.depth:  # 已发现（入队或完成）的 ASIN 不再扩展
+                self.family_of.setdefault(variant, family)
+                continue
+            if self.family_size.get(family, 0) >= self.max_family_size or self.expanded_total >= self.max_total:
+                logging.warning("⚠️ 变体扩展达到上限，ASIN %s 剩余变体不再抓取", asin)
+                break
+            self.depth[variant] = depth + 1
+            self.family_of[variant] = family
+            self.family_size[family] = self.family_size.get(family, 0) + 1
+            self.expanded_total += 1
+            new_asins.append(variant)
+        if new_asins:
+            logging.info("🧬 ASIN %s 扩展出 %d 个变体（家族 %s，深度 %d）", asin, len(new_asins), family, depth + 1)
+        return new_asins